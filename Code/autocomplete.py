@@ -3,6 +3,9 @@
 import sys
 import time
 
+# Names of the autocomplete algorithms implemented below
+ALGORITHMS = ['linear_search', 'sorted_index', 'trie']
+
 
 def get_lines(filename='/usr/share/dict/words'):
     """Return a list of strings on separate lines in the given text file with
@@ -21,25 +24,73 @@ def generate_prefixes(vocabulary):
 
 def autocomplete_setup(vocabulary, algorithm='linear_search'):
     """Return the main data structure needed to set up autocomplete using the
-    given vocabulary and algorithm, specified as linear_search, trie, etc."""
+    given vocabulary and algorithm, specified as linear_search, sorted_index,
+    trie, etc."""
     if algorithm == 'linear_search':
         # Use the given vocabulary list
         return vocabulary
+    elif algorithm == 'sorted_index':
+        from sorting_integer import msd_radix_sort
+        # Create a sorted copy of the vocabulary to binary search
+        index = list(vocabulary)
+        msd_radix_sort(index)
+        return index
     elif algorithm == 'trie':
-        from trie import Trie
-        # Create a trie structure with the vocabulary
-        return Trie(vocabulary)
+        from prefixtree import PrefixTree
+        # Create a prefix tree (trie) structure with the vocabulary
+        return PrefixTree.from_strings(vocabulary)
+    raise ValueError('Unknown autocomplete algorithm: {!r}'.format(algorithm))
 
 
 def autocomplete(prefix, structure, algorithm='linear_search'):
     """Return all vocabulary entries that start with the given prefix using the
-    given structure and algorithm, specified as linear_search, trie, etc."""
+    given structure and algorithm, specified as linear_search, sorted_index,
+    trie, etc."""
     if algorithm == 'linear_search':
         # Search the list using linear search
         return [word for word in structure if word.startswith(prefix)]
+    elif algorithm == 'sorted_index':
+        # Binary search for the first word not less than the prefix, then
+        # scan while words still start with the prefix
+        from bisect import bisect_left
+        completions = []
+        for index in range(bisect_left(structure, prefix), len(structure)):
+            if not structure[index].startswith(prefix):
+                break
+            completions.append(structure[index])
+        return completions
     elif algorithm == 'trie':
-        # Search the trie structure for the prefix
-        return structure.search(prefix)
+        # Search the prefix tree structure for the prefix
+        completions = structure.complete(prefix)
+        if not prefix:
+            # The prefix tree always stores the empty string, which isn't
+            # part of the vocabulary
+            completions = [word for word in completions if word]
+        return completions
+    raise ValueError('Unknown autocomplete algorithm: {!r}'.format(algorithm))
+
+
+def autocomplete_top(prefix, structure, k, score=None,
+                     algorithm='linear_search'):
+    """Return the k best vocabulary entries that start with the given prefix,
+    ranked from highest to lowest score according to the given score function
+    (by default, shorter entries rank higher). Completions are streamed through
+    a bounded TopK selector, so only k of them are kept in memory."""
+    from topk import TopK
+    if score is None:
+        score = _shortest_first
+    selector = TopK(k, key=score)
+    if algorithm == 'linear_search':
+        # Stream matches without building the full list of completions
+        selector.extend(word for word in structure if word.startswith(prefix))
+    else:
+        selector.extend(autocomplete(prefix, structure, algorithm))
+    return selector.results()
+
+
+def _shortest_first(word):
+    """Return a score that ranks shorter words higher."""
+    return -len(word)
 
 
 def main():
@@ -62,15 +113,15 @@ def main():
         vocabulary = get_lines('/usr/share/dict/words')
 
         # Start the clock for benchmarking
-        start_time = time.time()
+        start_time = time.perf_counter()
 
         # Set up autocomplete and mark the clock
         structure = autocomplete_setup(vocabulary)
-        setup_time = time.time()
+        setup_time = time.perf_counter()
 
         # Run autocomplete and mark the clock
         completions = autocomplete(prefix, structure)
-        end_time = time.time()
+        end_time = time.perf_counter()
 
         print('Vocabulary size: {}'.format(len(vocabulary)))
         print('Completions of {}: {}'.format(prefix, ', '.join(completions)))
@@ -85,11 +136,11 @@ def main():
         prefixes = get_lines(sys.argv[1])
 
         # Start the clock for benchmarking
-        start_time = time.time()
+        start_time = time.perf_counter()
 
         # Set up autocomplete and mark the clock
         structure = autocomplete_setup(vocabulary)
-        setup_time = time.time()
+        setup_time = time.perf_counter()
 
         # Run autocomplete with each prefix
         num_completions = 0
@@ -99,7 +150,7 @@ def main():
             # print('Completions of {}: {}'.format(prefix, ', '.join(completions)))
 
         # Mark the clock
-        end_time = time.time()
+        end_time = time.perf_counter()
 
         print('Vocabulary size: {}'.format(len(vocabulary)))
         print('Found {} total completions of {} prefixes'
@@ -0,0 +1,207 @@
+#!python
+"""Benchmark harness that compares autocomplete algorithms on vocabularies of
+several sizes with real and generated prefix workloads, measuring index build
+time and memory, per-query latency percentiles and histograms, and query
+throughput, and writes the results as JSON."""
+import json
+import os
+import random
+import sys
+import time
+import tracemalloc
+
+from autocomplete import (ALGORITHMS, autocomplete_setup, autocomplete,
+                          get_lines)
+from sorting_benchmark import generate
+from sorting_recursive import percentile
+
+# Default vocabulary sizes for generated vocabularies
+VOCABULARY_SIZES = [1000, 10000, 100000]
+# Default number of prefixes in a generated workload
+NUM_PREFIXES = 1000
+# Prefix files bundled with this project, used as real workloads
+PREFIX_FILES = ['prefixes5.txt', 'prefixes15.txt']
+# Latency percentiles reported for each benchmark
+PERCENTILES = [50, 90, 99]
+
+
+def generate_prefixes(vocabulary, count, seed=0, max_length=4):
+    """Return a list of `count` prefixes of 1 to `max_length` letters of
+    words chosen at random from the given vocabulary, generated from the
+    given seed so that every run uses the same workload."""
+    rng = random.Random(seed)
+    prefixes = []
+    for _ in range(count):
+        word = rng.choice(vocabulary)
+        prefixes.append(word[:rng.randint(1, max_length)])
+    return prefixes
+
+
+def histogram(latencies):
+    """Return a dict mapping each power of 2 to the number of latencies (in
+    nanoseconds) that are less than it but at least half of it."""
+    counts = {}
+    for latency in latencies:
+        bucket = 1 << max(0, latency).bit_length()
+        counts[bucket] = counts.get(bucket, 0) + 1
+    return dict(sorted(counts.items()))
+
+
+def build_index(vocabulary, algorithm):
+    """Set up the given autocomplete algorithm on the given vocabulary and
+    return its structure, its build time in nanoseconds, and the number of
+    bytes of memory it holds (traced by tracemalloc)."""
+    started = not tracemalloc.is_tracing()
+    if started:
+        tracemalloc.start()
+    try:
+        before = tracemalloc.get_traced_memory()[0]
+        start_time = time.perf_counter_ns()
+        structure = autocomplete_setup(vocabulary, algorithm)
+        build_time = time.perf_counter_ns() - start_time
+        memory = tracemalloc.get_traced_memory()[0] - before
+    finally:
+        if started:
+            tracemalloc.stop()
+    # Tracing slows down setup, so time it again without tracing
+    start_time = time.perf_counter_ns()
+    structure = autocomplete_setup(vocabulary, algorithm)
+    build_time = time.perf_counter_ns() - start_time
+    return structure, build_time, memory
+
+
+def run_queries(structure, prefixes, algorithm, warmup=1):
+    """Run autocomplete for each given prefix after `warmup` untimed passes
+    through all prefixes, and return a list of per-query latencies in
+    nanoseconds and the total number of completions found."""
+    for _ in range(warmup):
+        for prefix in prefixes:
+            autocomplete(prefix, structure, algorithm)
+    latencies = []
+    num_completions = 0
+    for prefix in prefixes:
+        start_time = time.perf_counter_ns()
+        completions = autocomplete(prefix, structure, algorithm)
+        latencies.append(time.perf_counter_ns() - start_time)
+        num_completions += len(completions)
+    return latencies, num_completions
+
+
+def benchmark_algorithm(vocabulary, prefixes, algorithm, warmup=1):
+    """Return a dict of build time, memory and query latency measurements of
+    the given autocomplete algorithm on the given vocabulary and prefixes."""
+    structure, build_time, memory = build_index(vocabulary, algorithm)
+    latencies, num_completions = run_queries(structure, prefixes, algorithm,
+                                              warmup)
+    ordered = sorted(latencies)
+    total_time = sum(latencies)
+    result = {
+        'algorithm': algorithm,
+        'vocabulary_size': len(vocabulary),
+        'num_prefixes': len(prefixes),
+        'num_completions': num_completions,
+        'build_ns': build_time,
+        'memory_bytes': memory,
+        'query_total_ns': total_time,
+        'throughput_qps': (len(prefixes) * 1e9 / total_time
+                           if total_time else None),
+        'max_ns': ordered[-1] if ordered else None,
+        'histogram_ns': histogram(latencies),
+    }
+    for percent in PERCENTILES:
+        result['p{}_ns'.format(percent)] = (
+            percentile(ordered, percent, presorted=True) if ordered else None)
+    return result
+
+
+def load_workloads(vocabulary, num_prefixes=NUM_PREFIXES, seed=0,
+                   directory=None):
+    """Return a dict mapping workload names to lists of prefixes: the bundled
+    prefix files that exist in the given directory (by default, the one
+    containing this module) and prefixes generated from the vocabulary."""
+    if directory is None:
+        directory = os.path.dirname(os.path.abspath(__file__))
+    workloads = {}
+    for filename in PREFIX_FILES:
+        path = os.path.join(directory, filename)
+        if os.path.exists(path):
+            workloads[os.path.splitext(filename)[0]] = get_lines(path)
+    workloads['generated'] = generate_prefixes(vocabulary, num_prefixes, seed)
+    return workloads
+
+
+def run_suite(vocabularies, algorithms=ALGORITHMS, num_prefixes=NUM_PREFIXES,
+              seed=0, warmup=1, log=None):
+    """Benchmark the given algorithms with every workload on each of the
+    given vocabularies (a dict mapping names to lists of words), and return
+    a list of result dicts. Progress is written to the given log file."""
+    results = []
+    for vocabulary_name, vocabulary in vocabularies.items():
+        workloads = load_workloads(vocabulary, num_prefixes, seed)
+        for workload_name, prefixes in workloads.items():
+            for algorithm in algorithms:
+                result = benchmark_algorithm(vocabulary, prefixes, algorithm,
+                                             warmup)
+                result['vocabulary'] = vocabulary_name
+                result['workload'] = workload_name
+                results.append(result)
+                if log is not None:
+                    log.write('{:>12} {:>10} {:>14} build {:>10.3f}ms '
+                              'p50 {:>9}ns p99 {:>9}ns {:>10.0f} q/s\n'.format(
+                                  vocabulary_name, workload_name, algorithm,
+                                  result['build_ns'] / 1e6, result['p50_ns'],
+                                  result['p99_ns'],
+                                  result['throughput_qps'] or 0))
+                    log.flush()
+    return results
+
+
+def main():
+    """Read command-line arguments and run the autocomplete benchmarks."""
+    import argparse
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--vocabulary', metavar='FILE', action='append',
+                        help='vocabulary file with one word per line (may be '
+                             'repeated; default: generated vocabularies)')
+    parser.add_argument('--sizes', type=int, nargs='+',
+                        default=VOCABULARY_SIZES,
+                        help='generated vocabulary sizes (default: '
+                             '%(default)s)')
+    parser.add_argument('--algorithms', nargs='+', default=ALGORITHMS,
+                        choices=ALGORITHMS, metavar='ALGORITHM',
+                        help='algorithms (default: all of {})'
+                        .format(', '.join(ALGORITHMS)))
+    parser.add_argument('--prefixes', type=int, default=NUM_PREFIXES,
+                        help='generated prefixes per workload (default: '
+                             '%(default)s)')
+    parser.add_argument('--warmup', type=int, default=1,
+                        help='untimed passes through each workload first '
+                             '(default: %(default)s)')
+    parser.add_argument('--seed', type=int, default=0,
+                        help='seed for generated data (default: %(default)s)')
+    parser.add_argument('--output', '-o',
+                        help='output JSON file (default: standard output)')
+    args = parser.parse_args()
+
+    if args.vocabulary:
+        vocabularies = {os.path.basename(filename): get_lines(filename)
+                        for filename in args.vocabulary}
+    else:
+        vocabularies = {str(size): generate('strings', size, args.seed)
+                        for size in args.sizes}
+    results = run_suite(vocabularies, args.algorithms, args.prefixes,
+                        args.seed, args.warmup, log=sys.stderr)
+    output = {'environment': {'python': sys.version.split()[0],
+                              'platform': sys.platform},
+              'results': results}
+    if args.output:
+        with open(args.output, 'w') as file:
+            json.dump(output, file, indent=2)
+            file.write('\n')
+    else:
+        json.dump(output, sys.stdout, indent=2)
+        sys.stdout.write('\n')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,73 @@
+#!python
+
+from autocomplete import autocomplete_setup, autocomplete
+import autocomplete_benchmark
+import unittest
+
+
+class AutocompleteTest(unittest.TestCase):
+
+    vocabulary = ['axle', 'axled', 'axlesmith', 'axletree', 'apple', 'ax',
+                  'banana', 'axe']
+
+    def test_sorted_index(self):
+        index = autocomplete_setup(self.vocabulary, 'sorted_index')
+        assert index == sorted(self.vocabulary)
+        assert self.vocabulary[0] == 'axle'  # Vocabulary isn't modified
+        for prefix in ['axl', 'ax', 'a', 'b', 'c', '', 'axletree', 'zzz']:
+            expected = autocomplete(prefix, self.vocabulary, 'linear_search')
+            completions = autocomplete(prefix, index, 'sorted_index')
+            assert completions == sorted(expected)
+
+    def test_trie(self):
+        tree = autocomplete_setup(self.vocabulary, 'trie')
+        for prefix in ['axl', 'ax', 'a', 'b', 'c', '', 'axletree', 'zzz']:
+            expected = autocomplete(prefix, self.vocabulary, 'linear_search')
+            completions = autocomplete(prefix, tree, 'trie')
+            assert sorted(completions) == sorted(expected)
+
+    def test_unknown_algorithm(self):
+        with self.assertRaises(ValueError):
+            autocomplete_setup(self.vocabulary, 'hash_table')
+        with self.assertRaises(ValueError):
+            autocomplete('ax', self.vocabulary, 'hash_table')
+
+
+class AutocompleteBenchmarkTest(unittest.TestCase):
+
+    def test_histogram(self):
+        assert autocomplete_benchmark.histogram([0, 1, 2, 3, 4, 900]) == {
+            1: 1, 2: 1, 4: 2, 8: 1, 1024: 1}
+
+    def test_generate_prefixes(self):
+        vocabulary = AutocompleteTest.vocabulary
+        prefixes = autocomplete_benchmark.generate_prefixes(vocabulary, 50)
+        assert len(prefixes) == 50
+        assert prefixes == autocomplete_benchmark.generate_prefixes(
+            vocabulary, 50)
+        for prefix in prefixes:
+            assert 1 <= len(prefix) <= 4
+            assert any(word.startswith(prefix) for word in vocabulary)
+
+    def test_run_suite(self):
+        vocabularies = {'small': AutocompleteTest.vocabulary}
+        results = autocomplete_benchmark.run_suite(vocabularies,
+                                                   num_prefixes=20)
+        workloads = set(result['workload'] for result in results)
+        assert 'generated' in workloads
+        assert len(results) == len(workloads) * 3
+        for result in results:
+            assert result['build_ns'] >= 0
+            assert result['p50_ns'] <= result['p90_ns'] <= result['p99_ns']
+            assert result['p99_ns'] <= result['max_ns']
+            assert sum(result['histogram_ns'].values()) == \
+                result['num_prefixes']
+        # Every algorithm finds the same completions for each workload
+        for workload in workloads:
+            counts = set(result['num_completions'] for result in results
+                         if result['workload'] == workload)
+            assert len(counts) == 1
+
+
+if __name__ == '__main__':
+    unittest.main()
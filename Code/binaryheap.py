@@ -1,5 +1,7 @@
 #!python
 
+from sorting_keys import keyed
+
 
 class BinaryMinHeap(object):
     """BinaryMinHeap: a partially ordered collection with efficient methods to
@@ -78,6 +80,19 @@ class BinaryMinHeap(object):
             self._bubble_down(0)
         return min_item
 
+    def meld(self, other):
+        """Move all items of the given binary min heap into this heap, leaving
+        the other heap empty.
+        Best and worst case running time: O(n + m) since the combined array is
+        re-heapified bottom-up, which beats m inserts costing O(m lg(n + m))"""
+        if other is self:
+            raise ValueError('Cannot meld a heap with itself')
+        self.items.extend(other.items)
+        other.items = []
+        # Leaves already satisfy the heap property, so only sift down parents
+        for index in range(len(self.items) // 2 - 1, -1, -1):
+            self._bubble_down(index)
+
     def _bubble_up(self, index):
         """Ensure the heap ordering property is true above the given index,
         swapping out of order items, or until the root node is reached.
@@ -156,54 +171,166 @@ class BinaryMinHeap(object):
         return (index << 1) + 2  # Shift left to multiply by 2
 
 
-def heap_sort(items):
-    """Convert items to max heap in-place with max_heapify by only recursing
-    on the left half since the right half of items consists of leaves. Then
-    continuously move the next max to the end.
+@keyed
+def heap_sort(items, low=0, high=None, bottom_up=True):
+    """Convert items (or only those in range `[low...high]`) to max heap
+    in-place by sifting down each item in the left half, since the right half
+    of items consists of leaves. Then continuously move the next max to the
+    end and restore the heap. With bottom_up (Floyd's method), the hole left
+    at the root is sifted all the way down to a leaf with one comparison per
+    level (which child is larger), then the item moved from the end bubbles
+    up from there, usually only a level or two, since items taken from the
+    end are small. This takes about half the comparisons of sifting the item
+    down from the root, which needs two comparisons per level.
+    Sifting is iterative, so there's no call per tree level.
     Time: O(nlg n)
-    Space: O(1) since call stack is bound to the next max_heapify call.
+    Space: O(1) since sifting is done in-place with a loop.
     """
-    def max_heapify(i, hi):
-        left_child_index = (i << 1) + 1
-        right_child_index = left_child_index + 1
-
-        ## Set largest to the largest item between i and left child
-        if (left_child_index < hi and
-            items[left_child_index] > items[i]):
-            largest = left_child_index
-        else:
-            largest = i
-
-        if (right_child_index < hi and
-            items[right_child_index] > items[largest]):
-            ## Update largest with right child if right child is larger
-            largest = right_child_index
-
-        if largest != i:
-            ## Largest is one of the children
-            # Put i in correct spot
-            items[i], items[largest] = items[largest], items[i]
-            max_heapify(largest, hi)
-
-    def build_max_heap():
-        ## Time: O(n)
-        for i in range(len(items)//2-1, -1, -1):
-            ## Since the right half consists of the leaves of heap,
-            ## max_heapify only needs to be called on left half.
-            max_heapify(i, len(items))
-    build_max_heap()
-
-    ## Time:    O(nlg n) since n-1 calls are made to max_heapify, which each
-    ##          take O(lg n).
-    hi = len(items)
-    for i in range(len(items)-1, 0, -1):
+    if high is None:
+        high = len(items) - 1
+    size = high - low + 1
+
+    ## Time: O(n)
+    for i in range(size//2-1, -1, -1):
+        ## Since the right half consists of the leaves of heap,
+        ## only the left half needs to be sifted down.
+        _sift_down(items, low, i, size)
+
+    ## Time:    O(nlg n) since n-1 items are sifted, which each take O(lg n).
+    for end in range(size-1, 0, -1):
         ## Continuously put next max from the root (index 0) to last index
-        items[0], items[i] = items[i], items[0]
-
-        # Partition heap into imcomplete subarray of size [0, i] and
-        # complete heap of size (i, items.length]
-        max_heapify(0, i)
-
+        # and restore the heap in range [0, end) with the item from the end
+        item = items[low+end]
+        items[low+end] = items[low]
+        if bottom_up:
+            _sift_hole_to_leaf(items, low, item, end)
+        else:
+            items[low] = item
+            _sift_down(items, low, 0, end)
+
+
+def _sift_down(items, low, start, end, values=None):
+    """Move the item at heap index start (relative to low) down the max heap
+    in range `[0...end)` until it is not less than its children, shifting
+    larger children up instead of swapping. If a parallel list of values is
+    given, its items are moved along with the heap's."""
+    item = items[low+start]
+    if values is not None:
+        value = values[low+start]
+    hole = start
+    child = (hole << 1) + 1
+
+    while child < end:
+        ## Find the larger child
+        if child + 1 < end and items[low+child] < items[low+child+1]:
+            child += 1
+        if not item < items[low+child]:
+            break
+        items[low+hole] = items[low+child]
+        if values is not None:
+            values[low+hole] = values[low+child]
+        hole = child
+        child = (hole << 1) + 1
+    items[low+hole] = item
+    if values is not None:
+        values[low+hole] = value
+
+
+def _sift_hole_to_leaf(items, low, item, end, values=None, value=None):
+    """Fill the hole at the root of the max heap in range `[0...end)`
+    (relative to low) by moving larger children up all the way to a leaf,
+    then bubble the given item up from that leaf to its place. If a parallel
+    list of values is given, its items are moved along with the heap's, and
+    the given value fills the given item's place."""
+    hole = 0
+    child = 1
+
+    while child < end:
+        ## Move the larger child up into the hole
+        if child + 1 < end and items[low+child] < items[low+child+1]:
+            child += 1
+        items[low+hole] = items[low+child]
+        if values is not None:
+            values[low+hole] = values[low+child]
+        hole = child
+        child = (hole << 1) + 1
+
+    while hole > 0:
+        parent = (hole - 1) >> 1
+        if not items[low+parent] < item:
+            break
+        items[low+hole] = items[low+parent]
+        if values is not None:
+            values[low+hole] = values[low+parent]
+        hole = parent
+    items[low+hole] = item
+    if values is not None:
+        values[low+hole] = value
+
+
+def heap_sort_by_key(items, key, low=0, high=None):
+    """Sort given items (or only those in range `[low...high]`) in place by
+    the keys returned by the given key function, computing each key once into
+    a parallel list and moving items along with their keys while heap sorting
+    the keys with Floyd's method. Keys are compared directly, so unlike
+    heap_sort(items, key=key) no (key, index) pairs are built, but items with
+    equal keys may change order (unstable).
+    Time: O(nlg n)
+    Space: O(n) for the list of keys."""
+    if high is None:
+        high = len(items) - 1
+    size = high - low + 1
+    keys = [key(item) for item in items[low:high+1]]
+    values = items[low:high+1]
+
+    for i in range(size//2-1, -1, -1):
+        _sift_down(keys, 0, i, size, values)
+
+    for end in range(size-1, 0, -1):
+        ## Move the max to the end and sift the hole at the root to a leaf
+        item_key, value = keys[end], values[end]
+        keys[end], values[end] = keys[0], values[0]
+        _sift_hole_to_leaf(keys, 0, item_key, end, values, value)
+    items[low:high+1] = values
+
+
+def benchmark_heap_sort(size=100000):
+    """Print the number of comparisons and running time of heap sort with
+    Floyd's bottom-up sifting and with top-down sifting, and of sorting
+    records by a key with heap_sort(key=...) and heap_sort_by_key."""
+    import time
+    from random import randint
+    comparisons = 0
+
+    class Record(object):
+        """A record that orders itself by score with a comparison method, so
+        that comparisons made by heap sort can be counted."""
+
+        def __init__(self, name, score):
+            self.name = name
+            self.score = score
+
+        def __lt__(self, other):
+            nonlocal comparisons
+            comparisons += 1
+            return self.score < other.score
+
+    records = [Record(str(index), randint(0, size)) for index in range(size)]
+    runs = [('bottom_up', lambda items: heap_sort(items)),
+            ('top_down', lambda items: heap_sort(items, bottom_up=False)),
+            ('key=', lambda items: heap_sort(
+                items, key=lambda record: record.score)),
+            ('heap_sort_by_key', lambda items: heap_sort_by_key(
+                items, lambda record: record.score))]
+    print('{:>18} {:>12} {:>10}'.format('heap sort', 'comparisons', 'time'))
+    for name, sort in runs:
+        items = list(records)
+        comparisons = 0
+        start_time = time.perf_counter()
+        sort(items)
+        elapsed = time.perf_counter() - start_time
+        print('{:>18} {:>12} {:>9.3f}s'.format(name, comparisons or '-',
+                                               elapsed))
 
 
 def test_binary_min_heap():
@@ -232,4 +359,8 @@ def test_binary_min_heap():
 
 
 if __name__ == '__main__':
-    test_binary_min_heap()
+    import sys
+    if sys.argv[1:] and sys.argv[1] == 'benchmark':
+        benchmark_heap_sort(*[int(arg) for arg in sys.argv[2:3]])
+    else:
+        test_binary_min_heap()
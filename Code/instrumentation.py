@@ -0,0 +1,253 @@
+#!python
+"""Opt-in instrumentation that counts the comparisons, writes, function calls,
+call depth and memory allocations of one call to a sorting function or heap
+operation, to check the asymptotic claims in docstrings against measured
+counts. Nothing here touches the sorting code itself, so sorts run at full
+speed when they are not being measured."""
+import sys
+import tracemalloc
+from collections import namedtuple
+
+from binaryheap import BinaryMinHeap
+
+# Measurements of one instrumented call: the number of comparisons between
+# items, item writes into the list, Python function calls, the maximum call
+# depth below the measured function, the total bytes allocated including
+# short-lived temporaries (a lower bound, see _Tracer) and the peak bytes held
+# at once beyond the memory in use before the call (the auxiliary space used)
+Report = namedtuple('Report',
+                    'comparisons writes calls max_depth allocated peak_memory')
+
+
+class Counts(object):
+    """Comparison and write counters shared by the items and list of one
+    instrumented call."""
+
+    def __init__(self):
+        self.comparisons = 0
+        self.writes = 0
+
+
+class CountedItem(object):
+    """An item wrapper that counts every comparison made with it. Sorts see
+    only wrapped items, so each comparison they make calls one method here."""
+
+    __slots__ = ('value', 'counts')
+
+    def __init__(self, value, counts):
+        self.value = value
+        self.counts = counts
+
+    def __repr__(self):
+        return 'CountedItem({!r})'.format(self.value)
+
+    def __hash__(self):
+        return hash(self.value)
+
+    def __eq__(self, other):
+        self.counts.comparisons += 1
+        return self.value == other.value
+
+    def __ne__(self, other):
+        self.counts.comparisons += 1
+        return self.value != other.value
+
+    def __lt__(self, other):
+        self.counts.comparisons += 1
+        return self.value < other.value
+
+    def __le__(self, other):
+        self.counts.comparisons += 1
+        return self.value <= other.value
+
+    def __gt__(self, other):
+        self.counts.comparisons += 1
+        return self.value > other.value
+
+    def __ge__(self, other):
+        self.counts.comparisons += 1
+        return self.value >= other.value
+
+
+class CountingList(list):
+    """A list that counts every item stored into it by index or slice
+    assignment, append, extend or insert. A swap counts as two writes. Writes
+    into lists that a sort creates itself (such as slices) are not counted."""
+
+    def __init__(self, items, counts):
+        super(CountingList, self).__init__(items)
+        self.counts = counts
+
+    def __setitem__(self, index, value):
+        if isinstance(index, slice):
+            value = list(value)
+            self.counts.writes += len(value)
+        else:
+            self.counts.writes += 1
+        super(CountingList, self).__setitem__(index, value)
+
+    def append(self, item):
+        self.counts.writes += 1
+        super(CountingList, self).append(item)
+
+    def extend(self, items):
+        items = list(items)
+        self.counts.writes += len(items)
+        super(CountingList, self).extend(items)
+
+    def insert(self, index, item):
+        self.counts.writes += 1
+        super(CountingList, self).insert(index, item)
+
+
+class _Tracer(object):
+    """A profile function that counts Python function calls, tracks the
+    maximum call depth, and sums every increase in memory traced by
+    tracemalloc between calls and returns. Memory allocated and freed again
+    within one call is missed, so the allocated total is a lower bound. Calls
+    to the counting methods in this module and their allocations are not
+    counted."""
+
+    def __init__(self):
+        self.calls = 0
+        self.depth = 0
+        self.max_depth = 0
+        self.allocated = 0
+        self.previous = tracemalloc.get_traced_memory()[0]
+
+    def __call__(self, frame, event, arg):
+        if event == 'call' or event == 'return':
+            current = tracemalloc.get_traced_memory()[0]
+            if event == 'call' or frame.f_code.co_filename != __file__:
+                self.allocated += max(0, current - self.previous)
+            # Memory allocated by the counting methods themselves is skipped
+            self.previous = current
+            if frame.f_code.co_filename == __file__:
+                return
+            if event == 'call':
+                self.calls += 1
+                self.depth += 1
+                self.max_depth = max(self.max_depth, self.depth)
+            else:
+                self.depth -= 1
+
+
+def _measure_call(counts, function, *args, **kwargs):
+    """Call the given function with the given arguments while tracing calls
+    and memory, and return its result and a Report of the measurements
+    together with the comparisons and writes recorded in the given counts."""
+    started = not tracemalloc.is_tracing()
+    if started:
+        tracemalloc.start()
+    else:
+        tracemalloc.reset_peak()
+    baseline = tracemalloc.get_traced_memory()[0]
+    tracer = _Tracer()
+    # The first call event is the call to function itself, at depth 1
+    sys.setprofile(tracer)
+    try:
+        result = function(*args, **kwargs)
+    finally:
+        sys.setprofile(None)
+        peak = tracemalloc.get_traced_memory()[1]
+        if started:
+            tracemalloc.stop()
+    report = Report(counts.comparisons, counts.writes, tracer.calls,
+                    tracer.max_depth, tracer.allocated,
+                    max(0, peak - baseline))
+    return result, report
+
+
+def measure(sort, items, *args, wrap=True, **kwargs):
+    """Call sort(items, *args, **kwargs) on an instrumented copy of the given
+    list of items, copy the sorted items back into it, and return the sort's
+    result and a Report of the measurements. If wrap is False, items are not
+    wrapped to count comparisons, for sorts that need the raw values (such as
+    integer and string sorts). Comparisons made in worker processes are not
+    counted."""
+    counts = Counts()
+    if wrap:
+        data = CountingList([CountedItem(item, counts) for item in items],
+                            counts)
+    else:
+        data = CountingList(items, counts)
+    result, report = _measure_call(counts, sort, data, *args, **kwargs)
+    if wrap:
+        items[:] = [item.value if isinstance(item, CountedItem) else item
+                    for item in data]
+        if isinstance(result, CountedItem):
+            result = result.value
+    else:
+        items[:] = data
+    return result, report
+
+
+def measure_heap(items, heap_class=BinaryMinHeap):
+    """Insert all given items into an empty heap of the given class and then
+    delete them all in order, and return a dict mapping each operation name
+    ('insert' and 'delete_min') to a Report of the measurements summed over
+    all calls to that operation. Writes are counted for heaps that store
+    their items in a list attribute named items, like BinaryMinHeap."""
+    counts = Counts()
+    heap = heap_class()
+    if isinstance(getattr(heap, 'items', None), list):
+        heap.items = CountingList(heap.items, counts)
+    wrapped = [CountedItem(item, counts) for item in items]
+
+    def insert_all():
+        for item in wrapped:
+            heap.insert(item)
+
+    def delete_all():
+        return [heap.delete_min() for _ in range(len(wrapped))]
+
+    reports = {}
+    _, reports['insert'] = _measure_call(counts, insert_all)
+    counts.comparisons = counts.writes = 0
+    _, reports['delete_min'] = _measure_call(counts, delete_all)
+    return reports
+
+
+def benchmark(sizes=(100, 1000, 10000)):
+    """Print the measured comparisons, writes and call depth of every sort on
+    random ints of the given sizes, next to n lg n and n^2 for reference."""
+    import math
+    from sorting import REGISTRY
+    from sorting_benchmark import MAX_QUADRATIC_SIZE, generate
+    print('{:>24} {:>6} {:>12} {:>12} {:>6} {:>12} {:>10} {:>12}'.format(
+        'sort', 'n', 'comparisons', 'writes', 'depth', 'allocated',
+        'n lg n', 'n^2'))
+    for size in sizes:
+        data = generate('random', size)
+        for info in REGISTRY.values():
+            sort = info.function
+            if (not info.supports('int') or
+                    (info.quadratic and size > MAX_QUADRATIC_SIZE)):
+                continue
+            items = list(data)
+            try:
+                _, report = measure(sort, items, wrap=info.supports('any'))
+            except Exception as error:
+                print('{:>24} {:>6} ERROR {!r}'.format(sort.__name__, size,
+                                                       error))
+                continue
+            print('{:>24} {:>6} {:>12} {:>12} {:>6} {:>12} {:>10} {:>12}'
+                  .format(sort.__name__, size, report.comparisons,
+                          report.writes, report.max_depth, report.allocated,
+                          round(size * math.log2(size)), size ** 2))
+        for name, report in measure_heap(data).items():
+            print('{:>24} {:>6} {:>12} {:>12} {:>6} {:>12} {:>10} {:>12}'
+                  .format('BinaryMinHeap.' + name, size, report.comparisons,
+                          report.writes, report.max_depth, report.allocated,
+                          round(size * math.log2(size)), size ** 2))
+
+
+def main():
+    """Read command-line arguments and print measured operation counts."""
+    args = sys.argv[1:]  # Ignore script file name
+    sizes = [int(arg) for arg in args] or [100, 1000, 10000]
+    benchmark(sizes)
+
+
+if __name__ == '__main__':
+    main()
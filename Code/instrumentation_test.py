@@ -0,0 +1,93 @@
+#!python
+
+from instrumentation import measure, measure_heap, CountedItem, Counts
+from pairingheap import PairingHeap
+from sorting_iterative import (insertion_sort, bubble_sort, selection_sort,
+                               double_selection_sort)
+from sorting_recursive import merge_sort, quick_sort, quickselect
+from sorting_integer import counting_sort
+import random
+import unittest
+
+
+class TestMeasure(unittest.TestCase):
+    def test_sorts_given_items(self):
+        items = [random.randint(0, 100) for _ in range(200)]
+        sorted_items = sorted(items)
+        _, report = measure(quick_sort, items)
+        assert items == sorted_items
+        assert report.comparisons > 0
+
+    def test_counts_comparisons_and_writes(self):
+        # Insertion sort makes n-1 comparisons and no writes on sorted items
+        _, report = measure(insertion_sort, list(range(100)))
+        assert report.comparisons == 99
+        assert report.writes == 0
+        # Reversed items need every pair of items to be swapped
+        _, report = measure(insertion_sort, list(range(100, 0, -1)))
+        assert report.comparisons == 100 * 99 // 2
+        assert report.writes == 100 * 99
+
+    def test_selection_sorts_write_at_most_twice_per_item(self):
+        items = [random.randint(0, 100) for _ in range(200)]
+        for sort in [selection_sort, double_selection_sort]:
+            _, report = measure(sort, list(items))
+            assert report.writes <= 2 * (len(items) - 1)
+            _, report = measure(sort, list(range(100)))
+            assert report.writes == 0
+
+    def test_bubble_sort_shrinks_bound(self):
+        # One pass finds sorted items sorted
+        _, report = measure(bubble_sort, list(range(100)))
+        assert report.comparisons == 99
+        # Each pass ends where the last one swapped, so only the one item out
+        # of place is compared again
+        _, report = measure(bubble_sort, list(range(1, 100)) + [0])
+        assert report.comparisons == sum(range(100))
+
+    def test_counts_call_depth(self):
+        _, small = measure(merge_sort, list(range(16)))
+        _, large = measure(merge_sort, list(range(1024)))
+        # Each halving adds a recursive call, so depth grows with lg n
+        assert small.max_depth >= 4
+        assert large.max_depth >= small.max_depth + 6
+        assert large.calls > small.calls
+
+    def test_returns_unwrapped_result(self):
+        items = [5, 1, 4, 2, 3]
+        result, report = measure(quickselect, items, 2)
+        assert result == 3
+        assert all(type(item) is int for item in items)
+        assert report.comparisons > 0
+
+    def test_unwrapped_items(self):
+        items = [3, 1, 2, 1]
+        _, report = measure(counting_sort, items, wrap=False)
+        assert items == [1, 1, 2, 3]
+        assert report.comparisons == 0
+        assert report.peak_memory >= 0
+
+    def test_counted_item_comparisons(self):
+        counts = Counts()
+        one, two = CountedItem(1, counts), CountedItem(2, counts)
+        assert one < two and one <= two and two > one and two >= one
+        assert one != two and not one == two
+        assert counts.comparisons == 6
+
+
+class TestMeasureHeap(unittest.TestCase):
+    def test_binary_min_heap(self):
+        items = [random.randint(0, 100) for _ in range(100)]
+        reports = measure_heap(items)
+        assert sorted(reports) == ['delete_min', 'insert']
+        assert reports['insert'].writes >= 100
+        assert reports['delete_min'].comparisons > reports['insert'].comparisons
+
+    def test_heap_without_items_list(self):
+        reports = measure_heap(list(range(100, 0, -1)), PairingHeap)
+        assert reports['insert'].comparisons == 99
+        assert reports['insert'].writes == 0
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,179 @@
+#!python
+
+
+class PairingHeapNode(object):
+    """PairingHeapNode: a node in a pairing heap that stores an item, a link to
+    its leftmost child, and links to its siblings. The node doubles as the
+    handle returned by PairingHeap.insert for use with decrease_key."""
+
+    def __init__(self, item):
+        """Initialize this node with the given item and no links."""
+        self.item = item
+        self.child = None  # Leftmost child node
+        self.sibling = None  # Next sibling node to the right
+        self.prev = None  # Parent if leftmost child, else previous sibling
+
+    def __repr__(self):
+        """Return a string representation of this node."""
+        return 'PairingHeapNode({!r})'.format(self.item)
+
+
+class PairingHeap(object):
+    """PairingHeap: a mergeable min heap stored as a multi-way tree in which
+    every node's item is no greater than its children's items. Two heaps are
+    melded by linking their roots, so meld and insert take constant time while
+    delete_min restructures the root's children with the two-pass pairing
+    scheme in amortized logarithmic time. Offers the same methods as
+    BinaryMinHeap so it can back a PriorityQueue."""
+
+    def __init__(self, items=None):
+        """Initialize this heap and insert the given items, if any."""
+        self.root = None
+        self._size = 0
+        if items:
+            for item in items:
+                self.insert(item)
+
+    def __repr__(self):
+        """Return a string representation of this heap."""
+        return 'PairingHeap({} items, min={!r})'.format(
+            self._size, self.root.item if self.root else None)
+
+    def is_empty(self):
+        """Return True if this heap is empty, or False otherwise."""
+        return self.root is None
+
+    def size(self):
+        """Return the number of items in this heap."""
+        return self._size
+
+    def insert(self, item):
+        """Insert the given item into this heap and return its node, which can
+        later be passed to decrease_key.
+        Best and worst case running time: O(1) since the new node is linked
+        with the root in a single comparison."""
+        node = PairingHeapNode(item)
+        self.root = self._link(self.root, node)
+        self._size += 1
+        return node
+
+    def get_min(self):
+        """Return the minimum item at the root of this heap.
+        Best and worst case running time: O(1) because min item is the root."""
+        if self.root is None:
+            raise ValueError('Heap is empty and has no minimum item')
+        return self.root.item
+
+    def delete_min(self):
+        """Remove and return the minimum item at the root of this heap.
+        Best case running time: O(1) when the root has at most one child
+        Worst case running time: O(n) when the root has n-1 children, but
+        amortized O(lg n) because pairing halves the number of root children"""
+        if self.root is None:
+            raise ValueError('Heap is empty and has no minimum item')
+        min_item = self.root.item
+        self.root = self._merge_pairs(self.root.child)
+        self._size -= 1
+        return min_item
+
+    def replace_min(self, item):
+        """Remove and return the minimum item at the root of this heap,
+        and insert the given item into this heap.
+        Running time: amortized O(lg n), the cost of delete_min."""
+        if self.root is None:
+            raise ValueError('Heap is empty and has no minimum item')
+        min_item = self.delete_min()
+        self.insert(item)
+        return min_item
+
+    def meld(self, other):
+        """Move all items of the given pairing heap into this heap, leaving the
+        other heap empty.
+        Best and worst case running time: O(1) since only roots are linked."""
+        if other is self:
+            raise ValueError('Cannot meld a heap with itself')
+        self.root = self._link(self.root, other.root)
+        self._size += other._size
+        other.root = None
+        other._size = 0
+
+    def decrease_key(self, node, item):
+        """Replace the item stored in the given node (as returned by insert)
+        with the given smaller item and restore the heap ordering property.
+        Best and worst case running time: O(1) since the node's subtree is cut
+        out and linked with the root; amortized cost is paid by delete_min."""
+        if node.item < item:
+            raise ValueError('New item {!r} is greater than current item {!r}'
+                             .format(item, node.item))
+        node.item = item
+        if node is self.root:
+            return
+        # Cut the node's subtree out of its parent's list of children
+        if node.prev.child is node:
+            node.prev.child = node.sibling
+        else:
+            node.prev.sibling = node.sibling
+        if node.sibling is not None:
+            node.sibling.prev = node.prev
+        node.sibling = node.prev = None
+        self.root = self._link(self.root, node)
+
+    def _link(self, first, second):
+        """Return the root of the tree formed by making the root with the
+        larger item the leftmost child of the other root."""
+        if first is None:
+            return second
+        if second is None:
+            return first
+        if second.item < first.item:
+            first, second = second, first
+        # Make second the leftmost child of first
+        second.prev = first
+        second.sibling = first.child
+        if first.child is not None:
+            first.child.prev = second
+        first.child = second
+        first.sibling = first.prev = None
+        return first
+
+    def _merge_pairs(self, node):
+        """Return the root of the tree formed by linking the given list of
+        sibling trees in pairs from left to right, then linking the pairs from
+        right to left. Iterative so long sibling lists cannot overflow the
+        call stack."""
+        if node is None:
+            return None
+        # First pass: link siblings in pairs from left to right
+        pairs = []
+        while node is not None:
+            first = node
+            second = node.sibling
+            node = second.sibling if second is not None else None
+            first.sibling = first.prev = None
+            if second is not None:
+                second.sibling = second.prev = None
+            pairs.append(self._link(first, second))
+        # Second pass: link pairs from right to left into a single tree
+        root = pairs.pop()
+        while pairs:
+            root = self._link(pairs.pop(), root)
+        return root
+
+
+def test_pairing_heap():
+    # Create two pairing heaps and meld them together
+    heap1 = PairingHeap([9, 25, 86, 3])
+    heap2 = PairingHeap([29, 5, 55])
+    print('heap1: {}'.format(heap1))
+    print('heap2: {}'.format(heap2))
+
+    heap1.meld(heap2)
+    print('\nmeld: {}'.format(heap1))
+
+    print('\nDeleting items:')
+    while not heap1.is_empty():
+        print('delete_min: {}'.format(heap1.delete_min()))
+
+
+if __name__ == '__main__':
+    test_pairing_heap()
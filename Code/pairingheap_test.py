@@ -0,0 +1,139 @@
+#!python
+
+from binaryheap import BinaryMinHeap
+from pairingheap import PairingHeap
+from priorityqueue import PriorityQueue
+import random
+import unittest
+
+
+class TestPairingHeap(unittest.TestCase):
+    def test_size_of_empty_heap(self):
+        heap = PairingHeap()
+        assert heap.size() == 0
+        assert heap.is_empty() is True
+
+    def test_get_min_on_empty_heap(self):
+        heap = PairingHeap()
+        with self.assertRaises(ValueError):
+            heap.get_min()
+
+    def test_delete_min_on_empty_heap(self):
+        heap = PairingHeap()
+        with self.assertRaises(ValueError):
+            heap.delete_min()
+
+    def test_insert_and_get_many_items(self):
+        heap = PairingHeap()
+        items = [9, 25, 86, 3, 29, 5, 55]
+        for index, item in enumerate(items):
+            heap.insert(item)
+            assert heap.size() == index + 1
+            assert heap.get_min() == min(items[: index + 1])
+        assert heap.size() == len(items)
+
+    def test_insert_and_delete_many_random_items(self):
+        heap = PairingHeap()
+        items = [random.randint(0, 100) for _ in range(500)]
+        for item in items:
+            heap.insert(item)
+        assert heap.size() == len(items)
+        for item in sorted(items):
+            assert heap.delete_min() == item
+        assert heap.size() == 0
+        assert heap.is_empty() is True
+
+    def test_replace_min(self):
+        heap = PairingHeap([9, 25, 86, 3])
+        assert heap.replace_min(50) == 3
+        assert heap.size() == 4
+        assert [heap.delete_min() for _ in range(4)] == [9, 25, 50, 86]
+
+    def test_meld(self):
+        items1 = random.sample(range(1000), 100)
+        items2 = random.sample(range(1000), 50)
+        heap1 = PairingHeap(items1)
+        heap2 = PairingHeap(items2)
+        heap1.meld(heap2)
+        assert heap1.size() == 150
+        assert heap2.size() == 0
+        assert heap2.is_empty() is True
+        assert [heap1.delete_min() for _ in range(150)] == sorted(items1 +
+                                                                  items2)
+        with self.assertRaises(ValueError):
+            heap1.meld(heap1)
+
+    def test_decrease_key(self):
+        heap = PairingHeap()
+        items = random.sample(range(1000, 2000), 200)
+        nodes = [heap.insert(item) for item in items]
+        # Decrease every other key, including ones deep in the tree
+        heap.delete_min()
+        expected = sorted(items)[1:]
+        for node in nodes[::2]:
+            if node.item in expected:
+                expected.remove(node.item)
+                heap.decrease_key(node, node.item - 1000)
+                expected.append(node.item)
+        assert [heap.delete_min() for _ in range(heap.size())] == sorted(
+            expected)
+
+    def test_decrease_key_to_larger_item(self):
+        heap = PairingHeap()
+        node = heap.insert(5)
+        with self.assertRaises(ValueError):
+            heap.decrease_key(node, 10)
+
+
+class TestBinaryMinHeapMeld(unittest.TestCase):
+    def test_meld(self):
+        items1 = random.sample(range(1000), 100)
+        items2 = random.sample(range(1000), 50)
+        heap1 = BinaryMinHeap(items1)
+        heap2 = BinaryMinHeap(items2)
+        heap1.meld(heap2)
+        assert heap1.size() == 150
+        assert heap2.size() == 0
+        assert [heap1.delete_min() for _ in range(150)] == sorted(items1 +
+                                                                  items2)
+
+
+class TestPriorityQueue(unittest.TestCase):
+    def test_pairing_heap_backing_store(self):
+        queue = PriorityQueue(PairingHeap)
+        queue.enqueue('low', 10)
+        handle = queue.enqueue('urgent', 20)
+        assert queue.size() == 2
+        assert queue.front() == (10, 'low')
+        queue.decrease_priority(handle, 1)
+        assert queue.dequeue() == (1, 'urgent')
+        assert queue.dequeue() == (10, 'low')
+        assert queue.is_empty() is True
+
+    def test_merge(self):
+        for heap_class in (BinaryMinHeap, PairingHeap):
+            queue1 = PriorityQueue(heap_class)
+            queue2 = PriorityQueue(heap_class)
+            for priority in [5, 1, 9]:
+                queue1.enqueue('a{}'.format(priority), priority)
+            for priority in [7, 3]:
+                queue2.enqueue('b{}'.format(priority), priority)
+            queue1.merge(queue2)
+            assert queue1.length() == 5
+            assert queue2.is_empty() is True
+            priorities = [queue1.dequeue()[0] for _ in range(5)]
+            assert priorities == [1, 3, 5, 7, 9]
+
+    def test_merge_different_heap_classes(self):
+        with self.assertRaises(ValueError):
+            PriorityQueue(BinaryMinHeap).merge(PriorityQueue(PairingHeap))
+
+    def test_decrease_priority_unsupported(self):
+        queue = PriorityQueue()
+        handle = queue.enqueue('item', 5)
+        with self.assertRaises(ValueError):
+            queue.decrease_priority(handle, 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -34,6 +34,46 @@ class PrefixTree:
             for string in strings:
                 self.insert(string)
 
+    @classmethod
+    def from_strings(cls, strings):
+        """Return a new prefix tree containing the given strings, built in bulk
+        by sorting them with MSD radix sort first. Consecutive sorted strings
+        share their longest common prefix, so each string only walks down from
+        the deepest node it shares with the previous string instead of looking
+        up every character from the root.
+        Time: O(nk) n = # of strings, k = max len(string)
+        Space: O(nk) for the sorted copy and the path of the previous string
+        """
+        from sorting_integer import msd_radix_sort
+        strings = list(strings)
+        msd_radix_sort(strings)
+        tree = cls()
+        path = [tree.root]  # Nodes along the path of the previous string
+        previous = ''
+
+        for string in strings:
+            if string == previous:
+                continue  # Duplicate (or the empty string, stored already)
+            ## Find the length of the prefix shared with the previous string
+            common = 0
+            for char, previous_char in zip(string, previous):
+                if char != previous_char:
+                    break
+                common += 1
+            del path[common+1:]
+            node = path[-1]
+
+            for char in string[common:]:
+                ## Sorted order means none of these children exist yet
+                new_node = PrefixTreeNode(char)
+                node.add_child(char, new_node)
+                path.append(new_node)
+                node = new_node
+            node.add_child('$', PrefixTreeNode('$'))  # Terminal node
+            tree.size += 1
+            previous = string
+        return tree
+
     def __repr__(self):
         """Return a string representation of this prefix tree."""
         return f'PrefixTree({self.strings()!r})'
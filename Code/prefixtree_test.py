@@ -254,6 +254,32 @@ class PrefixTreeTest(unittest.TestCase):
             assert len(tree_strings) == len(input_strings)  # Check length only
             self.assertCountEqual(tree_strings, input_strings)  # Ignore order
 
+    def test_from_strings(self):
+        strings = 'Shelly sells seashells by the sea shore sea sells'.split()
+        tree = PrefixTree.from_strings(strings + [''])
+        assert tree.size == 7  # Duplicates and empty string aren't counted
+        self.assertCountEqual(tree.strings(), set(strings))
+        for string in strings:
+            assert tree.contains(string) is True
+        assert tree.contains('se') is False
+        assert tree.complete('se') == ['sea', 'sells', 'seashells']
+        assert tree.complete('sh') == ['shore']
+        assert tree.complete('x') == []
+        # Bulk built trees support further inserts
+        tree.insert('seal')
+        assert tree.size == 8
+        self.assertCountEqual(tree.complete('sea'), ['sea', 'seal',
+                                                     'seashells'])
+
+    def test_from_strings_matches_insert(self):
+        strings = ['ABC', 'ABD', 'A', 'XYZ', 'AB', 'XY', 'B']
+        tree = PrefixTree.from_strings(strings)
+        inserted = PrefixTree(strings)
+        assert tree.size == inserted.size
+        for prefix in ['', 'A', 'AB', 'X', 'XYZ', 'C']:
+            self.assertCountEqual(tree.complete(prefix),
+                                  inserted.complete(prefix))
+
 
 if __name__ == '__main__':
     unittest.main()
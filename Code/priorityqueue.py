@@ -6,12 +6,15 @@ from binaryheap import BinaryMinHeap
 class PriorityQueue(object):
     """PriorityQueue: a partially ordered queue with methods to enqueue items
     in priority order and to access and dequeue its highest priority item.
-    Item pairs are stored in a binary min heap for its efficient operations."""
+    Item pairs are stored in a binary min heap for its efficient operations,
+    or in any heap class offering the same methods (such as PairingHeap, which
+    also supports constant time merge and decrease_priority)."""
 
-    def __init__(self):
-        """Initialize this priority queue."""
-        # Initialize new binary min heap to store items in this priority queue
-        self.heap = BinaryMinHeap()
+    def __init__(self, heap_class=BinaryMinHeap):
+        """Initialize this priority queue, storing its items in a new heap of
+        the given heap class."""
+        # Initialize new min heap to store items in this priority queue
+        self.heap = heap_class()
 
     def __repr__(self):
         """Return a string representation of this priority queue."""
@@ -25,10 +28,15 @@ class PriorityQueue(object):
         """Return the number of items in this priority queue."""
         return self.heap.size()
 
+    def size(self):
+        """Return the number of items in this priority queue."""
+        return self.length()
+
     def enqueue(self, item, priority):
         """Insert the given item into this priority queue in order according to
-        the given priority."""
-        self.heap.insert((priority, item))
+        the given priority. Return the heap's handle for the inserted entry,
+        which can be passed to decrease_priority if the heap supports it."""
+        return self.heap.insert((priority, item))
 
     def front(self):
         """Return the item at the front of this priority queue without removing
@@ -51,3 +59,22 @@ class PriorityQueue(object):
         if self.size() == 0:
             raise ValueError('Priority queue is empty and has no front item')
         return self.heap.replace_min((priority, item))
+
+    def decrease_priority(self, handle, priority):
+        """Lower the priority of the entry with the given handle (as returned
+        by enqueue) to the given priority, or raise ValueError if the backing
+        heap does not support decrease_key."""
+        if not hasattr(self.heap, 'decrease_key'):
+            raise ValueError('{} does not support decrease_key'
+                             .format(type(self.heap).__name__))
+        self.heap.decrease_key(handle, (priority, handle.item[1]))
+
+    def merge(self, other):
+        """Move all items of the given priority queue into this one, leaving
+        the other priority queue empty. Both queues must use the same heap
+        class; the cost is that of the heap's meld method."""
+        if type(self.heap) is not type(other.heap):
+            raise ValueError('Cannot merge priority queues backed by {} and {}'
+                             .format(type(self.heap).__name__,
+                                     type(other.heap).__name__))
+        self.heap.meld(other.heap)
@@ -1,8 +1,94 @@
 #!python
+import sys
+import time
+from collections import namedtuple
 
-from sorting_iterative import is_sorted, bubble_sort, selection_sort, insertion_sort
-from sorting_recursive import split_sort_merge, merge_sort, quick_sort
-from sorting_integer import counting_sort, bucket_sort
+from binaryheap import heap_sort
+from sorting_adaptive import adaptive_merge_sort
+from sorting_external import external_sort, MEMORY_BUDGET
+from sorting_hybrid import smart_sort
+from sorting_iterative import (is_sorted, bubble_sort, cocktail_shaker_sort,
+                               selection_sort, double_selection_sort,
+                               insertion_sort, bottom_up_merge_sort)
+from sorting_recursive import (split_sort_merge, merge_sort,
+                               buffered_merge_sort, quick_sort)
+from sorting_kernels import binary_insertion_sort
+from sorting_integer import (counting_sort, bucket_sort, radix_sort,
+                             integer_sort, msd_radix_sort)
+from sorting_parallel import parallel_merge_sort, sample_sort
+import validation
+
+
+class SortInfo(namedtuple('SortInfo', 'name function stable in_place time '
+                                      'space types')):
+    """Metadata of a registered sort function: whether it keeps equal items
+    in input order (stable) and sorts without a copy of the items (in place),
+    its worst case running time and memory usage, and the kinds of items it
+    supports ('any' for any mutually comparable items, or 'int', 'float' or
+    'str' for sorts that only work on those). Unstable sorts of any items
+    become stable when called with stable=True (see sorting_keys.keyed)."""
+
+    def supports(self, kind):
+        """Return True if this sort can sort items of the given kind."""
+        return 'any' in self.types or kind in self.types
+
+    @property
+    def quadratic(self):
+        """True if this sort takes quadratic time in the worst case."""
+        return self.time == 'O(n^2)'
+
+
+# Registered sort functions by name, in the order they were registered
+REGISTRY = {}
+
+
+def register(function, stable, in_place, time, space, types=('any',)):
+    """Add the given sort function to the registry under its name with the
+    given metadata, and return its SortInfo."""
+    info = SortInfo(function.__name__, function, stable, in_place, time,
+                    space, tuple(types))
+    REGISTRY[info.name] = info
+    return info
+
+
+def get_sort(name):
+    """Return the SortInfo of the registered sort function with the given
+    name, or raise ValueError if there is none."""
+    if name not in REGISTRY:
+        raise ValueError('Sorting function {!r} does not exist; available: {}'
+                         .format(name, ', '.join(REGISTRY)))
+    return REGISTRY[name]
+
+
+def sorts(kind=None, stable=None):
+    """Return a list of the SortInfo of every registered sort function that
+    supports items of the given kind and has the given stability, if any."""
+    return [info for info in REGISTRY.values()
+            if (kind is None or info.supports(kind)) and
+            (stable is None or info.stable == stable)]
+
+
+register(bubble_sort, True, True, 'O(n^2)', 'O(1)')
+register(cocktail_shaker_sort, True, True, 'O(n^2)', 'O(1)')
+register(selection_sort, False, True, 'O(n^2)', 'O(1)')
+register(double_selection_sort, False, True, 'O(n^2)', 'O(1)')
+register(insertion_sort, True, True, 'O(n^2)', 'O(1)')
+register(binary_insertion_sort, True, True, 'O(n^2)', 'O(n)')
+register(split_sort_merge, True, False, 'O(n^2)', 'O(n)')
+register(bottom_up_merge_sort, True, False, 'O(n lg n)', 'O(n)')
+register(merge_sort, True, False, 'O(n lg n)', 'O(n lg n)')
+register(buffered_merge_sort, True, False, 'O(n lg n)', 'O(n)')
+register(adaptive_merge_sort, True, True, 'O(n lg n)', 'O(n)')
+register(quick_sort, False, True, 'O(n lg n)', 'O(lg n)')
+register(heap_sort, False, True, 'O(n lg n)', 'O(1)')
+register(counting_sort, True, False, 'O(n + k)', 'O(n + k)', ['int'])
+register(radix_sort, True, False, 'O(n w)', 'O(n)', ['int'])
+register(integer_sort, True, False, 'O(n + min(k, n w))', 'O(n)', ['int'])
+register(bucket_sort, False, False, 'O(n lg n)', 'O(n)', ['int', 'float'])
+register(msd_radix_sort, True, False, 'O(n k)', 'O(n + k)', ['str'])
+register(parallel_merge_sort, True, False, 'O(n lg n)', 'O(n)')
+register(sample_sort, True, False, 'O(n lg n)', 'O(n)')
+register(smart_sort, False, True, 'O(n lg n)', 'O(n)')
 
 
 def random_ints(count=20, min=1, max=50):
@@ -26,50 +112,178 @@ def test_sorting(sort=bubble_sort, num_items=20, max_value=50):
     print('Sorted order?  {!r}'.format(is_sorted(items)))
 
 
+# Functions that parse one line of input into an item of each kind
+PARSERS = {'str': str, 'int': int, 'float': float}
+
+
+def read_items(file, kind='str'):
+    """Yield the items of the given kind parsed from each line of the given
+    file, without trailing newlines. Blank lines are skipped for numbers."""
+    parse = PARSERS[kind]
+    for number, line in enumerate(file, 1):
+        line = line.rstrip('\r\n')
+        if kind != 'str':
+            if not line.strip():
+                continue
+            try:
+                line = parse(line)
+            except ValueError:
+                raise ValueError('Line {}: {!r} is not a valid {}'
+                                 .format(number, line, kind))
+        yield line
+
+
+def write_items(items, file):
+    """Write each of the given items to the given file on its own line."""
+    file.writelines('{}\n'.format(item) for item in items)
+
+
+def sort_file(input_file, output_file, name='smart_sort', kind='str',
+              reverse=False, external=False, memory_budget=MEMORY_BUDGET,
+              log=None):
+    """Read items of the given kind from the lines of the given input file,
+    sort them with the registered sort function with the given name, and
+    write them to the given output file, one per line. If external is True,
+    items are streamed through external_sort instead, so inputs larger than
+    memory can be sorted; its runs are always sorted with merge_sort, so any
+    other name than the default smart_sort is rejected. Timing is written to
+    the given log file, if any."""
+    items = read_items(input_file, kind)
+    start_time = time.perf_counter()
+    if external:
+        if name != 'smart_sort':
+            raise ValueError('External sort sorts runs with merge_sort and '
+                             'cannot use {}'.format(name))
+        write_items(external_sort(items, None, memory_budget,
+                                  reverse=reverse), output_file)
+        _log(log, 'Sorted and wrote items with external_sort in {:.6f} sec'
+             .format(time.perf_counter() - start_time))
+        return
+
+    info = get_sort(name)
+    if not info.supports(kind):
+        raise ValueError('{} does not support {} items'.format(name, kind))
+    items = list(items)
+    read_time = time.perf_counter()
+    info.function(items)
+    if reverse:
+        # Equal ints, floats and strings are identical, so reversing the
+        # sorted items can't reorder equal items incorrectly
+        items.reverse()
+    sort_time = time.perf_counter()
+    write_items(items, output_file)
+    end_time = time.perf_counter()
+    _log(log, 'Read {} items in {:.6f} sec'
+         .format(len(items), read_time - start_time))
+    _log(log, 'Sorted items with {} in {:.6f} sec'
+         .format(name, sort_time - read_time))
+    _log(log, 'Wrote items in {:.6f} sec'.format(end_time - sort_time))
+
+
+def _log(log, message):
+    """Write the given message to the given log file, if any."""
+    if log is not None:
+        log.write(message + '\n')
+
+
+def print_registry(file=sys.stdout):
+    """Print a table of every registered sort function and its metadata."""
+    file.write('{:>21} {:>7} {:>9} {:>19} {:>10}  {}\n'.format(
+        'sort', 'stable', 'in place', 'time', 'space', 'types'))
+    for info in REGISTRY.values():
+        file.write('{:>21} {:>7} {:>9} {:>19} {:>10}  {}\n'.format(
+            info.name, 'yes' if info.stable else 'no',
+            'yes' if info.in_place else 'no', info.time, info.space,
+            ', '.join(info.types)))
+
+
 def main():
-    """Read command-line arguments and test sorting algorithms."""
-    import sys
-    args = sys.argv[1:]  # Ignore script file name
-
-    if len(args) == 0:
-        script = sys.argv[0]  # Get script file name
-        print('Usage: {} sort num max'.format(script))
-        print('Test sorting algorithm `sort` with a list of `num` integers')
-        print('    randomly sampled from the range [1...`max`] (inclusive)')
-        print('\nExample: {} bubble_sort 10 20'.format(script))
-        print('Initial items: [3, 15, 4, 7, 20, 6, 18, 11, 9, 7]')
-        print('Sorted order?  False')
-        print('Sorting items with bubble_sort(items)')
-        print('Sorted items:  [3, 4, 6, 7, 7, 9, 11, 15, 18, 20]')
-        print('Sorted order?  True')
+    """Read command-line arguments and sort a file, standard input, or a list
+    of random integers with the registered sort function named."""
+    import argparse
+    import os
+    parser = argparse.ArgumentParser(
+        description='Sort the lines of a file or standard input with the '
+                    'given sorting algorithm, or test it on random integers.',
+        epilog='Examples: {0} bubble_sort 10 20 (sort 10 random ints up to '
+               '20); {0} -i words.txt -o sorted.txt; {0} quick_sort -t int '
+               '-i - (sort ints from standard input)'.format(sys.argv[0]))
+    parser.add_argument('sort', nargs='?', default='auto',
+                        help='registered sort function name, or auto '
+                             '(default: auto, which picks one from the input)')
+    parser.add_argument('num', nargs='?', type=int, default=20,
+                        help='number of random ints to test with '
+                             '(default: %(default)s)')
+    parser.add_argument('max', nargs='?', type=int, default=50,
+                        help='maximum random int (default: %(default)s)')
+    parser.add_argument('-i', '--input', metavar='FILE',
+                        help="file to sort, one item per line ('-' for "
+                             'standard input)')
+    parser.add_argument('-o', '--output', metavar='FILE',
+                        help='output file (default: standard output)')
+    parser.add_argument('-t', '--type', choices=sorted(PARSERS), default='str',
+                        help='kind of items on each line (default: str)')
+    parser.add_argument('-r', '--reverse', action='store_true',
+                        help='sort in descending order')
+    parser.add_argument('--external', action='store_true',
+                        help='sort with external merge sort (automatic for '
+                             'input files larger than the memory budget)')
+    parser.add_argument('--memory', type=float,
+                        default=MEMORY_BUDGET / 2**20, metavar='MB',
+                        help='external sort memory budget in MB '
+                             '(default: %(default)s)')
+    parser.add_argument('--validate', action='store_true',
+                        help='check sorting invariants as they run (slower; '
+                             'same as setting SORTING_VALIDATE=1)')
+    parser.add_argument('--time', action='store_true',
+                        help='report timing on standard error')
+    parser.add_argument('--list', action='store_true',
+                        help='list registered sort functions and exit')
+    if len(sys.argv) == 1:
+        parser.print_help()
         return
+    args = parser.parse_args()
+    if args.sort == 'auto':
+        args.sort = 'smart_sort'
+    if args.validate:
+        validation.enable()
 
-    # Get sort function by name
-    if len(args) >= 1:
-        sort_name = args[0]
-        # Terrible hack abusing globals
-        if sort_name in globals():
-            sort_function = globals()[sort_name]
-        else:
-            # Don't explode, just warn user and show list of sorting functions
-            print('Sorting function {!r} does not exist'.format(sort_name))
-            print('Available sorting functions:')
-            for name in globals():
-                if 'sort' in name:
-                    print('    {}'.format(name))
-            return
-
-    # Get num_items and max_value, but don't explode if input is not an integer
-    try:
-        num_items = int(args[1]) if len(args) >= 2 else 20
-        max_value = int(args[2]) if len(args) >= 3 else 50
-        # print('Num items: {}, max value: {}'.format(num_items, max_value))
-    except ValueError:
-        print('Integer required for `num` and `max` command-line arguments')
+    if args.list:
+        print_registry()
+        return
+    if args.sort not in REGISTRY:
+        # Don't explode, just warn user and show list of sorting functions
+        print('Sorting function {!r} does not exist'.format(args.sort))
+        print('Available sorting functions:')
+        for name in REGISTRY:
+            print('    {}'.format(name))
+        return
+    if args.input is None:
+        test_sorting(get_sort(args.sort).function, args.num, args.max)
         return
 
-    # Test sort function
-    test_sorting(sort_function, num_items, max_value)
+    memory_budget = args.memory * 2**20
+    external = args.external or (args.input != '-' and
+                                 os.path.getsize(args.input) > memory_budget)
+    if external and not args.external and args.sort != 'smart_sort':
+        sys.stderr.write('{}: warning: {} is larger than the memory budget, '
+                         'so it is sorted with external merge sort instead '
+                         'of {}\n'.format(parser.prog, args.input, args.sort))
+        args.sort = 'smart_sort'
+    input_file = (sys.stdin if args.input == '-'
+                  else open(args.input, newline=''))
+    output_file = (sys.stdout if args.output is None
+                   else open(args.output, 'w'))
+    try:
+        sort_file(input_file, output_file, args.sort, args.type, args.reverse,
+                  external, memory_budget, sys.stderr if args.time else None)
+    except ValueError as error:
+        parser.exit(1, '{}: error: {}\n'.format(parser.prog, error))
+    finally:
+        if input_file is not sys.stdin:
+            input_file.close()
+        if output_file is not sys.stdout:
+            output_file.close()
 
 
 if __name__ == '__main__':
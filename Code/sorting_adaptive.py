@@ -0,0 +1,276 @@
+#!python
+from bisect import bisect_left, bisect_right
+
+from sorting_keys import keyed
+
+# Number of consecutive wins by one run before a merge switches to galloping
+MIN_GALLOP = 7
+# Runs shorter than min_run are extended to it, where min_run is between
+# MIN_MERGE/2 and MIN_MERGE (arrays shorter than MIN_MERGE are one run)
+MIN_MERGE = 64
+
+
+@keyed
+def adaptive_merge_sort(items):
+    """Sort given items in place by finding natural runs (reversing strictly
+    descending ones), extending short runs to a minimum length with binary
+    insertion sort, and merging runs from a stack whose lengths are kept
+    roughly balanced, galloping through long stretches where one run wins.
+    Inputs made of few runs, such as sorted, reversed or appended data, sort
+    in close to linear time. Stable.
+    Best case running time:     O(n) when items is sorted or reversed, since
+                                it is a single run and nothing is merged.
+    Worst case running time:    O(n lg n) when items has no long runs.
+    Memory usage:               O(n) for the copy of a run made while merging."""
+    length = len(items)
+    if length < 2:
+        return
+    min_run = _min_run(length)
+    state = _MergeState(items)
+    low = 0
+
+    while low < length:
+        ## Find the next natural run and extend it if it is too short
+        run_end = _count_run(items, low, length)
+        if run_end - low < min_run:
+            forced_end = min(low + min_run, length)
+            _binary_insertion_sort(items, low, forced_end, run_end)
+            run_end = forced_end
+        state.push_run(low, run_end - low)
+        state.merge_collapse()
+        low = run_end
+    state.merge_force_collapse()
+
+
+def _min_run(length):
+    """Return the minimum run length for items of the given length, chosen so
+    that length / min_run is a power of 2 or slightly less than one, which
+    keeps the final merges balanced."""
+    extra_bit = 0
+    while length >= MIN_MERGE:
+        extra_bit |= length & 1
+        length >>= 1
+    return length + extra_bit
+
+
+def _count_run(items, low, high):
+    """Return the end index of the natural run starting at index low in range
+    `[low...high)`, reversing it in place first if it is strictly descending.
+    Descending runs must be strict so that reversing them keeps the sort
+    stable."""
+    run_end = low + 1
+    if run_end == high:
+        return run_end
+    if items[run_end] < items[low]:
+        ## Strictly descending run
+        while run_end < high and items[run_end] < items[run_end-1]:
+            run_end += 1
+        items[low:run_end] = items[low:run_end][::-1]
+    else:
+        ## Non-descending run
+        while run_end < high and not items[run_end] < items[run_end-1]:
+            run_end += 1
+    return run_end
+
+
+def _binary_insertion_sort(items, low, high, start):
+    """Sort range `[low...high)` of items in place, given that range
+    `[low...start)` is already sorted, by binary searching for each item's
+    position and shifting the items after it with one slice assignment."""
+    for i in range(start, high):
+        item = items[i]
+        position = bisect_right(items, item, low, i)
+        items[position+1:i+1] = items[position:i]
+        items[position] = item
+
+
+def _gallop_right(key, items, low, high):
+    """Return the index after the last item in sorted range `[low...high)` of
+    items that is less than or equal to key, probing indices low, low+1,
+    low+3, low+7, ... before binary searching the bracket found. Faster than
+    a plain binary search when the index is close to low."""
+    last = low
+    probe = low
+    offset = 1
+    while probe < high and not key < items[probe]:
+        last = probe + 1
+        probe = low + offset
+        offset = (offset << 1) + 1
+    return bisect_right(items, key, last, min(probe, high))
+
+
+def _gallop_left(key, items, low, high):
+    """Return the index of the first item in sorted range `[low...high)` of
+    items that is greater than or equal to key, probing like _gallop_right."""
+    last = low
+    probe = low
+    offset = 1
+    while probe < high and items[probe] < key:
+        last = probe + 1
+        probe = low + offset
+        offset = (offset << 1) + 1
+    return bisect_left(items, key, last, min(probe, high))
+
+
+class _MergeState(object):
+    """The stack of pending runs of an adaptive merge sort in progress, along
+    with the adaptive galloping threshold shared by all of its merges."""
+
+    def __init__(self, items):
+        self.items = items
+        self.runs = []  # Stack of [base, length] pairs of adjacent runs
+        self.min_gallop = MIN_GALLOP
+
+    def push_run(self, base, length):
+        self.runs.append([base, length])
+
+    def merge_collapse(self):
+        """Merge runs on top of the stack until their lengths satisfy the
+        invariants A > B + C and B > C for the top three runs A, B, C, which
+        keeps merges balanced and bounds the stack height by O(lg n)."""
+        runs = self.runs
+        while len(runs) > 1:
+            n = len(runs) - 2
+            if ((n > 0 and runs[n-1][1] <= runs[n][1] + runs[n+1][1]) or
+                    (n > 1 and runs[n-2][1] <= runs[n-1][1] + runs[n][1])):
+                if runs[n-1][1] < runs[n+1][1]:
+                    n -= 1
+            elif runs[n][1] > runs[n+1][1]:
+                break
+            self.merge_at(n)
+
+    def merge_force_collapse(self):
+        """Merge all runs on the stack into one."""
+        runs = self.runs
+        while len(runs) > 1:
+            n = len(runs) - 2
+            if n > 0 and runs[n-1][1] < runs[n+1][1]:
+                n -= 1
+            self.merge_at(n)
+
+    def merge_at(self, index):
+        """Merge the runs at the given stack index and the one above it."""
+        items = self.items
+        base1, length1 = self.runs[index]
+        base2, length2 = self.runs[index+1]
+        self.runs[index][1] = length1 + length2
+        del self.runs[index+1]
+
+        ## Items at the start of run 1 that precede run 2 are in place
+        start = _gallop_right(items[base2], items, base1, base2)
+        length1 -= start - base1
+        if length1 == 0:
+            return
+        ## Items at the end of run 2 that follow run 1 are in place
+        length2 = _gallop_left(items[base2-1], items, base2,
+                               base2 + length2) - base2
+        if length2 == 0:
+            return
+        self.merge_low(start, length1, base2, length2)
+
+    def merge_low(self, base1, length1, base2, length2):
+        """Merge adjacent runs `[base1...base1+length1)` and
+        `[base2...base2+length2)` in place by copying the first run aside and
+        filling the gap from the left, switching to galloping mode after
+        min_gallop consecutive wins by one run."""
+        items = self.items
+        temp = items[base1:base1+length1]
+        i = 0  # Next item of run 1 (in temp)
+        j = base2  # Next item of run 2
+        k = base1  # Next position to fill
+        end2 = base2 + length2
+        min_gallop = self.min_gallop
+
+        while i < length1 and j < end2:
+            ## Merge one item at a time until one run keeps winning
+            wins1 = wins2 = 0
+            while i < length1 and j < end2:
+                if items[j] < temp[i]:
+                    items[k] = items[j]
+                    j += 1
+                    wins2 += 1
+                    wins1 = 0
+                else:
+                    items[k] = temp[i]
+                    i += 1
+                    wins1 += 1
+                    wins2 = 0
+                k += 1
+                if wins1 >= min_gallop or wins2 >= min_gallop:
+                    break
+
+            ## Gallop, copying whole stretches of a run with one slice
+            while i < length1 and j < end2:
+                count1 = _gallop_right(items[j], temp, i, length1) - i
+                if count1:
+                    items[k:k+count1] = temp[i:i+count1]
+                    k += count1
+                    i += count1
+                    if i == length1:
+                        break
+                count2 = _gallop_left(temp[i], items, j, end2) - j
+                if count2:
+                    items[k:k+count2] = items[j:j+count2]
+                    k += count2
+                    j += count2
+                if count1 < MIN_GALLOP and count2 < MIN_GALLOP:
+                    ## Galloping isn't paying off, so make it harder to enter
+                    min_gallop += 1
+                    break
+                min_gallop = max(1, min_gallop - 1)
+
+        ## Remaining items of run 2 are already in place
+        items[k:k+length1-i] = temp[i:]
+        self.min_gallop = min_gallop
+
+
+def few_swaps(count, swaps):
+    """Return a sorted list of `count` ints with `swaps` random pairs of items
+    exchanged."""
+    from random import randrange
+    items = list(range(count))
+    for _ in range(swaps):
+        i, j = randrange(count), randrange(count)
+        items[i], items[j] = items[j], items[i]
+    return items
+
+
+def benchmark(size=100000):
+    """Print the running times of adaptive_merge_sort and other sorts on
+    sorted, reversed, few swaps, appended and random inputs."""
+    import time
+    from random import randint
+    from binaryheap import heap_sort
+    from sorting_recursive import merge_sort, buffered_merge_sort, quick_sort
+    inputs = [
+        ('sorted', list(range(size))),
+        ('reversed', list(range(size, 0, -1))),
+        ('few swaps', few_swaps(size, size // 100)),
+        ('appended', list(range(size)) + [randint(0, size)
+                                         for _ in range(size // 100)]),
+        ('random', [randint(0, size) for _ in range(size)]),
+    ]
+    sorts = [adaptive_merge_sort, buffered_merge_sort, merge_sort, quick_sort,
+             heap_sort, list.sort]
+    print('{:>12}'.format('input') +
+          ''.join('{:>21}'.format(sort.__name__) for sort in sorts))
+    for name, data in inputs:
+        times = []
+        for sort in sorts:
+            items = list(data)
+            start_time = time.perf_counter()
+            sort(items)
+            times.append(time.perf_counter() - start_time)
+        print('{:>12}'.format(name) +
+              ''.join('{:>20.4f}s'.format(elapsed) for elapsed in times))
+
+
+def main():
+    """Read command-line arguments and benchmark adaptive merge sort."""
+    import sys
+    args = sys.argv[1:]  # Ignore script file name
+    benchmark(int(args[0]) if args else 100000)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,318 @@
+#!python
+"""Benchmark suite that times every sorting algorithm in this project across
+input sizes and distributions and writes the results as JSON or CSV, so runs
+can be compared to find performance regressions."""
+import csv
+import inspect
+import json
+import random
+import statistics
+import string
+import sys
+import time
+import tracemalloc
+
+from sorting import REGISTRY
+from sorting_iterative import is_sorted
+
+# Default input sizes and distributions
+SIZES = [100, 1000, 10000, 100000]
+DISTRIBUTIONS = ['random', 'sorted', 'reversed', 'sawtooth', 'few_unique',
+                 'organ_pipe', 'zipf', 'strings']
+# Quadratic sorts are skipped for inputs larger than this by default
+MAX_QUADRATIC_SIZE = 5000
+
+
+def random_input(size, rng):
+    """Return `size` ints sampled uniformly from [0...size]."""
+    return [rng.randint(0, size) for _ in range(size)]
+
+
+def sorted_input(size, rng):
+    """Return `size` ints in ascending order."""
+    return list(range(size))
+
+
+def reversed_input(size, rng):
+    """Return `size` ints in descending order."""
+    return list(range(size, 0, -1))
+
+
+def sawtooth_input(size, rng):
+    """Return `size` ints made of ascending runs of about sqrt(size) ints."""
+    period = max(1, int(size ** 0.5))
+    return [i % period for i in range(size)]
+
+
+def few_unique_input(size, rng):
+    """Return `size` ints sampled uniformly from only 10 distinct values."""
+    return [rng.randint(0, 9) for _ in range(size)]
+
+
+def organ_pipe_input(size, rng):
+    """Return `size` ints ascending to the middle, then descending."""
+    half = size // 2
+    return list(range(half)) + list(range(size - half, 0, -1))
+
+
+def zipf_input(size, rng, exponent=1.2):
+    """Return `size` ints in [1...size] sampled from a Zipf distribution,
+    where value v has probability proportional to 1 / v^exponent, so a few
+    small values are very common."""
+    weights = [1 / value ** exponent for value in range(1, size + 1)]
+    return rng.choices(range(1, size + 1), weights, k=size)
+
+
+def strings_input(size, rng):
+    """Return `size` random lowercase words of 1 to 12 letters."""
+    letters = string.ascii_lowercase
+    return [''.join(rng.choice(letters) for _ in range(rng.randint(1, 12)))
+            for _ in range(size)]
+
+
+GENERATORS = {
+    'random': random_input,
+    'sorted': sorted_input,
+    'reversed': reversed_input,
+    'sawtooth': sawtooth_input,
+    'few_unique': few_unique_input,
+    'organ_pipe': organ_pipe_input,
+    'zipf': zipf_input,
+    'strings': strings_input,
+}
+
+
+def generate(distribution, size, seed=0):
+    """Return an input list of the given distribution and size, generated
+    from the given seed so that every run benchmarks the same inputs."""
+    rng = random.Random('{}-{}-{}'.format(distribution, size, seed))
+    return GENERATORS[distribution](size, rng)
+
+
+def kind_of(items):
+    """Return the kind of the given items ('int', 'float' or 'str') as used
+    by the sort registry, judging by the first item."""
+    return type(items[0]).__name__ if items else 'any'
+
+
+class TaggedItem(object):
+    """An item that compares only by its key and is tagged with its input
+    position, so that the order of equal items after sorting shows whether
+    the sort was stable."""
+
+    __slots__ = ('key', 'tag')
+    __hash__ = None
+
+    def __init__(self, key, tag):
+        self.key = key
+        self.tag = tag
+
+    def __repr__(self):
+        return 'TaggedItem({!r}, {!r})'.format(self.key, self.tag)
+
+    def __eq__(self, other):
+        return self.key == other.key
+
+    def __ne__(self, other):
+        return self.key != other.key
+
+    def __lt__(self, other):
+        return self.key < other.key
+
+    def __le__(self, other):
+        return self.key <= other.key
+
+    def __gt__(self, other):
+        return self.key > other.key
+
+    def __ge__(self, other):
+        return self.key >= other.key
+
+
+def check_stability(info, data):
+    """Return True if the registered sort with the given SortInfo keeps equal
+    items of the given data in input order when sorting tagged copies of them,
+    False if it reorders any, or None if it can't sort tagged items (integer
+    and string sorts without a key argument)."""
+    items = [TaggedItem(value, tag) for tag, value in enumerate(data)]
+    if info.supports('any'):
+        info.function(items)
+    elif 'key' in inspect.signature(info.function).parameters:
+        info.function(items, key=_tagged_key)
+    else:
+        return None
+    return all(item1.key < item2.key or
+               (item1.key == item2.key and item1.tag < item2.tag)
+               for item1, item2 in zip(items, items[1:]))
+
+
+def _tagged_key(item):
+    """Return the key of the given tagged item."""
+    return item.key
+
+
+def time_sort(sort, data, repeat=5, warmup=1):
+    """Return a list of `repeat` running times in seconds of sorting copies
+    of the given data with the given sort function, after `warmup` untimed
+    runs, and whether every run sorted its copy correctly."""
+    times = []
+    correct = True
+    for run in range(warmup + repeat):
+        items = list(data)
+        start_time = time.perf_counter()
+        sort(items)
+        elapsed = time.perf_counter() - start_time
+        correct = correct and len(items) == len(data) and is_sorted(items)
+        if run >= warmup:
+            times.append(elapsed)
+    return times, correct
+
+
+def peak_memory(sort, data):
+    """Return the peak number of bytes allocated by tracemalloc while sorting
+    a copy of the given data with the given sort function."""
+    items = list(data)
+    tracemalloc.start()
+    try:
+        sort(items)
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return peak
+
+
+def summarize(times):
+    """Return the median and interquartile range of the given times."""
+    if len(times) < 2:
+        return times[0], 0.0
+    quartiles = statistics.quantiles(times, n=4, method='inclusive')
+    return statistics.median(times), quartiles[2] - quartiles[0]
+
+
+def run_suite(sizes=SIZES, distributions=DISTRIBUTIONS, sort_names=None,
+              repeat=5, warmup=1, seed=0,
+              max_quadratic_size=MAX_QUADRATIC_SIZE, measure_memory=True,
+              verify_stability=False, log=None):
+    """Benchmark the registered sorts with the given names (or all of them,
+    except those that don't support an input's kind of items) on inputs of
+    every given size and distribution, and return a list of result dicts
+    with median and IQR times in seconds and peak memory in bytes. If
+    verify_stability is True, each sort also sorts tagged copies of the input
+    and its result records whether equal items kept their input order (see
+    check_stability). Progress is written to the given log file, if any."""
+    results = []
+    for distribution in distributions:
+        for size in sizes:
+            data = generate(distribution, size, seed)
+            for name, info in REGISTRY.items():
+                sort = info.function
+                if sort_names is not None and name not in sort_names:
+                    continue
+                if not info.supports(kind_of(data)):
+                    continue
+                if info.quadratic and size > max_quadratic_size:
+                    continue
+                result = {'sort': name, 'distribution': distribution,
+                          'size': size, 'seed': seed, 'repeat': repeat,
+                          'median': None, 'iqr': None, 'min': None,
+                          'peak_memory': None, 'correct': False,
+                          'declared_stable': info.stable, 'stable': None,
+                          'error': None}
+                try:
+                    times, correct = time_sort(sort, data, repeat, warmup)
+                    median, iqr = summarize(times)
+                    result.update(median=median, iqr=iqr, min=min(times),
+                                  correct=correct)
+                    if measure_memory:
+                        result['peak_memory'] = peak_memory(sort, data)
+                    if verify_stability:
+                        result['stable'] = check_stability(info, data)
+                except Exception as error:
+                    # Record a broken sort and keep benchmarking the others
+                    result['error'] = repr(error)
+                results.append(result)
+                if log is not None:
+                    _log_result(log, result)
+    return results
+
+
+def _log_result(log, result):
+    """Write a one-line summary of the given result to the given log file."""
+    if result['error'] is not None:
+        summary = 'ERROR {}'.format(result['error'])
+    else:
+        summary = '{:>10.6f}s ±{:.6f}s{}{}'.format(
+            result['median'], result['iqr'],
+            '' if result['correct'] else '  INCORRECT',
+            '  UNSTABLE' if result['declared_stable'] and
+            result['stable'] is False else '')
+    log.write('{:>12} {:>9} {:>21} {}\n'.format(
+        result['distribution'], result['size'], result['sort'], summary))
+    log.flush()
+
+
+FIELDS = ['sort', 'distribution', 'size', 'seed', 'repeat', 'median', 'iqr',
+          'min', 'peak_memory', 'correct', 'declared_stable', 'stable',
+          'error']
+
+
+def write_results(results, file, output_format='json'):
+    """Write the given results to the given file as JSON or CSV."""
+    if output_format == 'json':
+        environment = {'python': sys.version.split()[0],
+                       'platform': sys.platform}
+        json.dump({'environment': environment, 'results': results}, file,
+                  indent=2)
+        file.write('\n')
+    else:
+        writer = csv.DictWriter(file, FIELDS)
+        writer.writeheader()
+        writer.writerows(results)
+
+
+def main():
+    """Read command-line arguments and run the benchmark suite."""
+    import argparse
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--sizes', type=int, nargs='+', default=SIZES,
+                        help='input sizes (default: %(default)s)')
+    parser.add_argument('--distributions', nargs='+', default=DISTRIBUTIONS,
+                        choices=DISTRIBUTIONS, metavar='DISTRIBUTION',
+                        help='input distributions (default: all of {})'
+                        .format(', '.join(DISTRIBUTIONS)))
+    parser.add_argument('--sorts', nargs='+', metavar='SORT',
+                        help='names of sort functions (default: all)')
+    parser.add_argument('--repeat', type=int, default=5,
+                        help='timed runs per benchmark (default: %(default)s)')
+    parser.add_argument('--warmup', type=int, default=1,
+                        help='untimed runs first (default: %(default)s)')
+    parser.add_argument('--seed', type=int, default=0,
+                        help='seed for generating inputs '
+                             '(default: %(default)s)')
+    parser.add_argument('--max-quadratic-size', type=int,
+                        default=MAX_QUADRATIC_SIZE,
+                        help='skip quadratic sorts on larger inputs '
+                             '(default: %(default)s)')
+    parser.add_argument('--no-memory', action='store_true',
+                        help="don't measure peak memory with tracemalloc")
+    parser.add_argument('--verify-stability', action='store_true',
+                        help='check that equal items keep their input order')
+    parser.add_argument('--format', choices=['json', 'csv'], default='json',
+                        help='output format (default: %(default)s)')
+    parser.add_argument('--output', '-o',
+                        help='output file (default: standard output)')
+    args = parser.parse_args()
+
+    results = run_suite(args.sizes, args.distributions, args.sorts,
+                        args.repeat, args.warmup, args.seed,
+                        args.max_quadratic_size, not args.no_memory,
+                        args.verify_stability, log=sys.stderr)
+    if args.output:
+        with open(args.output, 'w', newline='') as file:
+            write_results(results, file, args.format)
+    else:
+        write_results(results, sys.stdout, args.format)
+
+
+if __name__ == '__main__':
+    main()
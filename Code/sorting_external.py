@@ -0,0 +1,291 @@
+#!python
+import pickle
+import sys
+import tempfile
+
+from binaryheap import BinaryMinHeap
+from sorting_recursive import merge_sort
+
+# Default number of bytes of items held in memory while building a run
+MEMORY_BUDGET = 64 * 1024 * 1024
+# Default maximum number of runs merged at once (each holds an open file)
+FAN_IN = 16
+# Number of items pickled together when spilling a run to a temporary file
+BLOCK_SIZE = 4096
+
+
+def kway_merge(*iterables, key=None, reverse=False):
+    """Merge given iterables, each assumed to already be in sorted order (or
+    in descending order, if reverse is True), and yield all of their items in
+    that order. Iterables are consumed lazily, so they may be lists, open
+    files or generators of any length. Items with equal keys are yielded in
+    the order of the iterables they came from (stable).
+    Running time:   O(n lg k) for n items in k iterables since each item passes
+                    through a binary min heap holding one entry per iterable.
+    Memory usage:   O(k) Only the current item of each iterable is stored."""
+    heap = BinaryMinHeap()
+    for index, iterable in enumerate(iterables):
+        iterator = iter(iterable)
+        for item in iterator:
+            # Heap entries are (key, index, item, iterator) so that ties are
+            # broken by iterable index and iterators are never compared
+            heap.insert((_heap_key(item, key, reverse), index, item,
+                         iterator))
+            break
+
+    while heap.size() > 1:
+        _, index, item, iterator = heap.get_min()
+        yield item
+        for next_item in iterator:
+            heap.replace_min((_heap_key(next_item, key, reverse), index,
+                              next_item, iterator))
+            break
+        else:
+            # This iterable is exhausted
+            heap.delete_min()
+
+    if heap.size() == 1:
+        # Only one iterable is left, so stream it without the heap
+        _, _, item, iterator = heap.delete_min()
+        yield item
+        yield from iterator
+
+
+def _heap_key(item, key, reverse):
+    """Return the key that kway_merge orders the given item by in its min
+    heap: the item or its key, inverted with _Descending if reverse is True
+    so that the largest key comes out first."""
+    item_key = item if key is None else key(item)
+    return _Descending(item_key) if reverse else item_key
+
+
+class _Descending(object):
+    """A key that compares in the opposite order of the key it wraps, so a
+    min heap of them yields the largest wrapped key first. Equal keys stay
+    equal, so ties are still broken by the next field of a heap entry."""
+
+    __slots__ = ('key',)
+    __hash__ = None
+
+    def __init__(self, key):
+        self.key = key
+
+    def __eq__(self, other):
+        return self.key == other.key
+
+    def __ne__(self, other):
+        return self.key != other.key
+
+    def __lt__(self, other):
+        return other.key < self.key
+
+    def __le__(self, other):
+        return other.key <= self.key
+
+    def __gt__(self, other):
+        return other.key > self.key
+
+    def __ge__(self, other):
+        return other.key >= self.key
+
+
+def external_sort(items, key=None, memory_budget=MEMORY_BUDGET,
+                  fan_in=FAN_IN, tmpdir=None, reverse=False):
+    """Sort given items, which may not fit in memory, and yield them in sorted
+    order (descending, if reverse is True). Items are read in chunks of
+    roughly `memory_budget` bytes, each chunk is sorted in memory with merge
+    sort and spilled to a temporary file as a sorted run, and the runs are
+    combined with k-way merges of at most `fan_in` runs at a time. Items must
+    be picklable. The sort is stable, also in reverse, like sorted, since
+    merge_sort takes from the left half on ties and kway_merge breaks ties by
+    run order.
+    Running time:   O(n lg n) comparisons plus O(n log_f(n/m)) item reads and
+                    writes for f = fan_in and m items per run.
+    Memory usage:   O(m + f * BLOCK_SIZE) Only one run is built at a time and
+                    merges buffer one block per run."""
+    if fan_in < 2:
+        raise ValueError('fan_in must be at least 2, not {!r}'.format(fan_in))
+    runs = []
+    try:
+        for chunk in _read_chunks(items, memory_budget):
+            chunk = _sort_chunk(chunk, key, reverse)
+            if not runs and chunk.final:
+                # Everything fit in memory, so skip the temporary files
+                yield from chunk
+                return
+            runs.append(_write_run(chunk, tmpdir))
+            del chunk
+
+        # Merge consecutive groups of fan_in runs until one merge remains,
+        # keeping runs in input order so that the sort stays stable
+        while len(runs) > fan_in:
+            merged_runs = []
+            for start in range(0, len(runs), fan_in):
+                group = runs[start:start + fan_in]
+                merged = kway_merge(*[_read_run(run) for run in group],
+                                    key=key, reverse=reverse)
+                merged_runs.append(_write_run(merged, tmpdir))
+            for run in runs:
+                run.close()
+            runs = merged_runs
+        yield from kway_merge(*[_read_run(run) for run in runs], key=key,
+                              reverse=reverse)
+    finally:
+        for run in runs:
+            run.close()
+
+
+def external_sort_file(input_filename, output_filename,
+                       memory_budget=MEMORY_BUDGET, fan_in=FAN_IN, tmpdir=None):
+    """Sort the lines of the given input file, which may not fit in memory,
+    and write them in sorted order to the given output file."""
+    with open(input_filename) as input_file:
+        lines = (line if line.endswith('\n') else line + '\n'
+                 for line in input_file)
+        with open(output_filename, 'w') as output_file:
+            output_file.writelines(external_sort(lines, None, memory_budget,
+                                                 fan_in, tmpdir))
+
+
+class _Chunk(list):
+    """A list of items read from the input that records whether it is the
+    final chunk of the input."""
+    final = False
+
+
+def _read_chunks(items, memory_budget):
+    """Yield lists of consecutive given items whose estimated total size
+    (including one list pointer per item) is about `memory_budget` bytes."""
+    chunk = _Chunk()
+    size = 0
+    for item in items:
+        chunk.append(item)
+        size += sys.getsizeof(item) + 8
+        if size >= memory_budget:
+            yield chunk
+            chunk = _Chunk()
+            size = 0
+    chunk.final = True
+    yield chunk
+
+
+def _sort_chunk(chunk, key, reverse=False):
+    """Sort the given chunk in memory with merge sort (in descending order if
+    reverse is True, keeping equal items in input order), comparing
+    precomputed keys if a key function is given, and return the sorted
+    chunk."""
+    # With a key or reverse, merge_sort sorts (key, index) pairs (see
+    # sorting_keys.keyed), so items themselves are never compared
+    merge_sort(chunk, key=key, reverse=reverse)
+    return chunk
+
+
+def _write_run(items, tmpdir):
+    """Write the given sorted items to a new temporary file in blocks of
+    BLOCK_SIZE pickled items and return the file, rewound for reading."""
+    run = tempfile.TemporaryFile(dir=tmpdir)
+    block = []
+    for item in items:
+        block.append(item)
+        if len(block) == BLOCK_SIZE:
+            pickle.dump(block, run, pickle.HIGHEST_PROTOCOL)
+            block = []
+    if block:
+        pickle.dump(block, run, pickle.HIGHEST_PROTOCOL)
+    run.seek(0)
+    return run
+
+
+def _read_run(run):
+    """Yield the items of the given run file written by _write_run."""
+    while True:
+        try:
+            block = pickle.load(run)
+        except EOFError:
+            return
+        yield from block
+
+
+def generate_words_file(filename, num_lines, word_length=8):
+    """Write `num_lines` random lowercase words of up to `word_length`
+    letters to the given file, for benchmarking external sorting."""
+    import random
+    import string
+    letters = string.ascii_lowercase
+    with open(filename, 'w') as file:
+        for _ in range(num_lines):
+            length = random.randint(1, word_length)
+            file.write(''.join(random.choice(letters) for _ in range(length)))
+            file.write('\n')
+
+
+def benchmark(num_lines=1000000, memory_budget=4 * 1024 * 1024,
+              fan_in=FAN_IN):
+    """Sort a generated file of random words with external_sort_file and with
+    Python's built-in sorted, and print their running times."""
+    import os
+    import time
+    with tempfile.TemporaryDirectory() as directory:
+        input_filename = os.path.join(directory, 'words.txt')
+        output_filename = os.path.join(directory, 'sorted.txt')
+        generate_words_file(input_filename, num_lines)
+        size = os.path.getsize(input_filename)
+        print('Input: {} lines, {:.1f} MB'.format(num_lines, size / 2**20))
+        print('Memory budget: {:.1f} MB, fan-in: {}'
+              .format(memory_budget / 2**20, fan_in))
+
+        start_time = time.perf_counter()
+        external_sort_file(input_filename, output_filename, memory_budget,
+                           fan_in, directory)
+        external_time = time.perf_counter() - start_time
+
+        start_time = time.perf_counter()
+        with open(input_filename) as file:
+            expected = sorted(file)
+        builtin_time = time.perf_counter() - start_time
+
+        with open(output_filename) as file:
+            correct = all(line == expected_line
+                          for line, expected_line in zip(file, expected))
+        print('External sort time: {:.3f} sec'.format(external_time))
+        print('Built-in sort time: {:.3f} sec (in memory)'.format(builtin_time))
+        print('Output sorted correctly? {}'.format(correct))
+
+
+def main():
+    """Read command-line arguments and sort, merge or benchmark files."""
+    args = sys.argv[1:]  # Ignore script file name
+    if len(args) == 0:
+        script = sys.argv[0]  # Get script file name
+        print('Usage: {} sort input output [budget_mb] [fan_in]'.format(script))
+        print('       {} merge file1 [file2 ...]'.format(script))
+        print('       {} benchmark [num_lines] [budget_mb] [fan_in]'
+              .format(script))
+        print('Sort the lines of a file larger than memory, merge the lines of')
+        print('    sorted files, or benchmark sorting a generated words file')
+        return
+    command, args = args[0], args[1:]
+
+    if command == 'sort' and len(args) >= 2:
+        budget = float(args[2]) * 2**20 if len(args) >= 3 else MEMORY_BUDGET
+        fan_in = int(args[3]) if len(args) >= 4 else FAN_IN
+        external_sort_file(args[0], args[1], budget, fan_in)
+    elif command == 'merge':
+        files = [open(filename) for filename in args]
+        try:
+            for line in kway_merge(*files):
+                sys.stdout.write(line if line.endswith('\n') else line + '\n')
+        finally:
+            for file in files:
+                file.close()
+    elif command == 'benchmark':
+        num_lines = int(args[0]) if len(args) >= 1 else 1000000
+        budget = float(args[1]) * 2**20 if len(args) >= 2 else 4 * 2**20
+        fan_in = int(args[2]) if len(args) >= 3 else FAN_IN
+        benchmark(num_lines, budget, fan_in)
+    else:
+        print('Unknown command or missing arguments: {}'.format(command))
+
+
+if __name__ == '__main__':
+    main()
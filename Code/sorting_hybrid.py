@@ -0,0 +1,231 @@
+#!python
+import logging
+import random
+from collections import namedtuple
+from itertools import groupby, islice
+from operator import lt
+
+from sorting_adaptive import adaptive_merge_sort
+from sorting_integer import counting_sort, radix_sort, msd_radix_sort
+from sorting_iterative import insertion_sort
+from sorting_recursive import quick_sort
+
+logger = logging.getLogger(__name__)
+
+# Thresholds used by choose_algorithm, which may be tuned by assigning new
+# values or measured on this machine with calibrate()
+# Lists with at most this many items are insertion sorted
+INSERTION_THRESHOLD = 24
+# Lists whose natural runs are at least this long on average are sorted with
+# adaptive merge sort, which merges runs instead of sorting from scratch
+MIN_AVERAGE_RUN = 32
+# Ints are counting sorted if their range is at most this many times their
+# number (like integer_sort), and radix sorted if there are at least
+# RADIX_THRESHOLD of them
+COUNTING_RANGE_FACTOR = 4
+RADIX_THRESHOLD = 512
+# Strings are MSD radix sorted if there are at least STRING_RADIX_THRESHOLD
+# of them and at least DISTINCT_RATIO of a sample of them are distinct, since
+# quick sort's 3-way partitioning handles many duplicates better
+STRING_RADIX_THRESHOLD = 64
+DISTINCT_RATIO = 0.5
+# Number of items sampled to estimate the ratio of distinct items
+SAMPLE_SIZE = 256
+
+# What smart_sort learned about its input by probing it: the number of items,
+# the number of natural runs that adaptive_merge_sort would find, the kind
+# of items ('int', 'float', 'str' or 'other'), the minimum and maximum int,
+# and the ratio of distinct items in a sample (None if items aren't hashable)
+Profile = namedtuple('Profile', 'size runs kind min max distinct_ratio')
+
+# Sorting function for each algorithm name chosen by choose_algorithm
+ALGORITHMS = {
+    'insertion_sort': insertion_sort,
+    'adaptive_merge_sort': adaptive_merge_sort,
+    'counting_sort': counting_sort,
+    'radix_sort': radix_sort,
+    'msd_radix_sort': msd_radix_sort,
+    'quick_sort': quick_sort,
+}
+# Algorithms that accept key and reverse arguments
+KEYED_ALGORITHMS = {'insertion_sort', 'adaptive_merge_sort', 'counting_sort',
+                    'quick_sort'}
+
+
+def smart_sort(items, key=None, reverse=False, stable=False):
+    """Sort given items in place with the algorithm that suits them best,
+    chosen by probing the items (or their keys, if a key function is given)
+    with probe and choose_algorithm, and return the name of the algorithm
+    used. Each decision is logged at DEBUG level with its reason. Sorts are
+    stable when a key function, reverse or stable=True is given; otherwise
+    equal items may be reordered, which can't be observed for ints and
+    strings.
+    Running time:   O(n) to probe, plus the running time of the algorithm
+                    chosen: O(n) for runs and small int ranges, O(n lg n)
+                    otherwise, O(n^2) only for tiny lists."""
+    keys = items if key is None else [key(item) for item in items]
+    profile = probe(keys)
+    algorithm, reason = choose_algorithm(profile)
+    if (key is not None or reverse) and algorithm not in KEYED_ALGORITHMS:
+        algorithm, reason = 'quick_sort', reason + ', but key or reverse given'
+    logger.debug('smart_sort: %s (%s) for %r', algorithm, reason, profile)
+    sort = ALGORITHMS[algorithm]
+    if key is None and not reverse:
+        if stable and algorithm == 'quick_sort':
+            # The only unstable choice, so decorate items with their indices
+            sort(items, stable=True)
+        else:
+            sort(items)
+    else:
+        sort(items, key=key, reverse=reverse)
+    return algorithm
+
+
+def probe(items):
+    """Return a Profile of the given items, found with a few linear passes
+    that run mostly in C (comparing neighbors, checking types and finding the
+    range) and a sample of items to estimate how many are distinct. Runs are
+    counted from the neighbor comparisons with one Python step per change of
+    direction, so inputs with few runs are profiled quickly."""
+    size = len(items)
+    if size < 2:
+        return Profile(size, 1, 'other', None, None, None)
+    kinds = set(map(type, items))
+    kind = kinds.pop().__name__ if len(kinds) == 1 else 'other'
+    if kind not in ('int', 'float', 'str'):
+        kind = 'other'
+
+    runs = _count_runs(map(lt, islice(items, 1, None), items))
+
+    min_ = max_ = distinct_ratio = None
+    if kind == 'int':
+        min_, max_ = min(items), max(items)
+    if kind != 'other':
+        sample = (items if size <= SAMPLE_SIZE
+                  else random.sample(items, SAMPLE_SIZE))
+        distinct_ratio = len(set(sample)) / len(sample)
+    return Profile(size, runs, kind, min_, max_, distinct_ratio)
+
+
+def _count_runs(descents):
+    """Return the number of natural runs in items whose neighbors descend (or
+    not) as given by the booleans `descents[i] = items[i+1] < items[i]`,
+    split like sorting_adaptive._count_run splits them: each run is
+    non-descending or strictly descending, and the pair of neighbors where
+    the direction changes is not part of either run, so the next run's
+    direction is decided by the pair after it."""
+    runs = 0
+    boundary = False  # Whether the next pair straddles the end of a run
+    for _, group in groupby(descents):
+        length = sum(1 for _ in group)
+        if boundary:
+            length -= 1
+            boundary = False
+        if length > 0:
+            runs += 1
+            boundary = True
+    if not boundary:
+        # The last item starts a run of its own
+        runs += 1
+    return runs
+
+
+def choose_algorithm(profile):
+    """Return the name of the algorithm to sort items with the given Profile
+    and a short reason for choosing it, using this module's thresholds."""
+    size = profile.size
+    if size <= INSERTION_THRESHOLD:
+        return 'insertion_sort', 'at most {} items'.format(INSERTION_THRESHOLD)
+    if profile.runs * MIN_AVERAGE_RUN <= size:
+        return 'adaptive_merge_sort', '{} runs'.format(profile.runs)
+    if profile.kind == 'int':
+        if profile.max - profile.min <= COUNTING_RANGE_FACTOR * size:
+            return 'counting_sort', 'range {}'.format(profile.max -
+                                                      profile.min)
+        if size >= RADIX_THRESHOLD:
+            return 'radix_sort', 'wide int range'
+    if profile.kind == 'str' and size >= STRING_RADIX_THRESHOLD:
+        if profile.distinct_ratio >= DISTINCT_RATIO:
+            return 'msd_radix_sort', 'distinct strings'
+        return 'quick_sort', 'many duplicate strings'
+    return 'quick_sort', 'general {} items'.format(profile.kind)
+
+
+def _median_time(sort, data, repeat):
+    """Return the median running time of sorting copies of the given data."""
+    from sorting_benchmark import time_sort, summarize
+    times, _ = time_sort(sort, data, repeat)
+    return summarize(times)[0]
+
+
+def _crossover(sizes, make_input, slow, fast, repeat):
+    """Return the first of the given sizes at which the fast sort is faster
+    than the slow sort on inputs made by make_input(size), or None."""
+    for size in sizes:
+        data = make_input(size)
+        if _median_time(fast, data, repeat) < _median_time(slow, data, repeat):
+            return size
+    return None
+
+
+def calibrate(repeat=5, apply=False):
+    """Measure where each choice made by choose_algorithm starts to pay off
+    on this machine and return a dict of recommended threshold values. If
+    apply is True, also assign them to this module's thresholds."""
+    rng = random.Random(0)
+
+    def random_ints(size):
+        return [rng.randint(0, size) for _ in range(size)]
+
+    def wide_ints(size):
+        return [rng.randint(0, 2**32) for _ in range(size)]
+
+    def runs_of(length):
+        # 4096 items made of sorted runs of the given length
+        items = []
+        while len(items) < 4096:
+            items.extend(sorted(rng.randint(0, 4096) for _ in range(length)))
+        return items
+
+    def words(size):
+        letters = 'abcdefghijklmnopqrstuvwxyz'
+        return [''.join(rng.choice(letters) for _ in range(rng.randint(1, 12)))
+                for _ in range(size)]
+
+    insertion = _crossover(range(4, 129, 4), random_ints, insertion_sort,
+                           quick_sort, repeat)
+    thresholds = {
+        'INSERTION_THRESHOLD': (insertion - 4 if insertion is not None
+                                else 128),
+        'MIN_AVERAGE_RUN': _crossover([2, 4, 8, 16, 32, 64, 128, 256, 512],
+                                      runs_of, quick_sort,
+                                      adaptive_merge_sort, repeat),
+        'RADIX_THRESHOLD': _crossover([16, 32, 64, 128, 256, 512, 1024, 2048],
+                                      wide_ints, quick_sort, radix_sort,
+                                      repeat),
+        'STRING_RADIX_THRESHOLD': _crossover(
+            [64, 128, 256, 512, 1024, 2048, 4096, 8192], words, quick_sort,
+            msd_radix_sort, repeat),
+    }
+    for name in list(thresholds):
+        if thresholds[name] is None:
+            # The faster sort never won, so keep the current threshold
+            thresholds[name] = globals()[name]
+    if apply:
+        globals().update(thresholds)
+    return thresholds
+
+
+def main():
+    """Read command-line arguments and calibrate smart_sort's thresholds."""
+    import sys
+    args = sys.argv[1:]  # Ignore script file name
+    repeat = int(args[0]) if args else 5
+    thresholds = calibrate(repeat)
+    print('{:>24} {:>10} {:>12}'.format('threshold', 'current', 'measured'))
+    for name, value in thresholds.items():
+        print('{:>24} {:>10} {:>12}'.format(name, globals()[name], value))
+
+
+if __name__ == '__main__':
+    main()
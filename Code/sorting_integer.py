@@ -1,54 +1,386 @@
 #!python
-from collections import deque
+import math
+import random
+from array import array
+from bisect import bisect_right
+from collections import Counter
+from itertools import chain, repeat
 
-from sorting_iterative import insertion_sort
+from sorting_kernels import small_sort, stable_small_sort
+from sorting_recursive import quick_sort
 
-def counting_sort(numbers):
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+# Lists with at least this many numbers are sorted with NumPy, if installed
+NUMPY_THRESHOLD = 1000
+# integer_sort uses counting sort if the range of values is at most this many
+# times the number of values, and radix sort otherwise
+COUNTING_RANGE_FACTOR = 4
+# Number of bits in each digit of radix sort (digits are bytes)
+RADIX_BITS = 8
+# Ranges of at most this many strings are sorted with stable_small_sort by
+# msd_radix_sort
+MSD_CUTOFF = 16
+# Average number of items per bucket when bucket_sort picks the bucket count
+BUCKET_SIZE = 4
+# Buckets of at most this many items are sorted with small_sort by bucket_sort
+BUCKET_CUTOFF = 16
+# Bucket sort recursion depth after which buckets are quick sorted instead
+MAX_BUCKET_DEPTH = 16
+# Number of values sampled to detect skew and choose splitters
+SAMPLE_SIZE = 1024
+# Number of sampled values per bucket when choosing splitters
+OVERSAMPLING = 4
+# Numbers are skewed if one even bucket would hold more than 1/SKEW_FRACTION
+# of the sample (and more than SKEW_MINIMUM sampled values)
+SKEW_FRACTION = 8
+SKEW_MINIMUM = 16
+
+def counting_sort(numbers, key=None, reverse=False):
     """Sort given numbers (integers) by counting occurrences of each number,
     then looping over counts and copying that many numbers into output list.
+    If a key function is given, items are sorted by their integer keys: each
+    key is computed once, counts are turned into starting positions, and items
+    are copied to their positions in input order (stable).
     Running time: O(n + (max(n) - min(n)))
     Memory usage: O(n + (max(n) - min(n)))"""
 
     if len(numbers) < 2:
         ## Already sorted
         return numbers
-    min_ = float('inf')
-    max_ = float('-inf')
+    if key is not None or reverse:
+        numbers[:] = _counting_sort_by_key(numbers, key, reverse)
+        return
+    min_ = min(numbers)
+    max_ = max(numbers)
+    if _use_numpy(numbers, min_, max_):
+        ## Count and expand with vectorized operations on a typed array
+        values = numpy.asarray(numbers, dtype=numpy.int64)
+        counts = numpy.bincount(values - min_)
+        values = numpy.arange(min_, max_ + 1, dtype=numpy.int64)
+        _store(numbers, numpy.repeat(values, counts))
+        return
 
-    for num in numbers:
-        min_ = min(min_, num)
-        max_ = max(max_, num)
+    ## Count with Counter and expand with itertools, which both loop in C
     counts = [0] * (max_ - min_ + 1)
+    for number, count in Counter(numbers).items():
+        counts[number - min_] = count
+    _store(numbers, chain.from_iterable(map(repeat, range(min_, max_ + 1),
+                                            counts)))
+
+
+def _counting_sort_by_key(items, key, reverse):
+    """Return a new list of given items stably sorted by their integer keys."""
+    keys = items if key is None else [key(item) for item in items]
+    min_ = min(keys)
+    counts = [0] * (max(keys) - min_ + 1)
+
+    for item_key in keys:
+        counts[item_key - min_] += 1
+
+    ## Turn counts into the starting position of each key's items
+    positions = [0] * len(counts)
+    total = 0
+    for i in (reversed(range(len(counts))) if reverse else range(len(counts))):
+        positions[i] = total
+        total += counts[i]
+
+    result = [None] * len(items)
+    for item, item_key in zip(items, keys):
+        result[positions[item_key - min_]] = item
+        positions[item_key - min_] += 1
+    return result
+
+
+def radix_sort(numbers):
+    """Sort given numbers (integers) by their digits from least significant
+    to most significant (LSD), where each digit is a byte of the number's
+    offset from the minimum, stably distributing numbers into 256 buckets by
+    the current digit in each pass.
+    Running time: O(n * w) for w bytes in max(n) - min(n), independent of the
+                  size of the range unlike counting sort
+    Memory usage: O(n + 256)"""
+    if len(numbers) < 2:
+        return
+    min_ = min(numbers)
+    max_ = max(numbers)
+    passes = -(-(max_ - min_).bit_length() // RADIX_BITS)  # Round up
+    mask = (1 << RADIX_BITS) - 1
+    if _use_numpy(numbers, min_, max_):
+        ## Reorder the whole array by each digit with a stable argsort. Digits
+        ## are cast to bytes, since NumPy only radix sorts integer types of
+        ## at most 16 bits and falls back to timsort for wider ones
+        offsets = numpy.asarray(numbers, dtype=numpy.int64) - min_
+        offsets = offsets.astype(numpy.uint64)
+        for digit in range(passes):
+            shift = numpy.uint64(digit * RADIX_BITS)
+            digits = ((offsets >> shift) & numpy.uint64(mask)).astype(
+                numpy.uint8)
+            offsets = offsets[numpy.argsort(digits, kind='stable')]
+        _store(numbers, offsets.astype(numpy.int64) + min_)
+        return
+
+    offsets = [number - min_ for number in numbers]
+    for digit in range(passes):
+        shift = digit * RADIX_BITS
+        buckets = [[] for _ in range(mask + 1)]
+        for offset in offsets:
+            buckets[(offset >> shift) & mask].append(offset)
+        offsets = list(chain.from_iterable(buckets))
+    _store(numbers, [offset + min_ for offset in offsets])
+
+
+def integer_sort(numbers):
+    """Sort given numbers (integers) with counting sort if their range of
+    values is small compared to their number, or with radix sort otherwise,
+    which keeps both running time and memory usage linear in practice.
+    Running time: O(n + min(max(n) - min(n), n * w)) for w bytes per number
+    Memory usage: O(n)"""
+    if len(numbers) < 2:
+        return
+    if max(numbers) - min(numbers) <= COUNTING_RANGE_FACTOR * len(numbers):
+        counting_sort(numbers)
+    else:
+        radix_sort(numbers)
+
+
+def msd_radix_sort(strings, cutoff=MSD_CUTOFF):
+    """Sort given strings (or bytes) by their characters from most significant
+    to least significant (MSD): distribute strings into buckets by their
+    first character, then sort each bucket by the next character, and so on.
+    Strings that end at the current position come before their bucket mates.
+    Buckets of at most `cutoff` strings are sorted with stable_small_sort
+    instead, since they share their prefix and are cheap to compare. Ranges
+    are kept on an explicit stack, so long strings can't overflow the call
+    stack. Stable.
+    Running time:   O(n * k) for k characters of distinguishing prefix, plus
+                    sorting each bucket's distinct characters (the alphabet)
+    Memory usage:   O(n + k) for one bucketed copy of a range at a time"""
+    items = list(strings)
+    stack = [(0, len(items), 0)]  # Ranges [low...high) sharing depth chars
+
+    while stack:
+        low, high, depth = stack.pop()
+        if high - low <= cutoff:
+            stable_small_sort(items, low, high-1)
+            continue
+        ## Distribute strings by their character at depth
+        ended = []
+        buckets = {}
+        for string in items[low:high]:
+            if len(string) == depth:
+                ended.append(string)
+            elif string[depth] in buckets:
+                buckets[string[depth]].append(string)
+            else:
+                buckets[string[depth]] = [string]
+
+        ## Write buckets back in character order and sort each one later
+        items[low:low+len(ended)] = ended
+        position = low + len(ended)
+        for character in sorted(buckets):
+            bucket = buckets[character]
+            items[position:position+len(bucket)] = bucket
+            if len(bucket) > 1:
+                stack.append((position, position + len(bucket), depth + 1))
+            position += len(bucket)
+    strings[:] = items
+
+
+def _use_numpy(numbers, min_, max_):
+    """Return True if the given numbers with the given minimum and maximum
+    should be sorted with NumPy, which must be installed, and whose 64-bit
+    integer arrays must be able to hold them and their range."""
+    return (numpy is not None and len(numbers) >= NUMPY_THRESHOLD and
+            -2**63 <= min_ and max_ < 2**63 and max_ - min_ < 2**63)
+
 
-    for number in numbers:
-        counts[number - min_] += 1
-    new_numbers = []
-
-    for i, count in enumerate(counts):
-        new_numbers.extend([i + min_]*count)
-    numbers[:] = new_numbers
-
-def bucket_sort(numbers, num_buckets=10):
-    """Sort given numbers by distributing into buckets representing subranges,
-    then sorting each bucket and concatenating all buckets in sorted order.
-    Running time:   O( (n/k)^2 * k) ) = O(n^2 / k)
-                    –> k is the number of buckets
-                    Buckets have size n/k. Insertion sort is quadratic in
-                    the worst cast, therefore each bucket has (n/k)^2 runtime.
-    Memory usage:   O(n)"""
-    buckets = [deque() for _ in range(num_buckets)]
-    smallest = float('inf')
-    largest = float('-inf')
-
-    for number in numbers:
-        smallest = min(smallest, number)
-        largest = max(largest, number)
-
-    for i, number in enumerate(numbers):
-        buckets[number // num_buckets].appendleft(number)
-
-    res = []
+def _store(numbers, values):
+    """Overwrite given numbers (a list, typed array.array or NumPy array) with
+    the given iterable or NumPy array of values, keeping the container type."""
+    if isinstance(numbers, list):
+        numbers[:] = values.tolist() if hasattr(values, 'tolist') else values
+    elif isinstance(numbers, array):
+        numbers[:] = array(numbers.typecode, values)
+    else:
+        numbers[:] = values
+
+
+def bucket_sort(numbers, num_buckets=None, key=None, reverse=False):
+    """Sort given numbers (ints or floats of any range, including infinities)
+    by distributing into buckets representing subranges, then sorting each
+    bucket and concatenating all buckets in sorted order. Bucket subranges
+    split the range between the smallest and largest number evenly, unless a
+    random sample shows that the numbers are skewed or the range is too wide
+    for a float, in which case splitters chosen from the sample make buckets
+    of roughly equal size. Buckets that are still large are bucket sorted
+    recursively, and small ones are sorted with small_sort.
+    If a key function is given, items are sorted by their numeric keys, each
+    computed once and paired with the item's index so ties keep input order.
+    Running time:   O(n) expected when numbers are spread evenly or the sample
+                    represents them well, since buckets then hold O(1) items
+                    on average. O(n lg n) in the worst case, when recursion
+                    gets too deep and quick sort takes over.
+                    –> num_buckets defaults to n / BUCKET_SIZE
+    Memory usage:   O(n) for the buckets"""
+    if key is None and not reverse:
+        numbers[:] = _bucket_sort(list(numbers), num_buckets, None, 0)
+        return
+    keys = numbers if key is None else [key(item) for item in numbers]
+    if reverse:
+        ## Negated indices reverse into ascending order with the list
+        pairs = [(item_key, -index) for index, item_key in enumerate(keys)]
+        pairs = _bucket_sort(pairs, num_buckets, _first, 0)
+        numbers[:] = [numbers[-index] for _, index in reversed(pairs)]
+    else:
+        pairs = [(item_key, index) for index, item_key in enumerate(keys)]
+        pairs = _bucket_sort(pairs, num_buckets, _first, 0)
+        numbers[:] = [numbers[index] for _, index in pairs]
+
+
+def choose_splitters(values, num_buckets, sample_size=SAMPLE_SIZE):
+    """Return a sorted list of at most num_buckets-1 distinct splitters chosen
+    evenly from a sorted random sample of the given values, such that
+    assigning each value to bucket `bisect_right(splitters, value)` fills
+    buckets roughly equally. At most one bucket is made per OVERSAMPLING
+    sampled values, so each splitter is supported by several samples."""
+    sample = random.sample(values, min(len(values), sample_size))
+    sample.sort()
+    num_buckets = max(1, min(num_buckets, len(sample) // OVERSAMPLING))
+    splitters = []
+    for index in range(1, num_buckets):
+        splitter = sample[index * len(sample) // num_buckets]
+        if not splitters or splitters[-1] < splitter:
+            splitters.append(splitter)
+    return splitters
+
+
+def _bucket_sort(items, num_buckets, value, depth):
+    """Return given list of items sorted by distributing them into buckets by
+    the numbers returned by the given value function (or the items themselves
+    if value is None), recursing into each bucket at the given depth."""
+    if len(items) <= BUCKET_CUTOFF:
+        small_sort(items)
+        return items
+    values = items if value is None else [value(item) for item in items]
+    smallest = min(values)
+    largest = max(values)
+    if smallest == largest:
+        return items  # All values are equal
+    if depth >= MAX_BUCKET_DEPTH:
+        ## Values are too unevenly spread to split further
+        quick_sort(items)
+        return items
+    if num_buckets is None:
+        num_buckets = max(2, len(items) // BUCKET_SIZE)
+
+    buckets = [[] for _ in range(num_buckets)]
+    span = largest - smallest
+    if span == math.inf or _is_skewed(values, num_buckets, smallest, span):
+        ## Size buckets by the sample's distribution instead of the range,
+        ## which can't be split evenly if it overflows floats (like ±inf)
+        splitters = choose_splitters(values, num_buckets)
+        buckets = buckets[:len(splitters) + 1]
+        for item, item_value in zip(items, values):
+            buckets[bisect_right(splitters, item_value)].append(item)
+    else:
+        last = num_buckets - 1
+        for item, item_value in zip(items, values):
+            ## True division is correctly rounded, so indices are monotonic,
+            ## and dividing by span first keeps offsets of huge floats finite
+            index = int((item_value - smallest) / span * num_buckets)
+            buckets[index if index < last else last].append(item)
+
+    result = []
     for bucket in buckets:
-        insertion_sort(bucket)
-        res.extend(bucket)
-    numbers[:] = res
+        if len(bucket) > 1:
+            bucket = _bucket_sort(bucket, None, value, depth + 1)
+        result.extend(bucket)
+    return result
+
+
+def _is_skewed(values, num_buckets, smallest, span):
+    """Return True if evenly splitting the range of the given values into
+    num_buckets buckets would put more than 1/SKEW_FRACTION of a random sample
+    of the values into a single bucket."""
+    sample = random.sample(values, min(len(values), SAMPLE_SIZE))
+    counts = Counter(int((sample_value - smallest) / span * num_buckets)
+                     for sample_value in sample)
+    return max(counts.values()) > max(SKEW_MINIMUM,
+                                      len(sample) // SKEW_FRACTION)
+
+
+def _first(pair):
+    """Return the first item of the given pair."""
+    return pair[0]
+
+
+def benchmark(size=1000000):
+    """Print the running times of counting_sort, radix_sort and integer_sort
+    on random ints of the given size with narrow and wide ranges of values."""
+    import time
+    from random import randint
+    print('NumPy available: {}'.format(numpy is not None))
+    print('{:>20}'.format('range') + ''.join(
+        '{:>15}'.format(name) for name in ['counting_sort', 'radix_sort',
+                                           'integer_sort', 'list.sort']))
+    for max_value in [size // 10, size, 2**32, 2**62]:
+        numbers = [randint(0, max_value) for _ in range(size)]
+        times = []
+        for sort in [counting_sort, radix_sort, integer_sort, list.sort]:
+            if sort is counting_sort and max_value > 16 * size:
+                times.append(None)  # Counts wouldn't fit in memory
+                continue
+            items = list(numbers)
+            start_time = time.perf_counter()
+            sort(items)
+            times.append(time.perf_counter() - start_time)
+        print('{:>20}'.format(max_value) + ''.join(
+            '{:>15}'.format('-') if elapsed is None else
+            '{:>14.3f}s'.format(elapsed) for elapsed in times))
+
+
+def benchmark_strings(filename='/usr/share/dict/words', size=235886):
+    """Print the running times of msd_radix_sort, merge_sort and sorted on the
+    shuffled lines of the given file, or on `size` generated random words if
+    the file doesn't exist."""
+    import random
+    import string
+    import time
+    from sorting_recursive import merge_sort
+    try:
+        with open(filename) as file:
+            words = [line.strip() for line in file]
+        print('Words: {} lines of {}'.format(len(words), filename))
+    except OSError:
+        words = [''.join(random.choice(string.ascii_lowercase)
+                         for _ in range(random.randint(1, 12)))
+                 for _ in range(size)]
+        print('Words: {} generated random words'.format(len(words)))
+    random.shuffle(words)
+    for sort in [msd_radix_sort, merge_sort, sorted]:
+        items = list(words)
+        start_time = time.perf_counter()
+        sort(items)
+        print('{:>16} {:>9.3f}s'.format(sort.__name__,
+                                        time.perf_counter() - start_time))
+
+
+def main():
+    """Read command-line arguments and benchmark integer or string sorting."""
+    import sys
+    args = sys.argv[1:]  # Ignore script file name
+    if args and args[0] == 'strings':
+        if len(args) > 1:
+            benchmark_strings(args[1])
+        else:
+            benchmark_strings()
+    else:
+        benchmark(int(args[0]) if args else 1000000)
+
+
+if __name__ == '__main__':
+    main()
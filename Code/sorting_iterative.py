@@ -1,5 +1,12 @@
 #!python
-from collections import namedtuple
+from sorting_kernels import (binary_insertion_sort, stable_small_sort,
+                             insertion_sort_range)
+from sorting_keys import keyed
+import validation
+
+# Blocks of this many items are sorted with stable_small_sort by
+# bottom_up_merge_sort before its first merge pass
+MERGE_BLOCK_SIZE = 16
 
 def is_sorted(items):
     """Return a boolean indicating whether given items are in sorted order.
@@ -15,107 +22,261 @@ def is_sorted(items):
     return True # Strictly ascending
 
 
+@keyed
 def bubble_sort(items):
     """Sort given items by swapping adjacent items that are out of order, and
-    repeating until all items are in sorted order.
+    repeating until all items are in sorted order. Each pass ends at the last
+    swap of the previous pass, since the items after it are already in their
+    final positions. Stable.
     Running time:   O(n^2) When items is descending, this will be at most
                     quadratic, but the function will exit once a sorted
-                    permutation is found.
+                    permutation is found: O(n) if items is sorted.
     Memory usage:   Θ(1) Swapping is done in-place."""
-    is_sorted = True # items is assumed sorted by default
-    cur_index = 0
-
-    while True:
-        ## Continue making passes through items until it ends up sorted.
-        if cur_index >= len(items) - 1:
-            ## The end of items has been reached
-            if is_sorted:
-                ## Descending pair not found, so items is sorted.
-                return
-            is_sorted = True # reset to default
-            cur_index = 0 # reset to beginning
-
-        if items[cur_index+1] < items[cur_index]:
-            ## Descending pair
-            is_sorted = False
-            items[cur_index], items[cur_index+1] = (items[cur_index+1],
-                                                    items[cur_index])
-        cur_index += 1
+    end = len(items) - 1
+
+    while end > 0:
+        ## Swap descending pairs up to end, remembering the last one swapped
+        last_swap = 0
+        for i in range(end):
+            if items[i+1] < items[i]:
+                items[i], items[i+1] = items[i+1], items[i]
+                last_swap = i
+        end = last_swap
 
 
+@keyed
+def cocktail_shaker_sort(items):
+    """Sort given items like bubble_sort, but alternate forward passes that
+    carry the largest unsorted item to the end with backward passes that
+    carry the smallest to the front, shrinking the unsorted range from both
+    ends to the last swap of each pass. Small items near the end move to the
+    front in one pass instead of one position per pass. Stable.
+    Running time:   O(n^2) When items is descending, but O(n) if items is
+                    sorted or has few items out of place.
+    Memory usage:   Θ(1) Swapping is done in-place."""
+    low = 0
+    high = len(items) - 1
+
+    while low < high:
+        ## Forward pass: items after the last swap are in place
+        last_swap = low
+        for i in range(low, high):
+            if items[i+1] < items[i]:
+                items[i], items[i+1] = items[i+1], items[i]
+                last_swap = i
+        high = last_swap
 
+        ## Backward pass: items before the last swap are in place
+        last_swap = high
+        for i in range(high, low, -1):
+            if items[i] < items[i-1]:
+                items[i], items[i-1] = items[i-1], items[i]
+                last_swap = i
+        low = last_swap
+
+
+@keyed
 def selection_sort(items):
     """Sort given items by finding minimum item, swapping it with first
-    unsorted item, and repeating until all items are in sorted order.
+    unsorted item, and repeating until all items are in sorted order. Items
+    are only written when they swap, so this makes at most 2(n-1) writes,
+    which suits storage where writes are expensive.
     Running time:   Θ(n^2) The number of comparisons doesn't change for
                     different permutations of items – it's strictly quadratic.
     Memory usage:   Θ(1) Swapping is done in-place."""
-    MinElm = namedtuple('MinElm', 'index key')
+    length = len(items)
 
-    for i, elm in enumerate(items):
+    for i in range(length - 1):
         ## Maintain selection sort invariant by using i to partition items
         ## into sorted on the left, unsorted on the right
-        # Track min on right half of partition
-        next_min = MinElm(i, elm)
+        # Track the index and value of the min in the unsorted items
+        min_index = i
+        min_item = items[i]
+        for j in range(i+1, length):
+            if items[j] < min_item:
+                min_index = j
+                min_item = items[j]
 
-        for j in range(i+1, len(items)):
-            ## Find the next min in unsorted items
-            # Update next_min
-            next_min = min(MinElm(j, items[j]), next_min, key=lambda o:o.key)
-        # Swap partition element with next minimum element
-        items[i], items[next_min.index] = items[next_min.index], items[i]
+        if min_index != i:
+            # Swap partition element with next minimum element
+            items[min_index] = items[i]
+            items[i] = min_item
 
 
-def insertion_sort(items):
-    """Sort given items by taking first unsorted item, inserting it in sorted
-    order in front of items, and repeating until all items are in order.
+@keyed
+def double_selection_sort(items):
+    """Sort given items by finding both the minimum and maximum unsorted item
+    in each pass, and swapping them with the first and last unsorted items,
+    so half as many passes are needed as selection_sort. Like selection_sort,
+    this makes at most 2(n-1) writes.
+    Running time:   Θ(n^2) Every pass compares every unsorted item.
+    Memory usage:   Θ(1) Swapping is done in-place."""
+    low = 0
+    high = len(items) - 1
+
+    while low < high:
+        ## Find the min and max in unsorted range [low...high]
+        min_index = max_index = low
+        min_item = max_item = items[low]
+        for j in range(low+1, high+1):
+            item = items[j]
+            if item < min_item:
+                min_index = j
+                min_item = item
+            elif max_item < item:
+                max_index = j
+                max_item = item
+
+        if min_index != low:
+            items[min_index] = items[low]
+            items[low] = min_item
+            if max_index == low:
+                # The max was moved to where the min was
+                max_index = min_index
+        if max_index != high:
+            items[max_index] = items[high]
+            items[high] = max_item
+        low += 1
+        high -= 1
+
+
+@keyed
+def insertion_sort(items, low=0, high=None):
+    """Sort given items (or only those in range `[low...high]`) by taking first
+    unsorted item, inserting it in sorted order in front of items, and
+    repeating until all items are in order.
     Running time:   O(n^2) When items is descending, every element must be
                     inserted into the first position.
     Memory usage:   Θ(1) Sorting is done in-place."""
+    if high is None:
+        high = len(items) - 1
+    # The swapping loop is shared with the small-array kernels
+    insertion_sort_range(items, low, high)
 
-    for i in range(1, len(items)):
-        ## Go through every yet-to-be-sorted element, inserting into
-        ## the sorted array up to i
-
-        while i > 0 and items[i] < items[i-1]:
-            items[i], items[i-1] = items[i-1], items[i] # Bubble down
-            i -= 1
 
 def merge(items, start, end, subarray_size):
     """Merges two sorted subarrays in items, given the start of the first
-    subarray and the end of the second."""
-    mid = start + subarray_size
-    assert is_sorted(items[start:mid])
-    assert is_sorted(items[start+subarray_size:end])
+    subarray and the end of the second (clamped to the end of items). On
+    ties, the item from the first subarray is taken first, so merging keeps
+    equal items in order.
+    Running time:   Θ(end - start) Each item is copied once to aux and back.
+    Memory usage:   Θ(end - start) for the auxiliary list."""
+    end = min(end, len(items))
+    mid = min(start + subarray_size, end)
+    if validation.ENABLED:
+        validation.check_sorted(items, start, mid, 'first subarray')
+        validation.check_sorted(items, mid, end, 'second subarray')
 
     aux = []
     i = start
     j = mid
 
     while i < mid and j < end:
-        if items[i] < items[j]:
-            aux.append(items[i])
-            i += 1
-        else:
+        if items[j] < items[i]:
             aux.append(items[j])
             j += 1
+        else:
+            # Take from the left on ties to keep the merge stable
+            aux.append(items[i])
+            i += 1
     aux.extend(items[i:mid] or items[j:end])
-    assert is_sorted(aux)
+    if validation.ENABLED:
+        validation.check_sorted(aux, name='merged subarrays')
 
     ## Overwrite elements in subarrays in their correctly sorted order
-    for i in range(start, end):
-        items[i] = aux[i-start]
+    items[start:end] = aux
 
 
+@keyed
 def bottom_up_merge_sort(items):
-    """Bottom-up merge sort takes lgn passes to sort subarrays of doubling size,
-    while there's a final subarray equalling the size of items.
-    """
-    subarray_size = 1
-
-    while subarray_size < len(items)//2:
-        ## Continue making passes through items until the subarray size is
-        ## the size of items, since this means items is finally sorted.
-        for i in range(0, len(items), subarray_size):
-            merge(items, i, i+subarray_size*2, subarray_size)
-        subarray_size *= 2
+    """Sort given items without recursion by sorting blocks of
+    MERGE_BLOCK_SIZE items with stable_small_sort, then merging adjacent runs
+    of doubling width in lg(n / MERGE_BLOCK_SIZE) passes until one run spans
+    all items. Each pass merges from items into a buffer allocated once, or
+    back again, so no lists are allocated per merge, and the result is copied
+    back with one slice assignment if it ends up in the buffer. Runs that are
+    already in order are copied without merging. Stable. The call stack stays
+    flat, so this suits very large inputs.
+    Running time:   O(n lg n) Each pass copies every item once.
+                    O(n) when items is already sorted.
+    Memory usage:   Θ(n) for the buffer."""
+    length = len(items)
+    for low in range(0, length, MERGE_BLOCK_SIZE):
+        stable_small_sort(items, low,
+                          min(low + MERGE_BLOCK_SIZE, length) - 1)
+    if length <= MERGE_BLOCK_SIZE:
+        return
+
+    source = items
+    target = [None] * length
+    width = MERGE_BLOCK_SIZE
+    while width < length:
+        ## Merge each pair of adjacent runs of this width into target
+        for low in range(0, length, 2 * width):
+            mid = min(low + width, length)
+            high = min(low + 2 * width, length)
+            _merge_runs(source, target, low, mid, high)
+        source, target = target, source
+        width *= 2
+
+    if source is not items:
+        items[:] = source
+
+
+def _merge_runs(source, target, low, mid, high):
+    """Merge sorted runs `[low...mid)` and `[mid...high)` of source into the
+    same range of target, taking from the first run on ties."""
+    if mid == high or not source[mid] < source[mid-1]:
+        ## Runs are already in order (or there is no second run)
+        target[low:high] = source[low:high]
+        return
+    i = low
+    j = mid
+    k = low
+    while i < mid and j < high:
+        if source[j] < source[i]:
+            target[k] = source[j]
+            j += 1
+        else:
+            target[k] = source[i]
+            i += 1
+        k += 1
+    if i < mid:
+        target[k:high] = source[i:mid]
+    else:
+        target[k:high] = source[j:high]
+    if validation.ENABLED:
+        validation.check_sorted(target, low, high, 'merged runs')
+
+
+def benchmark_writes(sizes=(100, 1000), distributions=('random', 'sorted',
+                                                       'reversed',
+                                                       'few_unique')):
+    """Print the comparisons and writes made by each quadratic in-place sort
+    on inputs of the given sizes and distributions, as counted by
+    instrumentation.measure, to compare them for write-expensive storage."""
+    from instrumentation import measure
+    from sorting_benchmark import generate
+    sorts = [bubble_sort, cocktail_shaker_sort, insertion_sort,
+             binary_insertion_sort, selection_sort, double_selection_sort]
+    print('{:>22} {:>12} {:>6} {:>12} {:>10}'.format(
+        'sort', 'distribution', 'n', 'comparisons', 'writes'))
+    for distribution in distributions:
+        for size in sizes:
+            data = generate(distribution, size)
+            for sort in sorts:
+                _, report = measure(sort, list(data))
+                print('{:>22} {:>12} {:>6} {:>12} {:>10}'.format(
+                    sort.__name__, distribution, size, report.comparisons,
+                    report.writes))
+
+
+def main():
+    """Read command-line arguments and benchmark writes of quadratic sorts."""
+    import sys
+    sizes = [int(arg) for arg in sys.argv[1:]] or [100, 1000]
+    benchmark_writes(sizes)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,174 @@
+#!python
+"""Sorting kernels for tiny inputs, for use as the base case of the
+divide-and-conquer sorts: optimal sorting networks for up to 8 items, and
+insertion sort or a binary insertion sort that shifts items with slice
+assignment for larger ranges. The kernels that base cases call (small_sort,
+stable_small_sort and network_sort) are not decorated with keyed, so leaf
+calls don't pay for its wrapper."""
+from bisect import bisect_right
+
+from sorting_keys import keyed
+
+# Comparators (i, j) with i < j of a sorting network for each number of
+# items, with the fewest comparators known to be possible for that number.
+# Comparing and swapping items i and j in order sorts any list of that size.
+NETWORKS = {
+    0: [],
+    1: [],
+    2: [(0, 1)],
+    3: [(0, 1), (1, 2), (0, 1)],
+    4: [(0, 1), (2, 3), (0, 2), (1, 3), (1, 2)],
+    5: [(0, 1), (3, 4), (2, 4), (2, 3), (0, 3), (0, 2), (1, 4), (1, 3),
+        (1, 2)],
+    6: [(1, 2), (4, 5), (0, 2), (3, 5), (0, 1), (3, 4), (2, 5), (0, 3),
+        (1, 4), (2, 4), (1, 3), (2, 3)],
+    7: [(1, 2), (3, 4), (5, 6), (0, 2), (3, 5), (4, 6), (0, 1), (4, 5),
+        (2, 6), (0, 4), (1, 5), (0, 3), (2, 5), (1, 3), (2, 4), (2, 3)],
+    8: [(0, 2), (1, 3), (4, 6), (5, 7), (0, 4), (1, 5), (2, 6), (3, 7),
+        (0, 1), (2, 3), (4, 5), (6, 7), (2, 4), (3, 5), (1, 4), (3, 6),
+        (1, 2), (3, 4), (5, 6)],
+}
+# Ranges of at most this many items are sorted with a network by small_sort
+NETWORK_MAX_SIZE = max(NETWORKS)
+# Ranges of at least this many items are binary insertion sorted by
+# stable_small_sort, and shorter ones insertion sorted, since the binary
+# search and slice shift only pay off for longer ranges (measured on random
+# floats with benchmark_crossover)
+BINARY_INSERTION_CUTOFF = 14
+
+
+def network_sort(items, low=0, high=None):
+    """Sort range `[low...high]` of given items (by default, all of them) in
+    place with the sorting network for its size, which must be at most
+    NETWORK_MAX_SIZE. The range is copied into a local list so comparators
+    index it directly, and written back with one slice assignment. Networks
+    compare items that aren't adjacent, so this is not stable.
+    Running time:   Θ(1) for a fixed size: 19 comparisons for 8 items,
+                    whatever their order.
+    Memory usage:   Θ(1) for the copy of at most 8 items."""
+    if high is None:
+        high = len(items) - 1
+    size = high - low + 1
+    if size > NETWORK_MAX_SIZE:
+        raise ValueError('No sorting network for {} items; at most {} are '
+                         'supported'.format(size, NETWORK_MAX_SIZE))
+    if size < 2:
+        return
+    values = items[low:high+1]
+    for i, j in NETWORKS[size]:
+        if values[j] < values[i]:
+            values[i], values[j] = values[j], values[i]
+    items[low:high+1] = values
+
+
+@keyed
+def binary_insertion_sort(items, low=0, high=None):
+    """Sort given items (or only those in range `[low...high]`) in place by
+    binary searching for each item's position among the sorted items before
+    it and shifting the items after that position with one slice assignment,
+    instead of swapping it past them one at a time like insertion_sort.
+    Items already after their predecessor are left in place. Stable, since
+    each item is inserted after the items equal to it.
+    Running time:   O(n lg n) comparisons but O(n^2) item moves when items
+                    is reversed, though moves happen in C; O(n) if sorted.
+    Memory usage:   O(n) for the slice of shifted items."""
+    if high is None:
+        high = len(items) - 1
+    _binary_insertion_sort(items, low, high)
+
+
+def _binary_insertion_sort(items, low, high):
+    """Binary insertion sort range `[low...high]` of given items in place."""
+    for i in range(low+1, high+1):
+        item = items[i]
+        if not item < items[i-1]:
+            continue  # Already in place
+        position = bisect_right(items, item, low, i-1)
+        items[position+1:i+1] = items[position:i]
+        items[position] = item
+
+
+def insertion_sort_range(items, low, high):
+    """Insertion sort range `[low...high]` of given items in place by
+    swapping each item past the larger items before it. This is the loop of
+    sorting_iterative.insertion_sort without the keyed wrapper, for callers
+    that sort many small ranges."""
+    for i in range(low+1, high+1):
+        while i > low and items[i] < items[i-1]:
+            items[i], items[i-1] = items[i-1], items[i]
+            i -= 1
+
+
+def stable_small_sort(items, low=0, high=None):
+    """Sort range `[low...high]` of given items (by default, all of them) in
+    place with the fastest stable kernel for its size: insertion sort for
+    fewer than BINARY_INSERTION_CUTOFF items, and binary insertion sort for
+    more."""
+    if high is None:
+        high = len(items) - 1
+    if high - low + 1 < BINARY_INSERTION_CUTOFF:
+        insertion_sort_range(items, low, high)
+    else:
+        _binary_insertion_sort(items, low, high)
+
+
+def small_sort(items, low=0, high=None):
+    """Sort range `[low...high]` of given items (by default, all of them) in
+    place with the fastest kernel for its size: a sorting network for at most
+    NETWORK_MAX_SIZE items, and stable_small_sort for more. Not stable; sorts
+    that must be stable should call stable_small_sort instead."""
+    if high is None:
+        high = len(items) - 1
+    if high - low < NETWORK_MAX_SIZE:
+        network_sort(items, low, high)
+    else:
+        stable_small_sort(items, low, high)
+
+
+def benchmark_crossover(sizes=range(2, 33), repeat=2000):
+    """Print the mean time per call in microseconds of the undecorated
+    insertion sort, binary insertion sort and sorting network (when one
+    exists) kernels sorting copies of random lists of each given size, and
+    the size from which binary insertion sort stays faster than insertion
+    sort, a measured value for BINARY_INSERTION_CUTOFF."""
+    import random
+    import time
+    kernels = [insertion_sort_range, _binary_insertion_sort, network_sort]
+    rng = random.Random(0)
+    print('{:>6} {:>16} {:>22} {:>14}'.format(
+        'size', 'insertion_sort', 'binary_insertion_sort', 'network_sort'))
+    crossover = None
+    for size in sizes:
+        inputs = [[rng.random() for _ in range(size)] for _ in range(repeat)]
+        times = {}
+        for kernel in kernels:
+            if kernel is network_sort and size > NETWORK_MAX_SIZE:
+                continue
+            copies = [list(items) for items in inputs]
+            start_time = time.perf_counter()
+            for items in copies:
+                kernel(items, 0, size - 1)
+            times[kernel] = (time.perf_counter() - start_time) / repeat * 1e6
+        if times[_binary_insertion_sort] >= times[insertion_sort_range]:
+            crossover = None
+        elif crossover is None:
+            crossover = size
+        print('{:>6} {:>15.2f}us {:>21.2f}us {:>14}'.format(
+            size, times[insertion_sort_range], times[_binary_insertion_sort],
+            '{:.2f}us'.format(times[network_sort])
+            if network_sort in times else '-'))
+    print('binary_insertion_sort is faster from size {} '
+          '(BINARY_INSERTION_CUTOFF = {})'.format(crossover,
+                                                  BINARY_INSERTION_CUTOFF))
+
+
+def main():
+    """Read command-line arguments and benchmark the sorting kernels."""
+    import sys
+    args = sys.argv[1:]  # Ignore script file name
+    max_size = int(args[0]) if args else 32
+    benchmark_crossover(range(2, max_size + 1))
+
+
+if __name__ == '__main__':
+    main()
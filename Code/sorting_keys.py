@@ -0,0 +1,126 @@
+#!python
+import functools
+import inspect
+
+
+def keyed(sort):
+    """Decorate the given comparison sort function so that it accepts `key` and
+    `reverse` keyword arguments like Python's sorted. When either is given,
+    each item's key is computed once into a parallel list of (key, index)
+    pairs, the pairs are sorted with the given function, and items are then
+    rearranged in the order of the sorted indices (decorate-sort-undecorate).
+    Comparisons are then fast built-in tuple comparisons instead of calls to
+    a user-defined method, and since indices are unique, equal keys always
+    keep their input order, even if the underlying sort is unstable. Passing
+    stable=True without a key decorates items with their indices the same
+    way, which makes any sort stable at the cost of O(n) extra memory (pairs
+    are compared like tuples, so keys must define == consistently with <).
+    Sorts with `low` and `high` arguments only rearrange that range."""
+    signature = inspect.signature(sort)
+
+    @functools.wraps(sort)
+    def keyed_sort(items, *args, key=None, reverse=False, stable=False,
+                   **kwargs):
+        if key is None and not reverse and not stable:
+            return sort(items, *args, **kwargs)
+        keys = items if key is None else [key(item) for item in items]
+        if reverse:
+            ## Negated indices reverse into ascending order with the list
+            pairs = [(item_key, -index) for index, item_key in enumerate(keys)]
+        else:
+            pairs = [(item_key, index) for index, item_key in enumerate(keys)]
+        result = sort(pairs, *args, **kwargs)
+
+        if reverse:
+            low, high = _sorted_range(signature, pairs, args, kwargs)
+            pairs[low:high+1] = pairs[low:high+1][::-1]
+            items[:] = [items[-index] for _, index in pairs]
+        else:
+            items[:] = [items[index] for _, index in pairs]
+        return result
+
+    return keyed_sort
+
+
+def _sorted_range(signature, items, args, kwargs):
+    """Return the range `(low, high)` of items that a sort function with the
+    given signature rearranges when called with the given arguments."""
+    arguments = signature.bind(items, *args, **kwargs).arguments
+    low = arguments.get('low')
+    high = arguments.get('high')
+    if low is None:
+        low = 0
+    if high is None:
+        high = len(items) - 1
+    return low, high
+
+
+def benchmark(size=20000):
+    """Print the running times of sorting records by score with comparison
+    methods and with a key function, and the number of calls to Python code
+    each makes (comparison method calls versus key function calls)."""
+    import time
+    from random import randint
+    from binaryheap import heap_sort
+    from sorting_recursive import merge_sort, quick_sort
+    method_calls = 0
+    key_calls = 0
+
+    class Record(object):
+        """A record with a name and a score that orders itself by score with
+        user-defined comparison methods, the way records are sorted without
+        key functions."""
+
+        def __init__(self, name, score):
+            self.name = name
+            self.score = score
+
+        def __lt__(self, other):
+            nonlocal method_calls
+            method_calls += 1
+            return self.score < other.score
+
+        def __gt__(self, other):
+            nonlocal method_calls
+            method_calls += 1
+            return self.score > other.score
+
+        def __le__(self, other):
+            nonlocal method_calls
+            method_calls += 1
+            return self.score <= other.score
+
+    records = [Record(str(index), randint(0, size)) for index in range(size)]
+
+    def score(record):
+        nonlocal key_calls
+        key_calls += 1
+        return record.score
+
+    print('{:>12} {:>12} {:>12} {:>12} {:>12}'.format(
+        'sort', 'method time', 'calls', 'key time', 'calls'))
+    for sort in [merge_sort, quick_sort, heap_sort]:
+        items = list(records)
+        method_calls = 0
+        start_time = time.perf_counter()
+        sort(items)
+        method_time = time.perf_counter() - start_time
+
+        items = list(records)
+        key_calls = 0
+        start_time = time.perf_counter()
+        sort(items, key=score)
+        key_time = time.perf_counter() - start_time
+        print('{:>12} {:>11.4f}s {:>12} {:>11.4f}s {:>12}'.format(
+            sort.__name__, method_time, method_calls, key_time, key_calls))
+
+
+def main():
+    """Read command-line arguments and benchmark key function sorting."""
+    import sys
+    args = sys.argv[1:]  # Ignore script file name
+    benchmark(int(args[0]) if args else 20000)
+
+
+if __name__ == '__main__':
+    main()
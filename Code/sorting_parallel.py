@@ -0,0 +1,239 @@
+#!python
+import os
+from array import array
+from bisect import bisect_right
+from collections import namedtuple
+from concurrent.futures import ProcessPoolExecutor
+from itertools import chain
+from multiprocessing import shared_memory
+
+from sorting_external import kway_merge
+from sorting_integer import choose_splitters, OVERSAMPLING
+from sorting_keys import keyed
+from sorting_recursive import merge_sort
+
+# Inputs with fewer items than this per worker are sorted in this process,
+# since starting workers and merging would cost more than it saves
+MIN_CHUNK_SIZE = 10000
+# Number of sampled items per worker bucket when choosing sample sort splitters
+SAMPLE_PER_WORKER = 256
+
+# Load balance of a sample sort: the number of items sorted by each worker,
+# and the skew, the ratio of the largest bucket to the average bucket size
+# (1.0 when perfectly balanced)
+SampleSortStats = namedtuple('SampleSortStats', 'bucket_sizes skew')
+
+
+@keyed
+def parallel_merge_sort(items, workers=None, min_chunk_size=MIN_CHUNK_SIZE):
+    """Sort given items in place by partitioning them into one chunk per
+    worker process, sorting each chunk with merge sort in parallel, and
+    merging the sorted chunks with a k-way merge. Lists of only ints (that fit
+    in 64 bits) or only floats are passed to workers through a shared memory
+    buffer instead of being pickled. Stable, since merge_sort takes from the
+    left half on ties and the k-way merge breaks ties by chunk order.
+    Running time:   O((n/p) lg(n/p) + n lg p) for p workers, plus the cost of
+                    starting processes and copying items to them.
+    Memory usage:   O(n) for the chunks and the merged output."""
+    if workers is None:
+        workers = os.cpu_count() or 1
+    # Use fewer workers if chunks would be too small to be worth it
+    workers = max(1, min(workers, len(items) // max(1, min_chunk_size)))
+    if workers == 1:
+        merge_sort(items)
+        return
+    bounds = _chunk_bounds(len(items), workers)
+    typecode = _typecode(items)
+    if typecode is None:
+        chunks = [items[low:high] for low, high in bounds]
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            chunks = list(pool.map(_sort_list, chunks))
+    else:
+        chunks = _sort_shared(items, bounds, typecode, workers)
+    items[:] = kway_merge(*chunks)
+
+
+@keyed
+def sample_sort(items, workers=None, min_chunk_size=MIN_CHUNK_SIZE):
+    """Sort given items in place by choosing splitters from a random sample
+    of items, distributing items into one bucket per worker process by binary
+    searching the splitters, sorting each bucket with merge sort in parallel,
+    and concatenating the buckets. Unlike parallel_merge_sort, no merge is
+    needed at the end since buckets hold disjoint ranges of items. Stable,
+    since equal items land in the same bucket in input order and merge_sort
+    takes from the left half on ties. Return
+    SampleSortStats describing how evenly the items were split.
+    Running time:   O(n lg p + (n/p) lg(n/p)) for p workers if buckets are
+                    balanced, plus the cost of copying items to workers.
+    Memory usage:   O(n) for the buckets."""
+    if workers is None:
+        workers = os.cpu_count() or 1
+    workers = max(1, min(workers, len(items) // max(1, min_chunk_size)))
+    if workers == 1:
+        merge_sort(items)
+        return SampleSortStats([len(items)], 1.0)
+
+    ## Split items into buckets by splitters (extending bucket_sort's idea)
+    splitters = choose_splitters(items, workers,
+                                 workers * SAMPLE_PER_WORKER * OVERSAMPLING)
+    buckets = [[] for _ in range(len(splitters) + 1)]
+    for item in items:
+        buckets[bisect_right(splitters, item)].append(item)
+
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        buckets = list(pool.map(_sort_list, buckets))
+    items[:] = chain.from_iterable(buckets)
+
+    bucket_sizes = [len(bucket) for bucket in buckets]
+    skew = max(bucket_sizes) * len(bucket_sizes) / len(items)
+    return SampleSortStats(bucket_sizes, skew)
+
+
+def _chunk_bounds(length, workers):
+    """Return a list of (low, high) index ranges splitting the given length
+    into the given number of approximately equal chunks."""
+    return [(length * index // workers, length * (index + 1) // workers)
+            for index in range(workers)]
+
+
+def _typecode(items):
+    """Return the array typecode for a shared buffer that can hold the given
+    items exactly ('q' for 64-bit ints, 'd' for floats), or None if they must
+    be pickled instead."""
+    if all(type(item) is int for item in items):
+        if -2**63 <= min(items) and max(items) < 2**63:
+            return 'q'
+    elif all(type(item) is float for item in items):
+        return 'd'
+    return None
+
+
+def _sort_list(items):
+    """Sort and return the given list of items (run in a worker process)."""
+    merge_sort(items)
+    return items
+
+
+def _sort_shared(items, bounds, typecode, workers):
+    """Copy given numeric items into a shared memory buffer, sort each chunk
+    of it in place in worker processes, and return the sorted chunks."""
+    buffer = array(typecode, items)
+    memory = shared_memory.SharedMemory(create=True,
+                                        size=max(1, len(buffer) *
+                                                 buffer.itemsize))
+    try:
+        # Release the view even if a worker fails, since the memory can't be
+        # closed while it's still exported
+        with memory.buf.cast(typecode) as view:
+            view[:len(buffer)] = buffer
+            del buffer
+            with ProcessPoolExecutor(max_workers=workers) as pool:
+                jobs = [pool.submit(_sort_shared_chunk, memory.name, typecode,
+                                    low, high) for low, high in bounds]
+                for job in jobs:
+                    job.result()  # Raise any exception from the worker
+            return [view[low:high].tolist() for low, high in bounds]
+    finally:
+        memory.close()
+        memory.unlink()
+
+
+def _sort_shared_chunk(name, typecode, low, high):
+    """Sort the items in range [low...high) of the shared memory buffer with
+    the given name in place (run in a worker process)."""
+    memory = shared_memory.SharedMemory(name=name)
+    try:
+        with memory.buf.cast(typecode) as view:
+            chunk = view[low:high].tolist()
+            merge_sort(chunk)
+            view[low:high] = array(typecode, chunk)
+    finally:
+        memory.close()
+
+
+def benchmark(sizes=(10000, 100000, 1000000), worker_counts=None):
+    """Print a table of running times and speedups of parallel_merge_sort over
+    merge_sort for random ints and strings of the given sizes, using each of
+    the given numbers of worker processes."""
+    import random
+    import time
+    if worker_counts is None:
+        cores = os.cpu_count() or 1
+        worker_counts = sorted(set([1, 2, 4, cores]))
+    print('{:>8} {:>8} {:>8} {:>10} {:>8}'.format('type', 'size', 'workers',
+                                                 'time', 'speedup'))
+    for size in sizes:
+        numbers = [random.randint(0, size) for _ in range(size)]
+        words = [str(number) for number in numbers]
+        for name, data in [('int', numbers), ('str', words)]:
+            baseline = None
+            for workers in worker_counts:
+                items = list(data)
+                start_time = time.perf_counter()
+                parallel_merge_sort(items, workers, min_chunk_size=1)
+                elapsed = time.perf_counter() - start_time
+                if baseline is None:
+                    baseline = elapsed
+                print('{:>8} {:>8} {:>8} {:>9.3f}s {:>7.2f}x'.format(
+                    name, size, workers, elapsed, baseline / elapsed))
+
+
+def benchmark_sample_sort(size=1000000, worker_counts=None):
+    """Print running times and bucket skew of sample_sort versus
+    parallel_merge_sort for random, skewed and few-unique ints of the given
+    size, using each of the given numbers of worker processes."""
+    import random
+    import time
+    if worker_counts is None:
+        cores = os.cpu_count() or 1
+        worker_counts = sorted(set([2, 4, cores]))
+    inputs = [('random', [random.randint(0, size) for _ in range(size)]),
+              ('skewed', [int(random.paretovariate(1)) for _ in range(size)]),
+              ('few unique', [random.randint(0, 9) for _ in range(size)])]
+    print('{:>12} {:>8} {:>12} {:>8} {:>14}'.format(
+        'input', 'workers', 'sample sort', 'skew', 'merge sort'))
+    for name, data in inputs:
+        for workers in worker_counts:
+            items = list(data)
+            start_time = time.perf_counter()
+            stats = sample_sort(items, workers, min_chunk_size=1)
+            sample_time = time.perf_counter() - start_time
+
+            items = list(data)
+            start_time = time.perf_counter()
+            parallel_merge_sort(items, workers, min_chunk_size=1)
+            merge_time = time.perf_counter() - start_time
+            print('{:>12} {:>8} {:>11.3f}s {:>8.2f} {:>13.3f}s'.format(
+                name, workers, sample_time, stats.skew, merge_time))
+
+
+def main():
+    """Read command-line arguments and benchmark parallel sorts."""
+    import sys
+    args = sys.argv[1:]  # Ignore script file name
+    if len(args) == 0:
+        script = sys.argv[0]  # Get script file name
+        print('Usage: {} size [size ...] [-w workers ...]'.format(script))
+        print('       {} sample size [-w workers ...]'.format(script))
+        print('Benchmark parallel merge sort speedup versus worker count, or')
+        print('    sample sort time and bucket skew versus parallel merge sort')
+        print('Example: {} 10000 100000 -w 1 2 4'.format(script))
+        return
+    if args[0] == 'sample':
+        worker_counts = None
+        if '-w' in args:
+            worker_counts = [int(arg) for arg in args[args.index('-w') + 1:]]
+        benchmark_sample_sort(int(args[1]), worker_counts)
+        return
+    if '-w' in args:
+        split = args.index('-w')
+        sizes = [int(arg) for arg in args[:split]]
+        worker_counts = [int(arg) for arg in args[split + 1:]]
+    else:
+        sizes = [int(arg) for arg in args]
+        worker_counts = None
+    benchmark(sizes, worker_counts)
+
+
+if __name__ == '__main__':
+    main()
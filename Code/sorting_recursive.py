@@ -1,30 +1,39 @@
 #!python
-from sorting_iterative import is_sorted, insertion_sort
+from binaryheap import heap_sort
+from sorting_iterative import insertion_sort
+from sorting_kernels import network_sort, small_sort, stable_small_sort
+from sorting_keys import keyed
+import validation
 #from sorting_iterative import merge_sort_it
-from random import randint, shuffle
+from random import randint
 
 def merge(items1, items2):
     """Merge given lists of items, each assumed to already be in sorted order,
-    and return a new list containing all items in sorted order.
-    Running time:
+    and return a new list containing all items in sorted order. On ties, the
+    item from items1 is taken first, so merging keeps equal items in order.
+    Running time:   theta(n + m) since each item is appended once.
     Memory usage:   theta(n + m) since auxiliary array is always made to contain
                     the combination of both lists."""
-    assert is_sorted(items1)
-    assert is_sorted(items2)
+    if validation.ENABLED:
+        validation.check_sorted(items1, name='items1')
+        validation.check_sorted(items2, name='items2')
     aux = []
     i = j = 0
 
     while i < len(items1) and j < len(items2):
-        if items1[i] < items2[j]:
-            aux.append(items1[i])
-            i += 1
-        else:
+        if items2[j] < items1[i]:
             aux.append(items2[j])
             j += 1
+        else:
+            # Take from the left on ties to keep the merge stable
+            aux.append(items1[i])
+            i += 1
     aux.extend(items1[i:] or items2[j:])
-    assert is_sorted(aux)
+    if validation.ENABLED:
+        validation.check_sorted(aux, name='merged items')
     return aux
 
+@keyed
 def split_sort_merge(items):
     """Sort given items by splitting list into two approximately equal halves,
     sorting each with an iterative sorting algorithm, and merging results into
@@ -37,13 +46,18 @@ def split_sort_merge(items):
     items[:] = merge(left, right)
 
 
+@keyed
 def merge_sort(items):
     """Sort given items by splitting list into two approximately equal halves,
     sorting each recursively, and merging results into a list in sorted order.
+    Lists of at most INSERTION_CUTOFF items are sorted with stable_small_sort
+    instead of being split further. Stable, since merge takes from the left
+    half on ties.
     TODO: Running time: ??? Why and under what conditions?
     TODO: Memory usage: ??? Why and under what conditions?"""
 
-    if len(items) < 2:
+    if len(items) <= INSERTION_CUTOFF:
+        stable_small_sort(items)
         return
 
     # Split items list into approximately equal halves
@@ -56,19 +70,65 @@ def merge_sort(items):
     items[:] = merge(left, right)
 
 
+# Ranges of at most this many items are sorted with a small-array kernel
+# (see sorting_kernels) by merge_sort, buffered_merge_sort and quick_sort
+# instead of being split further
+INSERTION_CUTOFF = 16
+# Ranges of more than this many items choose quick_sort pivots with the ninther
+NINTHER_CUTOFF = 40
+
+
+@keyed
+def buffered_merge_sort(items, cutoff=INSERTION_CUTOFF):
+    """Sort given items in place like merge_sort, but allocate a single
+    auxiliary copy of items up front and merge back and forth between it and
+    items by index range instead of slicing new halves at every level. Ranges
+    of at most `cutoff` items are sorted with stable_small_sort, and merges
+    are skipped when the two halves are already in order. Stable.
+    Running time:   O(n lg n) in the worst case, O(n) if items is sorted since
+                    every merge is skipped.
+    Memory usage:   Θ(n) for the auxiliary copy, plus O(lg n) call stack."""
+    if len(items) < 2:
+        return
+    aux = items[:]
+    _buffered_merge_sort(aux, items, 0, len(items), max(1, cutoff))
+
+
+def _buffered_merge_sort(src, dst, low, high, cutoff):
+    """Sort range `[low...high)` into dst, given that src and dst hold the
+    same items in that range, using src as scratch space."""
+    if high - low <= cutoff:
+        stable_small_sort(dst, low, high-1)
+        return
+    mid = (low + high) // 2
+    ## Sort both halves into src, using dst as scratch space
+    _buffered_merge_sort(dst, src, low, mid, cutoff)
+    _buffered_merge_sort(dst, src, mid, high, cutoff)
+
+    if not src[mid] < src[mid-1]:
+        ## Halves are already in order, so just copy them back
+        dst[low:high] = src[low:high]
+        return
+    ## Merge halves from src into dst, taking from the left on ties
+    i, j = low, mid
+    for k in range(low, high):
+        if j >= high or (i < mid and not src[j] < src[i]):
+            dst[k] = src[i]
+            i += 1
+        else:
+            dst[k] = src[j]
+            j += 1
+
+
 def partition(items, low, high):
     """Return index `p` after in-place partitioning given items in range
-    `[low...high]` by choosing a pivot randomly from
-    that range, moving pivot into index `p`, items less than pivot into range
+    `[low...high]` by choosing the first item in that range as pivot,
+    moving pivot into index `p`, items less than or equal to pivot into range
     `[low...p-1]`, and items greater than pivot into range `[p+1...high]`.
+    quick_sort and nth_element use partition3 instead, since this two-way
+    partition puts every item equal to the pivot on one side.
     Running time: O(high-low) Every element from low to high must be viewed.
     Memory usage: O(1) Elements are moved across pivot in-place."""
-    # 4 5 5 2 95 20
-    # ^   ^ ^
-    #
-    #
-    # low = 0
-    # high = 5
     ## Designate items[low] as pivot
     i = low+1
     j = high
@@ -80,37 +140,258 @@ def partition(items, low, high):
 
         while items[j] > items[low]:
             j -= 1
-            print(j)
 
         if j <= i:
             break
-        print(i, j)
         items[i], items[j] = items[j], items[i]
     items[low], items[j] = items[j], items[low]
     return j
 
 
+def partition3(items, low, high, pivot):
+    """Return indices `(lt, gt)` after in-place partitioning given items in
+    range `[low...high]` around the given pivot value into items less than
+    pivot in range `[low...lt-1]`, items equal to pivot in range `[lt...gt]`
+    and items greater than pivot in range `[gt+1...high]` (Dutch national
+    flag partitioning). Items equal to the pivot need no further sorting, so
+    duplicate-heavy ranges shrink quickly.
+    Running time: Θ(high-low) Every element from low to high is viewed once.
+    Memory usage: Θ(1) Elements are swapped in-place."""
+    lt = low
+    i = low
+    gt = high
+
+    while i <= gt:
+        item = items[i]
+        if item < pivot:
+            items[lt], items[i] = item, items[lt]
+            lt += 1
+            i += 1
+        elif pivot < item:
+            items[gt], items[i] = item, items[gt]
+            gt -= 1
+        else:
+            i += 1
+    return lt, gt
+
+
+def median_of_three(items, i, j, k):
+    """Return whichever of indices i, j and k holds the median of their
+    items."""
+    if items[i] < items[j]:
+        if items[j] < items[k]:
+            return j
+        return k if items[i] < items[k] else i
+    if items[i] < items[k]:
+        return i
+    return k if items[j] < items[k] else j
+
+
+def choose_pivot(items, low, high):
+    """Return the index of a pivot for range `[low...high]` of items: the
+    median of its first, middle and last items, or for ranges of more than
+    NINTHER_CUTOFF items the median of three such medians (Tukey's ninther),
+    which makes sorted, reversed and organ-pipe inputs split evenly."""
+    mid = (low + high) // 2
+    if high - low + 1 > NINTHER_CUTOFF:
+        step = (high - low + 1) // 8
+        return median_of_three(
+            items,
+            median_of_three(items, low, low + step, low + 2*step),
+            median_of_three(items, mid - step, mid, mid + step),
+            median_of_three(items, high - 2*step, high - step, high))
+    return median_of_three(items, low, mid, high)
+
+
+@keyed
 def quick_sort(items, low=None, high=None):
     """Sort given items in place by partitioning items in range `[low...high]`
-    around a pivot item and recursively sorting each remaining sublist range.
-    Best case running time:     O(nlgn) When items is shuffled, it is partitioned
-                                roughly in half each time.
-    Worst case running time:    O(n^2) When items is in each because each
-                                element will get partitioned.
-    Memory usage:               O(1) Shuffling is done in-place. """
-
-    if None in (low, high):
-        #items[:] = list(set(items))
-        shuffle(items) # Make sure that pivots are placed randomly
+    three ways around a median-of-three (or ninther) pivot, sorting the
+    smaller side recursively and the larger side iteratively. Ranges of at
+    most INSERTION_CUTOFF items are sorted with small_sort (a sorting network
+    or binary insertion sort), and ranges that are partitioned unevenly more
+    than 2 lg n times are heap sorted (introsort).
+    Best case running time:     O(n) When all items are equal, since the
+                                first partition leaves nothing to sort.
+    Worst case running time:    O(nlgn) Heap sort takes over before
+                                unbalanced partitions become quadratic.
+    Memory usage:               O(lgn) The call stack only grows on the
+                                smaller side of each partition. """
+    if low is None:
         low = 0
+    if high is None:
         high = len(items) - 1
 
     if high <= low:
         ## Check if list or range is so small it's already sorted (base case)
         return
-    # Partition items in-place around a pivot and get index of pivot
-    pivot = partition(items, low, high)
+    depth_limit = 2 * (high - low + 1).bit_length()
+    _intro_sort(items, low, high, depth_limit)
+
+
+def _intro_sort(items, low, high, depth_limit):
+    """Sort range `[low...high]` of items, switching to heap sort after
+    `depth_limit` more partitions."""
+    while high - low + 1 > INSERTION_CUTOFF:
+        if depth_limit == 0:
+            ## Partitions are too unbalanced, so guarantee O(nlgn)
+            heap_sort(items, low, high)
+            return
+        depth_limit -= 1
+        pivot = items[choose_pivot(items, low, high)]
+        lt, gt = partition3(items, low, high, pivot)
+
+        ## Recurse on the smaller side and loop on the larger side
+        if lt - low < high - gt:
+            _intro_sort(items, low, lt-1, depth_limit)
+            low = gt + 1
+        else:
+            _intro_sort(items, gt+1, high, depth_limit)
+            high = lt - 1
+    small_sort(items, low, high)
+
+
+def nth_element(items, k):
+    """Rearrange given items in place so that the item at index k is the one
+    that would be there if items were sorted, items before it are less than
+    or equal to it, and items after it are greater than or equal to it, by
+    repeatedly partitioning three ways and keeping only the side holding
+    index k. Pivots are chosen like quick_sort's, or with the median of
+    medians after 2 lg n unbalanced partitions (introselect).
+    Best case running time:     O(n) When partitions are balanced, since the
+                                range shrinks geometrically.
+    Worst case running time:    O(n) The median of medians guarantees each
+                                partition discards a constant fraction.
+    Memory usage:               O(1) Partitioning is done in-place."""
+    if not 0 <= k < len(items):
+        raise IndexError('Index {} is out of range for {} items'
+                         .format(k, len(items)))
+    low = 0
+    high = len(items) - 1
+    depth_limit = 2 * len(items).bit_length()
+
+    while high - low + 1 > INSERTION_CUTOFF:
+        if depth_limit == 0:
+            pivot = _median_of_medians(items, low, high)
+        else:
+            depth_limit -= 1
+            pivot = items[choose_pivot(items, low, high)]
+        lt, gt = partition3(items, low, high, pivot)
+
+        ## Keep only the side that holds index k
+        if k < lt:
+            high = lt - 1
+        elif k > gt:
+            low = gt + 1
+        else:
+            return  # Index k holds an item equal to the pivot
+    small_sort(items, low, high)
+
+
+def _median_of_medians(items, low, high):
+    """Return an item of range `[low...high]` of items that is greater than
+    and less than at least 3/10 of the range's items each: the median of the
+    medians of groups of 5 items."""
+    medians = []
+    for start in range(low, high + 1, 5):
+        group = items[start:min(start + 5, high + 1)]
+        network_sort(group)
+        medians.append(group[len(group) // 2])
+    nth_element(medians, len(medians) // 2)
+    return medians[len(medians) // 2]
+
+
+def quickselect(items, k):
+    """Return the item at index k of given items in sorted order (the k+1th
+    smallest item) without modifying items, using nth_element on a copy.
+    Running time: O(n) | Memory usage: O(n) for the copy"""
+    items = list(items)
+    nth_element(items, k)
+    return items[k]
+
+
+def partial_sort(items, k):
+    """Rearrange given items in place so that the first k items are the k
+    smallest items in sorted order, leaving the rest in unspecified order, by
+    selecting the kth smallest with nth_element then quick sorting only the
+    items before it.
+    Running time: O(n + k lg k) | Memory usage: O(lg k)"""
+    if k <= 0:
+        return
+    if k < len(items):
+        nth_element(items, k - 1)
+    quick_sort(items, 0, min(k, len(items)) - 1)
+
+
+def percentile(items, percent, presorted=False):
+    """Return the smallest of given items that is greater than or equal to
+    the given percent (0 to 100) of items (the nearest-rank percentile),
+    without modifying items. If presorted is True, items must already be
+    sorted, so the percentile is read directly instead of selected, which
+    saves copying items when several percentiles of one list are needed.
+    Running time: O(n), or O(1) if presorted | Memory usage: O(n), or O(1)"""
+    if not 0 <= percent <= 100:
+        raise ValueError('Percent must be between 0 and 100, not {!r}'
+                         .format(percent))
+    rank = -(-percent * len(items) // 100)  # Round up
+    if presorted:
+        return items[max(0, rank - 1)]
+    return quickselect(items, max(0, rank - 1))
+
+
+def benchmark_allocations(sizes=(1000, 10000, 100000)):
+    """Print the running time, total allocated bytes and peak allocated bytes
+    of merge_sort and buffered_merge_sort on random ints of the given sizes,
+    as measured by tracemalloc."""
+    import time
+    import tracemalloc
+    print('{:>20} {:>8} {:>10} {:>14} {:>12}'.format(
+        'sort', 'size', 'time', 'allocated', 'peak'))
+    for size in sizes:
+        numbers = [randint(0, size) for _ in range(size)]
+        for sort in [merge_sort, buffered_merge_sort]:
+            items = list(numbers)
+            start_time = time.perf_counter()
+            sort(items)
+            elapsed = time.perf_counter() - start_time
+
+            items = list(numbers)
+            tracemalloc.start()
+            allocated = _allocated_bytes(sort, items)
+            _, peak = tracemalloc.get_traced_memory()
+            tracemalloc.stop()
+            print('{:>20} {:>8} {:>9.3f}s {:>14} {:>12}'.format(
+                sort.__name__, size, elapsed, allocated, peak))
+
+
+def _allocated_bytes(sort, items):
+    """Return the total number of bytes allocated while sorting items, found
+    by summing every increase in memory traced by tracemalloc between function
+    calls and returns. Memory that is allocated and freed again within one
+    call is missed, so this is a lower bound."""
+    import sys
+    import tracemalloc
+    allocated = 0
+    previous = tracemalloc.get_traced_memory()[0]
+    def profile(frame, event, arg):
+        nonlocal allocated, previous
+        current = tracemalloc.get_traced_memory()[0]
+        allocated += max(0, current - previous)
+        previous = current
+    sys.setprofile(profile)
+    try:
+        sort(items)
+    finally:
+        sys.setprofile(None)
+    return allocated
+
+
+def main():
+    """Read command-line arguments and benchmark merge sort allocations."""
+    import sys
+    sizes = [int(arg) for arg in sys.argv[1:]] or [1000, 10000, 100000]
+    benchmark_allocations(sizes)
+
 
-    ## Sort each sublist range by recursively calling quick sort
-    quick_sort(items, low, pivot-1)
-    quick_sort(items, pivot+1, high)
+if __name__ == '__main__':
+    main()
@@ -1,15 +1,36 @@
 #!python
 
+import io
 import unittest
+from collections import namedtuple
 from random import randint
 
-from binaryheap import heap_sort
+from binaryheap import heap_sort, heap_sort_by_key
+
+import sorting
 from sorting import random_ints
-from sorting_iterative import (is_sorted, bubble_sort, selection_sort,
+from sorting_iterative import (is_sorted, bubble_sort, cocktail_shaker_sort,
+                               selection_sort, double_selection_sort,
                                insertion_sort, bottom_up_merge_sort)
+import sorting_iterative
+import validation
 from sorting_recursive import (split_sort_merge, merge_sort, quick_sort, merge,
-                               partition)
-from sorting_integer import counting_sort, bucket_sort
+                               partition, buffered_merge_sort, partition3,
+                               choose_pivot, _intro_sort, nth_element,
+                               quickselect, partial_sort, percentile,
+                               _median_of_medians)
+import sorting_integer
+from sorting_integer import (counting_sort, bucket_sort, radix_sort,
+                             integer_sort, msd_radix_sort, choose_splitters)
+import sorting_external
+from sorting_adaptive import adaptive_merge_sort, few_swaps
+import sorting_kernels
+from sorting_kernels import (NETWORKS, network_sort, binary_insertion_sort,
+                             small_sort, stable_small_sort)
+from sorting_external import kway_merge, external_sort, external_sort_file
+from sorting_parallel import parallel_merge_sort, sample_sort
+import sorting_benchmark
+from sorting_hybrid import smart_sort, probe
 
 
 
@@ -225,6 +246,650 @@ class MergeTest(unittest.TestCase):
         items2 = sorted([randint(0,1000) for _ in range(1000)])
         assert merge(items1, items2) == sorted(items1 + items2)
 
+
+def assert_sorts(sort_function, strings=True, **kwargs):
+    """Assert that the given sort function sorts a variety of integer (and
+    string, if strings is True) lists in place, passing it the given keyword
+    arguments."""
+    cases = [[], [3], [5, 3], [3, 3], [5, 7, 3], [7, 5, 3, 7, 5, 7, 5, 3, 7],
+             random_ints(100, 1, 10), random_ints(1000, -1000, 1000),
+             list(range(500)), list(range(500, 0, -1)), [1000000]*100,
+             list(range(250)) + list(range(250, 0, -1))]
+    if strings:
+        cases += ['one fish two fish red fish blue fish'.split(),
+                  [chr(randint(ord('A'), ord('z'))) for _ in range(1000)]]
+    for items in cases:
+        sorted_items = sorted(items)
+        sort_function(items, **kwargs)
+        assert items == sorted_items
+
+
+def assert_stable(sort_function, size=500, **kwargs):
+    """Assert that the given sort function keeps items with equal values in
+    their input order, sorting a list of the given size with few distinct
+    values in place and passing it the given keyword arguments."""
+    items = [Key(randint(1, 5), tag) for tag in range(size)]
+    result = list(items)
+    sort_function(result, **kwargs)
+    assert [(key.value, key.tag) for key in result] == sorted(
+        (key.value, key.tag) for key in items), sort_function.__name__
+
+
+class InsertionSortRangeTest(unittest.TestCase):
+
+    def test_range(self):
+        items = [9, 8, 7, 6, 5, 4, 3, 2, 1]
+        insertion_sort(items, 2, 5)
+        assert items == [9, 8, 4, 5, 6, 7, 3, 2, 1]
+        insertion_sort(items, 0, 0)
+        assert items == [9, 8, 4, 5, 6, 7, 3, 2, 1]
+        insertion_sort(items, 6)
+        assert items == [9, 8, 4, 5, 6, 7, 1, 2, 3]
+
+
+class QuadraticSortTest(unittest.TestCase):
+
+    sorts = [bubble_sort, cocktail_shaker_sort, selection_sort,
+             double_selection_sort]
+
+    def test_sorts(self):
+        for sort in self.sorts:
+            assert_sorts(sort)
+
+    def test_small_and_patterned_inputs(self):
+        for sort in self.sorts:
+            for size in range(8):
+                for items in [random_ints(size, 1, 3), list(range(size)),
+                              list(range(size, 0, -1))]:
+                    sorted_items = sorted(items)
+                    sort(items)
+                    assert items == sorted_items, (sort.__name__, size)
+            # The max starts where double_selection_sort swaps in the min
+            items = [9, 1, 5, 3, 7]
+            sort(items)
+            assert items == [1, 3, 5, 7, 9], sort.__name__
+
+    def test_stable(self):
+        for sort in [bubble_sort, cocktail_shaker_sort]:
+            assert_stable(sort, 100)
+
+
+class SortingKernelsTest(unittest.TestCase):
+
+    def test_networks_sort_all_zero_one_inputs(self):
+        # A network that sorts every list of 0s and 1s sorts every list
+        for size, network in NETWORKS.items():
+            assert all(i < j < size for i, j in network)
+            for bits in range(2 ** size):
+                items = [(bits >> index) & 1 for index in range(size)]
+                sorted_items = sorted(items)
+                network_sort(items)
+                assert items == sorted_items, (size, bits)
+
+    def test_network_sort_range(self):
+        items = [9, 8, 7, 6, 5, 4, 3, 2, 1]
+        network_sort(items, 2, 5)
+        assert items == [9, 8, 4, 5, 6, 7, 3, 2, 1]
+        with self.assertRaises(ValueError):
+            network_sort(items)
+
+    def test_binary_insertion_sort(self):
+        assert_sorts(binary_insertion_sort)
+        items = [9, 8, 7, 6, 5, 4, 3, 2, 1]
+        binary_insertion_sort(items, 2, 5)
+        assert items == [9, 8, 4, 5, 6, 7, 3, 2, 1]
+
+    def test_binary_insertion_sort_stable(self):
+        assert_stable(binary_insertion_sort, 100)
+
+    def test_stable_small_sort(self):
+        # Sizes on both sides of the cutoff use different kernels
+        cutoff = sorting_kernels.BINARY_INSERTION_CUTOFF
+        for size in [0, 1, 2, cutoff - 1, cutoff, cutoff + 1, 40]:
+            assert_stable(stable_small_sort, size)
+        items = [5, 4, 3, 2, 1]
+        stable_small_sort(items, 1, 3)
+        assert items == [5, 2, 3, 4, 1]
+
+    def test_small_sort(self):
+        for size in range(20):
+            items = random_ints(size, 1, 10)
+            sorted_items = sorted(items)
+            small_sort(items)
+            assert items == sorted_items, size
+        items = [5, 4, 3, 2, 1]
+        small_sort(items, 1, 3)
+        assert items == [5, 2, 3, 4, 1]
+
+
+class BufferedMergeSortTest(unittest.TestCase):
+
+    def test_sorts(self):
+        for cutoff in [1, 2, 16, 1000]:
+            assert_sorts(buffered_merge_sort, cutoff=cutoff)
+
+    def test_stable(self):
+        for cutoff in [1, 16]:
+            assert_stable(buffered_merge_sort, cutoff=cutoff)
+
+
+class BottomUpMergeSortTest(unittest.TestCase):
+
+    def test_sorts(self):
+        assert_sorts(bottom_up_merge_sort)
+
+    def test_sizes_around_block_and_run_widths(self):
+        for size in [0, 1, 15, 16, 17, 31, 32, 33, 63, 64, 65, 100, 1000]:
+            for items in [random_ints(size, 1, size), list(range(size, 0, -1)),
+                          list(range(size))]:
+                sorted_items = sorted(items)
+                bottom_up_merge_sort(items)
+                assert items == sorted_items, size
+
+    def test_merge_clamps_end(self):
+        items = [1, 4, 9, 2, 3]
+        sorting_iterative.merge(items, 0, 8, 3)
+        assert items == [1, 2, 3, 4, 9]
+        items = [5, 1, 3, 2, 4]
+        sorting_iterative.merge(items, 1, 5, 2)
+        assert items == [5, 1, 2, 3, 4]
+
+
+class AdaptiveMergeSortTest(unittest.TestCase):
+
+    def test_sorts(self):
+        assert_sorts(adaptive_merge_sort)
+
+    def test_partially_sorted(self):
+        for size in [10, 100, 1000, 5000]:
+            appended = list(range(size)) + random_ints(size // 10, 0, size)
+            interleaved = [i if i % 2 else size - i for i in range(size)]
+            for items in [few_swaps(size, size // 50), appended, interleaved]:
+                sorted_items = sorted(items)
+                adaptive_merge_sort(items)
+                assert items == sorted_items
+
+    def test_stable(self):
+        for size in [50, 5000]:
+            assert_stable(adaptive_merge_sort, size)
+
+
+# A record sorted by score in key tests. Names are unique, so comparing
+# results also checks that records with equal scores keep their input order
+Record = namedtuple('Record', 'name score')
+
+
+class KeyReverseTest(unittest.TestCase):
+
+    comparison_sorts = [bubble_sort, cocktail_shaker_sort, selection_sort,
+                        double_selection_sort, insertion_sort,
+                        split_sort_merge, merge_sort, buffered_merge_sort,
+                        quick_sort, heap_sort, adaptive_merge_sort,
+                        bottom_up_merge_sort, binary_insertion_sort]
+    integer_sorts = [counting_sort, bucket_sort]
+
+    def assert_sorts_by_key(self, sort_function, items, key):
+        for reverse in [False, True]:
+            sorted_items = sorted(items, key=key, reverse=reverse)
+            result = list(items)
+            sort_function(result, key=key, reverse=reverse)
+            assert result == sorted_items, (sort_function.__name__, reverse)
+
+    def test_comparison_sorts(self):
+        records = [Record(str(index), randint(1, 20)) for index in range(200)]
+        words = 'one fish two fish red fish blue fish'.split()
+        for sort_function in self.comparison_sorts:
+            self.assert_sorts_by_key(sort_function, records,
+                                     lambda record: record.score)
+            self.assert_sorts_by_key(sort_function, words, len)
+            self.assert_sorts_by_key(sort_function, words, None)
+            self.assert_sorts_by_key(sort_function, [], len)
+
+    def test_integer_sorts(self):
+        pairs = [(randint(1, 50), index) for index in range(200)]
+        for sort_function in self.integer_sorts:
+            self.assert_sorts_by_key(sort_function, pairs, lambda pair: pair[0])
+            self.assert_sorts_by_key(sort_function, random_ints(100, 1, 50),
+                                     None)
+        self.assert_sorts_by_key(counting_sort, random_ints(100, -50, 50),
+                                 lambda number: -number)
+
+    def test_range_with_reverse(self):
+        items = [9, 8, 7, 6, 5, 4, 3, 2, 1]
+        quick_sort(items, 2, 5, reverse=True, key=lambda number: number % 4)
+        assert items == [9, 8, 7, 6, 5, 4, 3, 2, 1]
+        insertion_sort(items, 2, 5, key=lambda number: -number)
+        assert items == [9, 8, 7, 6, 5, 4, 3, 2, 1]
+        heap_sort(items, 2, 5)
+        assert items == [9, 8, 4, 5, 6, 7, 3, 2, 1]
+        heap_sort(items, 2, 5, reverse=True)
+        assert items == [9, 8, 7, 6, 5, 4, 3, 2, 1]
+
+
+class Key(object):
+    """A sortable value with a tag that is ignored by comparisons, used to
+    check that sorts keep items with equal values in their input order."""
+
+    def __init__(self, value, tag):
+        self.value = value
+        self.tag = tag
+
+    def __eq__(self, other):
+        return self.value == other.value
+
+    def __lt__(self, other):
+        return self.value < other.value
+
+    def __gt__(self, other):
+        return self.value > other.value
+
+    def __le__(self, other):
+        return self.value <= other.value
+
+    def __ge__(self, other):
+        return self.value >= other.value
+
+
+class IntroSortTest(unittest.TestCase):
+
+    def test_sorts(self):
+        assert_sorts(quick_sort)
+
+    def test_range(self):
+        items = [9, 8, 7, 6, 5, 4, 3, 2, 1] * 5
+        sorted_range = sorted(items[3:41])
+        quick_sort(items, 3, 40)
+        assert items[:3] == [9, 8, 7]
+        assert items[3:41] == sorted_range
+        assert items[41:] == [4, 3, 2, 1]
+
+    def test_adversarial_inputs(self):
+        size = 5000
+        organ_pipe = list(range(size // 2)) + list(range(size // 2, 0, -1))
+        sawtooth = [i % 100 for i in range(size)]
+        few_unique = random_ints(size, 1, 3)
+        for items in [organ_pipe, sawtooth, few_unique, [7] * size]:
+            sorted_items = sorted(items)
+            quick_sort(items)
+            assert items == sorted_items
+
+    def test_heap_sort_fallback(self):
+        items = random_ints(1000, 1, 100)
+        sorted_items = sorted(items)
+        _intro_sort(items, 0, len(items) - 1, 0)
+        assert items == sorted_items
+
+    def test_partition3(self):
+        items = [5, 1, 9, 5, 3, 5, 7, 2]
+        lt, gt = partition3(items, 0, 7, 5)
+        assert (lt, gt) == (3, 5)
+        assert sorted(items[:lt]) == [1, 2, 3]
+        assert items[lt:gt+1] == [5, 5, 5]
+        assert sorted(items[gt+1:]) == [7, 9]
+        assert partition3([4, 4, 4], 0, 2, 4) == (0, 2)
+
+    def test_choose_pivot(self):
+        assert choose_pivot([1, 2, 3], 0, 2) == 1
+        assert choose_pivot([3, 1, 2], 0, 2) == 2
+        items = list(range(100))
+        assert 40 <= items[choose_pivot(items, 0, 99)] <= 60
+
+
+class SelectionTest(unittest.TestCase):
+
+    def test_nth_element(self):
+        for size in [1, 2, 17, 100, 2000]:
+            for items in [random_ints(size, 1, size), list(range(size)),
+                          list(range(size, 0, -1)), [7] * size]:
+                sorted_items = sorted(items)
+                for k in set([0, size // 2, size - 1]):
+                    nth_element(items, k)
+                    assert items[k] == sorted_items[k]
+                    assert max(items[:k], default=items[k]) <= items[k]
+                    assert min(items[k+1:], default=items[k]) >= items[k]
+        with self.assertRaises(IndexError):
+            nth_element([1, 2, 3], 3)
+        with self.assertRaises(IndexError):
+            nth_element([], 0)
+
+    def test_median_of_medians(self):
+        items = list(range(100))
+        median = _median_of_medians(items, 0, 99)
+        assert 30 <= median <= 70
+        assert items == list(range(100))  # Items aren't modified
+
+    def test_quickselect(self):
+        items = random_ints(500, -100, 100)
+        copy = list(items)
+        assert quickselect(items, 0) == min(items)
+        assert quickselect(items, 499) == max(items)
+        assert quickselect(items, 250) == sorted(items)[250]
+        assert items == copy  # Items aren't modified
+
+    def test_partial_sort(self):
+        items = random_ints(1000, 1, 100)
+        sorted_items = sorted(items)
+        for k in [0, 1, 10, 999, 1000, 2000]:
+            result = list(items)
+            partial_sort(result, k)
+            assert result[:k] == sorted_items[:k]
+            assert sorted(result) == sorted_items
+
+    def test_percentile(self):
+        items = list(range(100, 0, -1))
+        assert percentile(items, 0) == 1
+        assert percentile(items, 50) == 50
+        assert percentile(items, 99) == 99
+        assert percentile(items, 100) == 100
+        assert percentile([5], 90) == 5
+        with self.assertRaises(ValueError):
+            percentile(items, 101)
+        items.reverse()
+        for percent in [0, 1, 50, 99, 100]:
+            assert percentile(items, percent, presorted=True) == percentile(
+                items, percent)
+
+
+class HeapSortTest(unittest.TestCase):
+
+    def test_sorts(self):
+        assert_sorts(heap_sort, bottom_up=True)
+        assert_sorts(heap_sort, bottom_up=False)
+
+    def test_by_key(self):
+        records = [Record(str(index), randint(1, 50)) for index in range(500)]
+        scores = sorted(record.score for record in records)
+        heap_sort_by_key(records, lambda record: record.score)
+        assert [record.score for record in records] == scores
+        words = 'one fish two fish red fish blue fish'.split()
+        heap_sort_by_key(words, len, 2, 5)
+        assert sorted(words[2:6], key=len) == words[2:6]
+        assert words[:2] + words[6:] == ['one', 'fish', 'blue', 'fish']
+        empty = []
+        heap_sort_by_key(empty, len)
+        assert empty == []
+
+    def test_range(self):
+        items = [9, 8, 7, 6, 5, 4, 3, 2, 1]
+        heap_sort(items, 2, 5)
+        assert items == [9, 8, 4, 5, 6, 7, 3, 2, 1]
+        heap_sort(items, 6)
+        assert items == [9, 8, 4, 5, 6, 7, 1, 2, 3]
+
+
+class IntegerSortEngineTest(unittest.TestCase):
+
+    def assert_integer_sorts(self):
+        wide = random_ints(1000, -2**40, 2**40)
+        huge = [2**80, -2**70, 5, 5, 0, -1]  # Too wide for 64-bit arrays
+        for sort_function in [counting_sort, radix_sort, integer_sort]:
+            cases = [[], [3], [5, 3], random_ints(2000, -500, 500),
+                     random_ints(100, 1, 3), [1000000]*10]
+            if sort_function is not counting_sort:
+                cases += [wide, huge]
+            for items in cases:
+                sorted_items = sorted(items)
+                sort_function(items)
+                assert items == sorted_items, sort_function.__name__
+
+    def test_sorts(self):
+        self.assert_integer_sorts()
+
+    def test_sorts_without_numpy(self):
+        numpy = sorting_integer.numpy
+        sorting_integer.numpy = None
+        try:
+            self.assert_integer_sorts()
+        finally:
+            sorting_integer.numpy = numpy
+
+    @unittest.skipUnless(sorting_integer.numpy, 'NumPy is not installed')
+    def test_sorts_with_numpy(self):
+        threshold = sorting_integer.NUMPY_THRESHOLD
+        sorting_integer.NUMPY_THRESHOLD = 1
+        try:
+            self.assert_integer_sorts()
+        finally:
+            sorting_integer.NUMPY_THRESHOLD = threshold
+
+    @unittest.skipUnless(sorting_integer.numpy, 'NumPy is not installed')
+    def test_radix_sort_with_numpy(self):
+        # Wide values take several byte passes through NumPy's stable argsort
+        items = random_ints(sorting_integer.NUMPY_THRESHOLD * 5, -2**40, 2**40)
+        sorted_items = sorted(items)
+        radix_sort(items)
+        assert items == sorted_items
+
+    def test_typed_arrays(self):
+        from array import array
+        for sort_function in [counting_sort, radix_sort, integer_sort]:
+            items = array('q', random_ints(2000, -1000, 1000))
+            sorted_items = sorted(items)
+            sort_function(items)
+            assert isinstance(items, array)
+            assert list(items) == sorted_items
+
+
+class BucketSortTest(unittest.TestCase):
+
+    def test_sorts(self):
+        assert_sorts(bucket_sort, strings=False)
+
+    def test_distributions(self):
+        import math
+        import random
+        size = 2000
+        cases = [[random.random() for _ in range(size)],  # Floats in [0, 1)
+                 random_ints(size, -10**9, 10**9),  # Wide range, negative
+                 [math.exp(random.random() * 50) for _ in range(size)],
+                 [random.paretovariate(0.5) for _ in range(size)],  # Skewed
+                 [1] * size + [10**12],  # One outlier
+                 [1.5, 2, -3, 2**70, 0.1] * 20,  # Mixed ints and floats
+                 [2**200, 1, 2**199] * 10]
+        for items in cases:
+            for num_buckets in [None, 2, 10]:
+                result = list(items)
+                bucket_sort(result, num_buckets)
+                assert result == sorted(items)
+
+    def test_extreme_floats(self):
+        # Ranges that overflow floats can't be split evenly
+        inf = float('inf')
+        cases = [[inf, 1.0, -inf, 0.5] * 50, [inf, 2.0, 1.0] * 50,
+                 [1e308, -1e308, 0.0, 1.5] * 50,
+                 [1e308, 1e307, 5e307, 0.0] * 50,
+                 random_ints(200, -10, 10) + [-inf, inf, 1e308, -1e308]]
+        for items in cases:
+            for num_buckets in [None, 2, 10]:
+                result = list(items)
+                bucket_sort(result, num_buckets)
+                assert result == sorted(items)
+
+    def test_choose_splitters(self):
+        values = list(range(1000))
+        splitters = choose_splitters(values, 4)
+        assert len(splitters) == 3
+        assert splitters == sorted(splitters)
+        assert choose_splitters([5] * 1000, 4) == [5]
+        assert choose_splitters([], 4) == []
+        assert len(choose_splitters(values, 1000, sample_size=100)) == 24
+
+
+class MsdRadixSortTest(unittest.TestCase):
+
+    def test_small_lists(self):
+        for items in [[], ['A'], ['B', 'A'], ['A', 'A'], ['B', 'C', 'A'],
+                      'one fish two fish red fish blue fish'.split()]:
+            sorted_items = sorted(items)
+            msd_radix_sort(items, cutoff=1)
+            assert items == sorted_items
+
+    def test_strings(self):
+        words = [''.join(chr(randint(ord('a'), ord('e')))
+                         for _ in range(randint(0, 8))) for _ in range(2000)]
+        unicode = ['\u00e9t\u00e9', 'ete', '\u65e5\u672c', 'Zebra', 'apple',
+                   'app', '']
+        long_strings = ['a' * 5000 + 'b', 'a' * 5000, 'a' * 4999 + 'c']
+        for items in [words, unicode, long_strings]:
+            sorted_items = sorted(items)
+            msd_radix_sort(items, cutoff=2)
+            assert items == sorted_items
+
+    def test_bytes(self):
+        items = [bytes(randint(0, 255) for _ in range(randint(0, 5)))
+                 for _ in range(500)]
+        sorted_items = sorted(items)
+        msd_radix_sort(items)
+        assert items == sorted_items
+
+
+class KwayMergeTest(unittest.TestCase):
+
+    def test_edges(self):
+        assert list(kway_merge()) == []
+        assert list(kway_merge([])) == []
+        assert list(kway_merge([], [], [])) == []
+        items = list(range(100))
+        assert list(kway_merge(items)) == items
+        assert list(kway_merge([], items, [])) == items
+
+    def test_normal(self):
+        runs = [sorted(random_ints(randint(0, 50), 1, 100)) for _ in range(10)]
+        assert list(kway_merge(*runs)) == sorted(sum(runs, []))
+
+    def test_generators(self):
+        evens = (i for i in range(0, 1000, 2))
+        odds = (i for i in range(1, 1000, 2))
+        merged = kway_merge(evens, odds)
+        assert next(merged) == 0  # Merged lazily
+        assert list(merged) == list(range(1, 1000))
+
+    def test_key_and_stability(self):
+        runs = [[(1, 'a'), (3, 'a')], [(1, 'b'), (2, 'b')], [(1, 'c')]]
+        merged = list(kway_merge(*runs, key=lambda pair: pair[0]))
+        assert merged == [(1, 'a'), (1, 'b'), (1, 'c'), (2, 'b'), (3, 'a')]
+        words = [['bb', 'dddd'], ['a', 'ccc']]
+        assert list(kway_merge(*words, key=len)) == ['a', 'bb', 'ccc', 'dddd']
+
+    def test_reverse(self):
+        runs = [[(3, 'a'), (1, 'a')], [(2, 'b'), (1, 'b')], [(3, 'c')]]
+        merged = list(kway_merge(*runs, key=lambda pair: pair[0],
+                                 reverse=True))
+        assert merged == [(3, 'a'), (3, 'c'), (2, 'b'), (1, 'a'), (1, 'b')]
+        words = [['pear', 'fig'], ['kiwi', 'apple']]
+        assert list(kway_merge(*words, reverse=True)) == \
+            ['pear', 'kiwi', 'fig', 'apple']
+
+
+class ExternalSortTest(unittest.TestCase):
+
+    def setUp(self):
+        # Use tiny blocks so runs span several blocks
+        self.block_size = sorting_external.BLOCK_SIZE
+        sorting_external.BLOCK_SIZE = 7
+
+    def tearDown(self):
+        sorting_external.BLOCK_SIZE = self.block_size
+
+    def test_fits_in_memory(self):
+        items = random_ints(100, 1, 50)
+        assert list(external_sort(items)) == sorted(items)
+        assert list(external_sort([])) == []
+
+    def test_spills_runs(self):
+        # A budget of a few hundred bytes forces many runs and merge passes
+        items = random_ints(1000, 1, 500)
+        for fan_in in [2, 3, 16]:
+            result = external_sort(iter(items), memory_budget=300,
+                                   fan_in=fan_in)
+            assert list(result) == sorted(items)
+        with self.assertRaises(ValueError):
+            list(external_sort(items, fan_in=1))
+
+    def test_key_and_stability(self):
+        items = [(randint(1, 10), index) for index in range(500)]
+        result = external_sort(items, key=lambda pair: -pair[0],
+                               memory_budget=500, fan_in=4)
+        assert list(result) == sorted(items, key=lambda pair: -pair[0])
+
+    def test_reverse(self):
+        items = [(randint(1, 10), index) for index in range(500)]
+        for budget in [500, 10**6]:
+            result = external_sort(items, key=lambda pair: pair[0],
+                                   memory_budget=budget, fan_in=4,
+                                   reverse=True)
+            assert list(result) == sorted(items, key=lambda pair: pair[0],
+                                          reverse=True)
+        words = [str(randint(0, 10**6)) for _ in range(1000)]
+        result = external_sort(words, memory_budget=1000, reverse=True)
+        assert list(result) == sorted(words, reverse=True)
+
+    def test_sort_file(self):
+        import os
+        import tempfile
+        words = 'one fish two fish red fish blue fish'.split() * 50
+        with tempfile.TemporaryDirectory() as directory:
+            input_filename = os.path.join(directory, 'input.txt')
+            output_filename = os.path.join(directory, 'output.txt')
+            with open(input_filename, 'w') as file:
+                file.write('\n'.join(words))  # No trailing newline
+            external_sort_file(input_filename, output_filename,
+                               memory_budget=1000, fan_in=3, tmpdir=directory)
+            with open(output_filename) as file:
+                assert file.read().split('\n') == sorted(words) + ['']
+
+
+class ParallelSortTest(unittest.TestCase):
+
+    def test_small_lists_sort_in_process(self):
+        items = random_ints(100, 1, 50)
+        sorted_items = sorted(items)
+        parallel_merge_sort(items, workers=4)
+        assert items == sorted_items
+
+    def test_shared_memory_numbers(self):
+        ints = random_ints(1000, -2**62, 2**62)
+        floats = [randint(-1000, 1000) / 7 for _ in range(1000)]
+        for items in [ints, floats]:
+            sorted_items = sorted(items)
+            parallel_merge_sort(items, workers=3, min_chunk_size=10)
+            assert items == sorted_items
+
+    def test_pickled_items(self):
+        words = [str(number) for number in random_ints(1000, 1, 10000)]
+        mixed = [2**70, 1, 2.5] * 100  # Don't fit in one typed buffer
+        for items in [words, mixed]:
+            sorted_items = sorted(items)
+            parallel_merge_sort(items, workers=3, min_chunk_size=10)
+            assert items == sorted_items
+
+
+class SampleSortTest(unittest.TestCase):
+
+    def test_small_lists_sort_in_process(self):
+        items = random_ints(100, 1, 50)
+        sorted_items = sorted(items)
+        stats = sample_sort(items, workers=4)
+        assert items == sorted_items
+        assert stats.bucket_sizes == [100]
+        assert stats.skew == 1.0
+
+    def test_sorts_in_workers(self):
+        words = [str(number) for number in random_ints(1000, 1, 10000)]
+        for items in [random_ints(1000, 1, 10000), words, [5] * 1000]:
+            sorted_items = sorted(items)
+            stats = sample_sort(items, workers=3, min_chunk_size=10)
+            assert items == sorted_items
+            assert sum(stats.bucket_sizes) == len(items)
+            assert 1.0 <= stats.skew <= len(stats.bucket_sizes)
+
+    def test_key(self):
+        items = [(randint(1, 10), index) for index in range(1000)]
+        sample_sort(items, workers=2, min_chunk_size=10,
+                    key=lambda pair: -pair[0])
+        assert items == sorted(items, key=lambda pair: -pair[0])
+
+
 class PartitionTest(unittest.TestCase):
 
     def test_edges(self):
@@ -242,6 +907,316 @@ class PartitionTest(unittest.TestCase):
         assert partition([15, 16, 17, 18, 19, 20], 0, 5) == 0
         assert partition([20, 19, 18, 17, 16, 15], 0, 5) == 5
 
+    def test_partitions_range_around_first_item(self):
+        for _ in range(200):
+            items = random_ints(randint(1, 40), 1, 10)
+            low = randint(0, len(items) - 1)
+            high = randint(low, len(items) - 1)
+            original = list(items)
+            p = partition(items, low, high)
+            assert low <= p <= high
+            assert items[p] == original[low]
+            assert all(item <= items[p] for item in items[low:p])
+            assert all(item > items[p] for item in items[p+1:high+1])
+            # Only the range is rearranged
+            assert sorted(items[low:high+1]) == sorted(original[low:high+1])
+            assert items[:low] == original[:low]
+            assert items[high+1:] == original[high+1:]
+
+
+class BenchmarkSuiteTest(unittest.TestCase):
+
+    def test_generators_are_reproducible(self):
+        for distribution in sorting_benchmark.DISTRIBUTIONS:
+            items = sorting_benchmark.generate(distribution, 100, seed=1)
+            assert len(items) == 100
+            assert items == sorting_benchmark.generate(distribution, 100, 1)
+        assert (sorting_benchmark.generate('random', 100, seed=1) !=
+                sorting_benchmark.generate('random', 100, seed=2))
+
+    def test_run_suite(self):
+        results = sorting_benchmark.run_suite(
+            sizes=[50], distributions=['random', 'strings'],
+            sort_names=['quick_sort', 'counting_sort', 'msd_radix_sort'],
+            repeat=3)
+        runs = [(result['sort'], result['distribution']) for result in results]
+        assert runs == [
+            ('quick_sort', 'random'), ('counting_sort', 'random'),
+            ('quick_sort', 'strings'), ('msd_radix_sort', 'strings')]
+        for result in results:
+            assert result['correct'] is True
+            assert result['error'] is None
+            assert 0 <= result['min'] <= result['median']
+            assert result['iqr'] >= 0
+            assert result['peak_memory'] >= 0
+
+    def test_skips_quadratic_sorts_on_large_inputs(self):
+        results = sorting_benchmark.run_suite(
+            sizes=[200], distributions=['sorted'],
+            sort_names=['bubble_sort', 'merge_sort'], repeat=1,
+            max_quadratic_size=100, measure_memory=False)
+        assert [result['sort'] for result in results] == ['merge_sort']
+
+
+class SmartSortTest(unittest.TestCase):
+
+    def assert_smart_sorts(self, items, algorithm):
+        sorted_items = sorted(items)
+        assert smart_sort(items) == algorithm
+        assert items == sorted_items
+
+    def test_chooses_algorithm(self):
+        words = [str(randint(0, 10**9)) for _ in range(1000)]
+        self.assert_smart_sorts([], 'insertion_sort')
+        self.assert_smart_sorts(random_ints(10, 1, 100), 'insertion_sort')
+        self.assert_smart_sorts(list(range(1000)), 'adaptive_merge_sort')
+        self.assert_smart_sorts(list(range(1000, 0, -1)),
+                                'adaptive_merge_sort')
+        self.assert_smart_sorts(random_ints(1000, -50, 50), 'counting_sort')
+        self.assert_smart_sorts(random_ints(1000, 0, 2**40), 'radix_sort')
+        self.assert_smart_sorts(random_ints(100, 0, 2**40), 'quick_sort')
+        self.assert_smart_sorts(words, 'msd_radix_sort')
+        self.assert_smart_sorts(['a', 'b', 'c'] * 100, 'quick_sort')
+        self.assert_smart_sorts([randint(0, 100) / 7 for _ in range(1000)],
+                                'quick_sort')
+
+    def test_probe(self):
+        profile = probe([3, 1, 2, 5, 4, 4])
+        assert profile.size == 6
+        assert profile.kind == 'int'
+        assert (profile.min, profile.max) == (1, 5)
+        assert profile.distinct_ratio == 5 / 6
+        assert probe(list(range(100))).runs == 1
+        assert probe(list(range(100, 0, -1))).runs == 1
+        assert probe([1, 2, 1]).runs == 2
+        assert probe([1, 3, 2, 4, 3, 5]).runs == 3
+        assert probe([1, 2.5, 3]).kind == 'other'
+        assert probe([(1, 2), (0, 1)]).kind == 'other'
+
+    def test_probe_counts_runs_like_adaptive_merge_sort(self):
+        from sorting_adaptive import _count_run
+
+        def count_runs(items):
+            items = list(items)
+            low = runs = 0
+            while low < len(items):
+                low = _count_run(items, low, len(items))
+                runs += 1
+            return runs
+
+        # Repeated organ pipes: ascending, then descending, 32 items each
+        pipes = (list(range(32)) + list(range(32, 0, -1))) * 64
+        for items in [pipes, random_ints(1000, 1, 5), random_ints(1000),
+                      [5, 5, 4, 4, 3, 3], sorting_benchmark.generate(
+                          'sawtooth', 1000)]:
+            assert probe(items).runs == count_runs(items)
+        # Organ pipes have few long runs, so they are merged
+        assert probe(pipes).runs * 32 <= len(pipes)
+        self.assert_smart_sorts(pipes, 'adaptive_merge_sort')
+
+    def test_key_and_reverse_are_stable(self):
+        items = [(randint(1, 10), index) for index in range(1000)]
+        for reverse in [False, True]:
+            sorted_items = sorted(items, key=lambda pair: pair[0],
+                                  reverse=reverse)
+            result = list(items)
+            assert smart_sort(result, key=lambda pair: pair[0],
+                              reverse=reverse) == 'counting_sort'
+            assert result == sorted_items
+        # MSD radix sort takes no key, so strings fall back to quick sort
+        words = [str(randint(0, 10**9)) for _ in range(1000)]
+        result = list(words)
+        assert smart_sort(result, key=str.lower, reverse=True) == 'quick_sort'
+        assert result == sorted(words, key=str.lower, reverse=True)
+
+    def test_logs_decision(self):
+        with self.assertLogs('sorting_hybrid', level='DEBUG') as logs:
+            smart_sort(list(range(1000)))
+        assert 'adaptive_merge_sort' in logs.output[0]
+
+
+class RegistryTest(unittest.TestCase):
+
+    def test_registered_sorts_sort(self):
+        for info in sorting.REGISTRY.values():
+            if info.supports('any'):
+                assert_sorts(info.function)
+            elif info.supports('int'):
+                assert_sorts(info.function, strings=False)
+
+    def test_get_sort(self):
+        info = sorting.get_sort('merge_sort')
+        assert info.function is merge_sort
+        assert info.supports('str') and not info.quadratic
+        assert sorting.get_sort('bubble_sort').quadratic
+        with self.assertRaises(ValueError):
+            sorting.get_sort('globals')
+
+    def test_sorts_filters(self):
+        names = [info.name for info in sorting.sorts('str')]
+        assert 'msd_radix_sort' in names and 'quick_sort' in names
+        assert 'counting_sort' not in names
+        for info in sorting.sorts(stable=True):
+            assert info.stable
+
+    def test_stable_sorts_are_stable(self):
+        for info in sorting.sorts('any', stable=True):
+            assert_stable(info.function, 200)
+
+
+class SortFileTest(unittest.TestCase):
+
+    def sort_lines(self, text, *args, **kwargs):
+        output = io.StringIO()
+        sorting.sort_file(io.StringIO(text), output, *args, **kwargs)
+        return output.getvalue()
+
+    def test_strings(self):
+        assert self.sort_lines('pear\napple\n\nfig\n') == \
+            '\napple\nfig\npear\n'
+        assert self.sort_lines('b\na\nc', 'quick_sort', reverse=True) == \
+            'c\nb\na\n'
+
+    def test_numbers(self):
+        text = '10\n-2\n\n3\n3\n'
+        assert self.sort_lines(text, 'counting_sort', 'int') == \
+            '-2\n3\n3\n10\n'
+        assert self.sort_lines('2.5\n-1\n1e3\n', 'smart_sort', 'float',
+                               reverse=True) == '1000.0\n2.5\n-1.0\n'
+        with self.assertRaises(ValueError):
+            self.sort_lines('1\nx\n', 'merge_sort', 'int')
+        with self.assertRaises(ValueError):
+            self.sort_lines('1\n2\n', 'msd_radix_sort', 'int')
+
+    def test_external(self):
+        words = [str(randint(0, 10**6)) for _ in range(1000)]
+        text = '\n'.join(words) + '\n'
+        output = self.sort_lines(text, external=True, memory_budget=1000)
+        assert output.splitlines() == sorted(words)
+        numbers = self.sort_lines(text, kind='int', reverse=True,
+                                  external=True, memory_budget=1000)
+        assert [int(line) for line in numbers.splitlines()] == sorted(
+            map(int, words), reverse=True)
+        strings = self.sort_lines(text, reverse=True, external=True,
+                                  memory_budget=1000)
+        assert strings.splitlines() == sorted(words, reverse=True)
+        with self.assertRaises(ValueError):
+            self.sort_lines(text, 'quick_sort', external=True)
+
+    def test_main_large_reversed_strings(self):
+        import contextlib
+        import os
+        import sys
+        import tempfile
+        from unittest import mock
+        words = [str(randint(0, 10**6)) for _ in range(1000)]
+        with tempfile.TemporaryDirectory() as directory:
+            input_filename = os.path.join(directory, 'input.txt')
+            output_filename = os.path.join(directory, 'output.txt')
+            with open(input_filename, 'w') as file:
+                file.write('\n'.join(words) + '\n')
+            # The file is larger than a 0.001 MB budget, so main sorts it
+            # externally and warns that the sort named is not used
+            argv = ['sorting.py', 'quick_sort', '-r', '--memory', '0.001',
+                    '-i', input_filename, '-o', output_filename]
+            errors = io.StringIO()
+            with mock.patch.object(sys, 'argv', argv), \
+                    contextlib.redirect_stderr(errors):
+                sorting.main()
+            with open(output_filename) as file:
+                assert file.read().splitlines() == sorted(words, reverse=True)
+        assert 'external merge sort instead of quick_sort' in \
+            errors.getvalue()
+
+
+class StabilityTest(unittest.TestCase):
+
+    def test_merges_take_from_left_on_ties(self):
+        left = [Key(1, 'a'), Key(2, 'a'), Key(2, 'b')]
+        right = [Key(1, 'c'), Key(2, 'c'), Key(3, 'c')]
+        merged = merge(left, right)
+        assert [key.tag for key in merged] == ['a', 'c', 'a', 'b', 'c', 'c']
+        items = left + right
+        sorting_iterative.merge(items, 0, 6, 3)
+        assert [key.tag for key in items] == ['a', 'c', 'a', 'b', 'c', 'c']
+
+    def test_parallel_and_external_sorts_are_stable(self):
+        # Tagged items are compared directly (no key), and sorted in worker
+        # processes or spilled to runs, so ties depend on merge_sort's merges
+        from sorting_benchmark import TaggedItem
+        data = random_ints(600, 1, 5)
+        expected = sorted((value, tag) for tag, value in enumerate(data))
+
+        def tagged():
+            return [TaggedItem(value, tag) for tag, value in enumerate(data)]
+
+        items = tagged()
+        parallel_merge_sort(items, workers=3, min_chunk_size=10)
+        assert [(item.key, item.tag) for item in items] == expected
+        items = tagged()
+        sample_sort(items, workers=3, min_chunk_size=10)
+        assert [(item.key, item.tag) for item in items] == expected
+        result = external_sort(tagged(), memory_budget=2000, fan_in=3)
+        assert [(item.key, item.tag) for item in result] == expected
+
+    def test_stable_option(self):
+        for sort_function in [selection_sort, quick_sort, heap_sort,
+                              smart_sort]:
+            assert_stable(sort_function, 300, stable=True)
+
+    def test_check_stability(self):
+        data = random_ints(300, 1, 5)
+        for info in sorting.REGISTRY.values():
+            stable = sorting_benchmark.check_stability(info, data)
+            if info.stable:
+                assert stable is not False, info.name
+        selection = sorting.get_sort('selection_sort')
+        assert sorting_benchmark.check_stability(selection, data) is False
+        radix = sorting.get_sort('radix_sort')
+        assert sorting_benchmark.check_stability(radix, data) is None
+
+    def test_verify_stability_mode(self):
+        results = sorting_benchmark.run_suite(
+            sizes=[100], distributions=['few_unique'],
+            sort_names=['merge_sort', 'heap_sort'], repeat=1,
+            measure_memory=False, verify_stability=True)
+        stable = {result['sort']: result['stable'] for result in results}
+        assert stable == {'merge_sort': True, 'heap_sort': False}
+
+
+class ValidationTest(unittest.TestCase):
+
+    def setUp(self):
+        self.enabled = validation.ENABLED
+
+    def tearDown(self):
+        validation.enable(self.enabled)
+
+    def test_check_sorted(self):
+        validation.check_sorted([])
+        validation.check_sorted([1, 2, 2, 3])
+        validation.check_sorted([5, 1, 2, 3, 0], 1, 4)
+        with self.assertRaises(AssertionError):
+            validation.check_sorted([1, 3, 2])
+        with self.assertRaises(AssertionError):
+            validation.check_sorted([5, 1, 3, 2, 0], 1, 4)
+
+    def test_merges_check_only_when_enabled(self):
+        validation.disable()
+        assert sorted(merge([3, 1], [2])) == [1, 2, 3]
+        items = [3, 1, 2, 0]
+        sorting_iterative.merge(items, 0, 4, 2)
+        assert sorted(items) == [0, 1, 2, 3]
+
+        validation.enable()
+        with self.assertRaises(AssertionError):
+            merge([3, 1], [2])
+        with self.assertRaises(AssertionError):
+            sorting_iterative.merge([3, 1, 2, 0], 0, 4, 2)
+        items = random_ints(100, 1, 50)
+        merge_sort(items)
+        assert is_sorted(items)
+
 
 def get_sort_function():
     """Read command-line argument and return sort function with that name."""
@@ -254,20 +1229,17 @@ def get_sort_function():
         print('Example: {} bubble_sort'.format(script))
         return
 
-    # Get sort function by name
+    # Get sort function by name from the registry
     if len(args) >= 1:
         sort_name = args[0]
-        # Terrible hack abusing globals
-        if sort_name in globals():
-            sort_function = globals()[sort_name]
-            return sort_function
+        if sort_name in sorting.REGISTRY:
+            return sorting.get_sort(sort_name).function
         else:
             # Don't explode, just warn user and show list of sorting functions
             print('Sorting function {!r} does not exist'.format(sort_name))
             print('Available sorting functions:')
-            for name in globals():
-                if 'sort' in name:
-                    print('    {}'.format(name))
+            for name in sorting.REGISTRY:
+                print('    {}'.format(name))
             return
 
 
@@ -0,0 +1,104 @@
+#!python
+
+from operator import itemgetter
+
+from binaryheap import BinaryMinHeap
+
+
+class TopK(object):
+    """TopK: a bounded selector that consumes a stream of items and keeps only
+    the k items with the largest keys seen so far. Items are stored in a binary
+    min heap of size at most k whose root is the weakest item kept, so each new
+    item is either rejected with a single comparison or swapped in with
+    replace_min. Consuming n items takes O(n lg k) time and O(k) memory.
+    Ties between equal keys are broken in favor of the item seen first."""
+
+    def __init__(self, k, key=None, items=None):
+        """Initialize this selector to keep the k largest items according to
+        the given key function (or the items themselves if key is None), and
+        consume the given items, if any."""
+        if k < 0:
+            raise ValueError('k must be non-negative, not {!r}'.format(k))
+        self.k = k
+        self.key = key
+        # Heap entries are (key, -count, item) triples: the count makes the
+        # latest of several equal keys the weakest and avoids comparing items
+        self.heap = BinaryMinHeap()
+        self.count = 0
+        if items is not None:
+            self.extend(items)
+
+    def __repr__(self):
+        """Return a string representation of this selector."""
+        return 'TopK(k={}, {} items)'.format(self.k, self.size())
+
+    def size(self):
+        """Return the number of items currently kept by this selector."""
+        return self.heap.size()
+
+    def push(self, item):
+        """Consume the given item, keeping it if it is among the k largest.
+        Best case running time: O(1) if item is smaller than the kth largest
+        Worst case running time: O(lg k) if item replaces the kth largest"""
+        key = item if self.key is None else self.key(item)
+        self._push_entry(key, item)
+
+    def extend(self, items):
+        """Consume every item in the given iterable, which may be unbounded
+        (such as a file or generator) since items are never materialized."""
+        for item in items:
+            self.push(item)
+
+    def merge(self, other):
+        """Consume the items kept by the given selector (such as a partial
+        result from another worker) so this one keeps the overall top k.
+        The other's items are pushed in the order it saw them, not in heap
+        order, so ties rank as if this selector had seen the other's stream
+        after its own.
+        Running time: O(k lg k) since only the other's kept items are sorted
+        and pushed."""
+        # Sort by count alone (stored negated) so items are never compared
+        for key, _, item in sorted(other.heap.items, key=itemgetter(1),
+                                   reverse=True):
+            self._push_entry(key, item)
+
+    def results(self):
+        """Return a list of the kept items ranked from largest key to smallest.
+        Running time: O(k lg k) to sort the heap entries."""
+        entries = sorted(self.heap.items, reverse=True)
+        return [item for _, _, item in entries]
+
+    def _push_entry(self, key, item):
+        """Consume the given item with its precomputed key."""
+        self.count += 1
+        entry = (key, -self.count, item)
+        if self.heap.size() < self.k:
+            self.heap.insert(entry)
+        elif self.k > 0 and self.heap.get_min() < entry:
+            self.heap.replace_min(entry)
+
+
+def top_k(items, k, key=None):
+    """Return a list of the k largest of the given items according to the given
+    key function, ranked from largest to smallest.
+    Running time: O(n lg k) | Memory usage: O(k)"""
+    return TopK(k, key, items).results()
+
+
+def main():
+    """Read command-line arguments and print the k longest lines in a file."""
+    import sys
+    args = sys.argv[1:]  # Ignore script file name
+    if len(args) != 2:
+        print('Usage: {} k filename'.format(sys.argv[0]))
+        print('Print the k longest lines in the given file')
+        return
+    k = int(args[0])
+    with open(args[1]) as file:
+        lines = (line.rstrip('\n') for line in file)
+        for line in top_k(lines, k, key=len):
+            print(line)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,82 @@
+#!python
+
+from autocomplete import autocomplete_top
+from topk import TopK, top_k
+import random
+import unittest
+
+
+class TestTopK(unittest.TestCase):
+    def test_empty_stream(self):
+        selector = TopK(3)
+        assert selector.size() == 0
+        assert selector.results() == []
+
+    def test_fewer_items_than_k(self):
+        assert top_k([5, 1, 3], 10) == [5, 3, 1]
+
+    def test_zero_k(self):
+        assert top_k([5, 1, 3], 0) == []
+        with self.assertRaises(ValueError):
+            TopK(-1)
+
+    def test_random_items(self):
+        items = [random.randint(0, 1000) for _ in range(1000)]
+        for k in [1, 5, 100, 1000]:
+            selector = TopK(k, items=items)
+            assert selector.size() == k
+            assert selector.results() == sorted(items, reverse=True)[:k]
+
+    def test_unbounded_stream(self):
+        # Consume a generator lazily without materializing it
+        stream = (i * 7919 % 10007 for i in range(10007))
+        assert top_k(stream, 3) == [10006, 10005, 10004]
+
+    def test_key_and_ties(self):
+        words = 'one fish two fish red fish blue fish'.split()
+        # Equal keys keep the order in which items were seen
+        ranked = top_k(enumerate(words), 4, key=lambda pair: len(pair[1]))
+        assert ranked == [(1, 'fish'), (3, 'fish'), (5, 'fish'), (6, 'blue')]
+        assert top_k(words, 2, key=lambda word: -len(word)) == ['one', 'two']
+
+    def test_unorderable_items_with_key(self):
+        items = [{'score': score} for score in [3, 9, 1, 9]]
+        ranked = top_k(items, 2, key=lambda item: item['score'])
+        assert ranked == [{'score': 9}, {'score': 9}]
+        assert ranked[0] is items[1]
+
+    def test_merge_partial_results(self):
+        items = [random.randint(0, 1000) for _ in range(900)]
+        workers = [TopK(10, items=items[i::3]) for i in range(3)]
+        combined = TopK(10)
+        for worker in workers:
+            combined.merge(worker)
+        assert combined.results() == sorted(items, reverse=True)[:10]
+
+    def test_merge_keeps_first_seen_ties(self):
+        # Ties across workers rank like one stream of the first worker's
+        # items followed by the second's, whatever their heap layout
+        def score(pair):
+            return pair[0]
+        for k in [1, 3, 7, 10]:
+            first = [(random.randint(0, 2), 'a', i) for i in range(20)]
+            second = [(random.randint(0, 2), 'b', i) for i in range(20)]
+            combined = TopK(k, key=score, items=first)
+            combined.merge(TopK(k, key=score, items=second))
+            assert combined.results() == top_k(first + second, k, key=score)
+
+
+class TestAutocompleteTop(unittest.TestCase):
+    def test_shortest_first(self):
+        vocabulary = ['axle', 'axled', 'axlesmith', 'axletree', 'apple', 'ax']
+        assert autocomplete_top('axl', vocabulary, 2) == ['axle', 'axled']
+        assert autocomplete_top('b', vocabulary, 2) == []
+
+    def test_custom_score(self):
+        vocabulary = ['axle', 'axled', 'axlesmith', 'axletree']
+        ranked = autocomplete_top('axl', vocabulary, 2, score=len)
+        assert ranked == ['axlesmith', 'axletree']
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,89 @@
+#!python
+"""Opt-in validation mode in which sorting functions check their invariants
+(such as merge inputs and outputs being sorted) as they run. Checks cost
+extra passes over the items, so they are off by default. Turn them on by
+setting the SORTING_VALIDATE environment variable to a value other than 0
+before importing this module, with the --validate command-line flag of
+sorting.py, or by calling enable()."""
+import os
+
+# True if sorting functions should check their invariants
+ENABLED = os.environ.get('SORTING_VALIDATE', '0') not in ('', '0')
+
+
+def enable(enabled=True):
+    """Turn validation mode on, or off if enabled is False."""
+    global ENABLED
+    ENABLED = enabled
+
+
+def disable():
+    """Turn validation mode off."""
+    enable(False)
+
+
+def check_sorted(items, low=0, high=None, name='items'):
+    """Raise AssertionError if range `[low...high)` of given items (by
+    default, all of them) is not in sorted order. Unlike an assert statement,
+    this also checks when Python runs with -O, and it compares items in place
+    instead of copying the range into a new list."""
+    if high is None:
+        high = len(items)
+    for index in range(low + 1, high):
+        if items[index] < items[index-1]:
+            raise AssertionError('{} not sorted at index {}: {!r} < {!r}'
+                                 .format(name, index, items[index],
+                                         items[index-1]))
+
+
+def benchmark(sizes=(1000, 10000, 100000), repeat=3):
+    """Print the best of `repeat` running times of merge sort, bottom-up merge
+    sort, and the iterative merge of two sorted halves, on random ints of the
+    given sizes with validation mode off and on."""
+    import random
+    import time
+    # Import this module by name, since running it as a script makes it
+    # __main__, a separate copy from the one the sorting modules import
+    import validation
+    import sorting_iterative
+    from sorting_iterative import bottom_up_merge_sort
+    from sorting_recursive import merge_sort
+
+    def merge_halves(items):
+        half = len(items) // 2
+        items[:half] = sorted(items[:half])
+        items[half:] = sorted(items[half:])
+        sorting_iterative.merge(items, 0, len(items), half)
+
+    print('{:>21} {:>8} {:>12} {:>12} {:>8}'.format(
+        'sort', 'size', 'fast', 'validated', 'ratio'))
+    enabled = validation.ENABLED
+    try:
+        for size in sizes:
+            data = [random.randint(0, size) for _ in range(size)]
+            for sort in [merge_sort, bottom_up_merge_sort, merge_halves]:
+                times = [float('inf'), float('inf')]
+                for _ in range(repeat):
+                    for validate in [False, True]:
+                        validation.enable(validate)
+                        items = list(data)
+                        start_time = time.perf_counter()
+                        sort(items)
+                        times[validate] = min(times[validate],
+                                              time.perf_counter() - start_time)
+                print('{:>21} {:>8} {:>11.4f}s {:>11.4f}s {:>7.2f}x'.format(
+                    sort.__name__, size, times[0], times[1],
+                    times[1] / times[0]))
+    finally:
+        validation.enable(enabled)
+
+
+def main():
+    """Read command-line arguments and benchmark validation mode."""
+    import sys
+    sizes = [int(arg) for arg in sys.argv[1:]] or [1000, 10000, 100000]
+    benchmark(sizes)
+
+
+if __name__ == '__main__':
+    main()